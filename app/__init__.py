@@ -39,14 +39,28 @@ def create_app():
     from app.models import db
     db.init_app(app)
     
-    # Criar tabelas com retry
+    # O esquema é criado/atualizado no deploy (flask banco migrar);
+    # aqui apenas avisamos se o banco está atrasado
     with app.app_context():
         try:
-            db.create_all()
+            from app.migrations import versao_atual, versao_esperada
+            with db.engine.connect() as conn:
+                versao = versao_atual(conn)
+            if versao < versao_esperada():
+                print(f"⚠️  Banco na versão {versao}, esperado {versao_esperada()}: rode 'flask banco migrar'")
         except Exception as e:
-            print(f"⚠️  Aviso ao criar tabelas: {e}")
+            print(f"⚠️  Aviso ao verificar esquema do banco: {e}")
             # Não falhar completamente, deixar a app rodando
     
+    # Comandos de linha de comando
+    from app.comandos import totais_cli, banco_cli, resumo_cli, benchmark_cli, relatorios_cli, exportar_cli
+    app.cli.add_command(totais_cli)
+    app.cli.add_command(banco_cli)
+    app.cli.add_command(resumo_cli)
+    app.cli.add_command(benchmark_cli)
+    app.cli.add_command(relatorios_cli)
+    app.cli.add_command(exportar_cli)
+    
     # Registrar blueprints
     from app.routes import main_bp, api_bp
     app.register_blueprint(main_bp)
@@ -0,0 +1,183 @@
+"""
+Agregação de lançamentos em uma única consulta SQL
+
+Todos os resumos (fechamento, painel do gerente, resumo diário, período e
+PDFs) usam resumir(), que agrupa por forma de pagamento, categoria e tipo
+com somas condicionais e classifica cada forma em Python, já que o grupo
+inteiro tem a mesma forma.
+"""
+from datetime import date, datetime
+from sqlalchemy import func, case, and_
+from app.models import db, Lancamento, Estorno
+
+CLASSES_VENDA = ('dinheiro', 'pix', 'cartao_credito', 'cartao_debito', 'outras')
+
+
+def classificar_forma(forma):
+    """Classifica a forma de pagamento de uma venda (dinheiro, pix, cartões ou outras)"""
+    forma = (forma or '').lower()
+    if 'dinheiro' in forma:
+        return 'dinheiro'
+    if 'pix' in forma:
+        return 'pix'
+    if 'crédito' in forma or 'credito' in forma:
+        return 'cartao_credito'
+    if 'débito' in forma or 'debito' in forma:
+        return 'cartao_debito'
+    return 'outras'
+
+
+def _soma(condicao, coluna=Lancamento.valor):
+    return func.sum(case((condicao, coluna), else_=0))
+
+
+def _contagem(condicao):
+    return func.count(case((condicao, 1)))
+
+
+def _colunas_agregadas():
+    """Somas condicionais calculadas por grupo (lançamentos estornados ficam de fora)"""
+    ativo = Estorno.id.is_(None)
+    categoria = Lancamento.categoria
+
+    venda = and_(ativo, categoria == 'venda')
+    sangria = and_(ativo, categoria == 'sangria')
+    suprimento = and_(ativo, categoria == 'suprimento')
+    outros = and_(ativo, categoria == 'outros')
+
+    return [
+        _soma(venda).label('vendas'),
+        _contagem(venda).label('qtd_vendas'),
+        _soma(and_(venda, Lancamento.troco > 0), Lancamento.troco).label('troco'),
+        _soma(sangria).label('sangrias'),
+        _contagem(sangria).label('qtd_sangrias'),
+        _soma(suprimento).label('suprimentos'),
+        _contagem(suprimento).label('qtd_suprimentos'),
+        _soma(and_(outros, Lancamento.tipo == 'entrada')).label('outros_entrada'),
+        _soma(and_(outros, Lancamento.tipo != 'entrada')).label('outros_saida'),
+        _soma(and_(ativo, categoria == 'estorno')).label('estornos'),
+        _contagem(and_(ativo, categoria == 'estorno')).label('qtd_estornos'),
+        func.count(Lancamento.id).label('qtd_lancamentos'),
+        func.sum(Lancamento.valor).label('total'),
+    ]
+
+
+def consultar_grupos(*filtros, por=None):
+    """
+    Uma linha por forma de pagamento, categoria e tipo com todas as somas
+    condicionais. por: expressão extra de agrupamento (ex.: a hora),
+    retornada como 'grupo'.
+    """
+    chaves = [Lancamento.forma_pagamento, Lancamento.categoria, Lancamento.tipo]
+    if por is not None:
+        chaves.insert(0, por.label('grupo'))
+
+    return db.session.query(
+        *chaves,
+        *_colunas_agregadas()
+    ).select_from(Lancamento).outerjoin(
+        Estorno, Estorno.lancamento_id == Lancamento.id
+    ).filter(*filtros).group_by(*chaves).all()
+
+
+def resumir(*filtros):
+    """
+    Resume os lançamentos que atendem aos filtros (expressões SQLAlchemy).
+
+    Returns:
+        dict com 'vendas' (por classe e total), 'vendas_por_forma',
+        'movimentacoes', 'quantidades', 'totais' (entradas e saídas,
+        estornados inclusive) e 'categorias' (total por categoria e tipo),
+        valores em centavos
+    """
+    vendas = dict.fromkeys(CLASSES_VENDA, 0)
+    vendas_por_forma = {}
+    movimentacoes = dict.fromkeys(
+        ('sangrias', 'suprimentos', 'troco_dado', 'outros_entrada', 'outros_saida', 'estornos_dinheiro'), 0
+    )
+    quantidades = dict.fromkeys(('vendas', 'sangrias', 'suprimentos', 'lancamentos'), 0)
+    totais = dict.fromkeys(('entradas', 'saidas'), 0)
+    categorias = {}
+
+    for grupo in consultar_grupos(*filtros):
+        classe = classificar_forma(grupo.forma_pagamento)
+
+        if grupo.qtd_vendas:
+            vendas[classe] += grupo.vendas
+            forma = grupo.forma_pagamento or 'Não informado'
+            vendas_por_forma[forma] = vendas_por_forma.get(forma, 0) + grupo.vendas
+
+        if classe == 'dinheiro':
+            movimentacoes['troco_dado'] += grupo.troco
+            movimentacoes['estornos_dinheiro'] += grupo.estornos
+
+        movimentacoes['sangrias'] += grupo.sangrias
+        movimentacoes['suprimentos'] += grupo.suprimentos
+        movimentacoes['outros_entrada'] += grupo.outros_entrada
+        movimentacoes['outros_saida'] += grupo.outros_saida
+
+        quantidades['vendas'] += grupo.qtd_vendas
+        quantidades['sangrias'] += grupo.qtd_sangrias
+        quantidades['suprimentos'] += grupo.qtd_suprimentos
+        quantidades['lancamentos'] += grupo.qtd_lancamentos
+
+        totais['entradas' if grupo.tipo == 'entrada' else 'saidas'] += grupo.total
+        chave = (grupo.categoria, grupo.tipo)
+        categorias[chave] = categorias.get(chave, 0) + grupo.total
+
+    vendas['total'] = sum(vendas[classe] for classe in CLASSES_VENDA)
+
+    return {
+        'vendas': vendas,
+        'vendas_por_forma': dict(sorted(vendas_por_forma.items())),
+        'movimentacoes': movimentacoes,
+        'quantidades': quantidades,
+        'totais': totais,
+        'categorias': [
+            {'categoria': categoria, 'tipo': tipo, 'total': total}
+            for (categoria, tipo), total in categorias.items()
+        ],
+    }
+
+
+
+def _dia(coluna):
+    """Expressão que trunca a data/hora no dia, por dialeto"""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return func.date_trunc('day', coluna)
+    return func.date(coluna)
+
+
+def secoes_por_dia(*filtros):
+    """
+    Quantidade e soma por dia das seções do relatório por período, com os
+    mesmos critérios da relação detalhada (vendas, saídas e suprimentos,
+    estornados inclusive).
+
+    Returns:
+        {seção: [(date, quantidade, total em centavos)]} em ordem de data
+    """
+    condicoes = {
+        'vendas': Lancamento.categoria == 'venda',
+        'despesas': Lancamento.tipo == 'saida',
+        'suprimentos': Lancamento.categoria == 'suprimento',
+    }
+    colunas = []
+    for chave, condicao in condicoes.items():
+        colunas += [_contagem(condicao).label(f'qtd_{chave}'), _soma(condicao).label(chave)]
+
+    dia = _dia(Lancamento.data_hora).label('dia')
+    linhas = db.session.query(dia, *colunas).filter(*filtros).group_by(dia).order_by(dia).all()
+
+    secoes = {chave: [] for chave in condicoes}
+    for linha in linhas:
+        data = linha.dia
+        if isinstance(data, str):
+            data = date.fromisoformat(data[:10])
+        elif isinstance(data, datetime):
+            data = data.date()
+        for chave in condicoes:
+            quantidade = getattr(linha, f'qtd_{chave}')
+            if quantidade:
+                secoes[chave].append((data, quantidade, int(getattr(linha, chave) or 0)))
+    return secoes
@@ -0,0 +1,265 @@
+"""
+Medições de desempenho (flask benchmark ...)
+
+Rodam num banco SQLite temporário, criado e apagado pelo próprio comando,
+para não misturar lançamentos de teste com o movimento real. Com
+--banco-atual usam o DATABASE_URL configurado (ex.: um PostgreSQL de
+homologação) e removem o caixa de teste no final.
+"""
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from sqlalchemy import event
+
+
+@contextmanager
+def app_benchmark(banco_atual=False):
+    """App Flask com o esquema migrado, em banco temporário ou no configurado"""
+    from app import create_app
+    from app.migrations import aplicar_migracoes
+
+    caminho = None
+    url_original = os.environ.get('DATABASE_URL')
+    if not banco_atual:
+        descritor, caminho = tempfile.mkstemp(prefix='benchmark_', suffix='.db')
+        os.close(descritor)
+        os.environ['DATABASE_URL'] = f'sqlite:///{caminho}'
+
+    try:
+        app = create_app()
+        with app.app_context():
+            aplicar_migracoes(echo=lambda *args: None)
+        yield app
+    finally:
+        if caminho:
+            if url_original is None:
+                os.environ.pop('DATABASE_URL', None)
+            else:
+                os.environ['DATABASE_URL'] = url_original
+            os.remove(caminho)
+
+
+class ContadorConsultas:
+    """Conta os comandos SQL enviados ao banco enquanto ativo"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.total = 0
+
+    def _contar(self, *args, **kwargs):
+        self.total += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._contar)
+        return self
+
+    def __exit__(self, *args):
+        event.remove(self.engine, 'before_cursor_execute', self._contar)
+
+
+def medir(funcao, repeticoes):
+    """Executa funcao repeticoes vezes e retorna as durações em milissegundos"""
+    duracoes = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        duracoes.append((time.perf_counter() - inicio) * 1000)
+    return duracoes
+
+
+def resumir_duracoes(duracoes):
+    ordenadas = sorted(duracoes)
+    return {
+        'media': statistics.mean(ordenadas),
+        'mediana': statistics.median(ordenadas),
+        'p95': ordenadas[max(0, int(len(ordenadas) * 0.95) - 1)],
+        'max': ordenadas[-1],
+    }
+
+
+# ===== LANÇAMENTOS =====
+
+VENDA_EXEMPLO = {
+    'tipo': 'entrada',
+    'categoria': 'venda',
+    'forma_pagamento': 'Dinheiro',
+    'valor': 12.5,
+    'valor_recebido': 20,
+}
+
+
+def _lancamento_orm(data):
+    """Caminho anterior: busca o caixa, grava pela sessão e recarrega no to_dict()"""
+    from app.models import db, Caixa, Lancamento
+    from app.dinheiro import para_centavos
+
+    caixa = Caixa.query.filter_by(status='aberto').first()
+    valor = para_centavos(data['valor'])
+    lancamento = Lancamento(
+        caixa_id=caixa.id,
+        tipo=data['tipo'],
+        categoria=data['categoria'],
+        valor=valor,
+        forma_pagamento=data.get('forma_pagamento'),
+        descricao=data.get('descricao')
+    )
+    if data['categoria'] == 'venda' and 'valor_recebido' in data:
+        lancamento.valor_recebido = para_centavos(data['valor_recebido'])
+        lancamento.troco = lancamento.valor_recebido - valor
+
+    db.session.add(lancamento)
+    caixa.registrar_lancamento(lancamento)
+    db.session.commit()
+    return lancamento.to_dict()
+
+
+def _lancamento_rapido(data):
+    from app.lancamento_rapido import montar_lancamento, gravar_lancamento
+    return gravar_lancamento(montar_lancamento(data)).to_dict()
+
+
+def benchmark_lancamento(repeticoes=200, banco_atual=False):
+    """
+    Mede a latência por venda dos dois caminhos de gravação.
+    Retorna {caminho: {'media', 'mediana', 'p95', 'max', 'consultas'}}.
+    """
+    from app.models import db, Caixa, Lancamento, CaixaTotal, ResumoDiario
+    from app.lancamento_rapido import esquecer_caixa_aberto
+
+    resultados = {}
+    with app_benchmark(banco_atual) as app, app.app_context():
+        if Caixa.query.filter_by(status='aberto').first():
+            raise RuntimeError('Já existe um caixa aberto neste banco; feche-o antes do benchmark')
+
+        caixa = Caixa(operador='benchmark', troco_inicial=0, status='aberto')
+        db.session.add(caixa)
+        db.session.commit()
+        caixa_id = caixa.id
+        esquecer_caixa_aberto()
+
+        try:
+            for nome, caminho in (('atual (ORM)', _lancamento_orm), ('rápido', _lancamento_rapido)):
+                caminho(VENDA_EXEMPLO)  # aquecimento (conexão, cache de SQL)
+                db.session.remove()
+                with ContadorConsultas(db.engine) as contador:
+                    duracoes = medir(lambda: (caminho(VENDA_EXEMPLO), db.session.remove()), repeticoes)
+                resultados[nome] = {
+                    **resumir_duracoes(duracoes),
+                    'consultas': contador.total / repeticoes,
+                }
+        finally:
+            # Remove o caixa de teste (relevante com --banco-atual)
+            db.session.rollback()
+            for modelo in (Lancamento, CaixaTotal, ResumoDiario):
+                modelo.query.filter_by(caixa_id=caixa_id).delete(synchronize_session=False)
+            Caixa.query.filter_by(id=caixa_id).delete(synchronize_session=False)
+            db.session.commit()
+            esquecer_caixa_aberto()
+
+    return resultados
+
+
+# ===== PDF =====
+
+def _dados_pdf(quantidade):
+    """Caixa fechado e lançamentos de exemplo no formato que as rotas passam aos geradores"""
+    from app.dinheiro import para_centavos
+
+    formas = ('Dinheiro', 'Pix', 'Cartão de Crédito', 'Cartão de Débito')
+    lancamentos = []
+    for i in range(quantidade):
+        hora = f'2026-01-15T{8 + i * 10 // max(quantidade, 1):02d}:{i % 60:02d}:00'
+        if i % 10 == 9:
+            lanc = {'tipo': 'saida', 'categoria': 'sangria', 'valor': 50.0, 'descricao': 'Sangria'}
+        elif i % 10 == 8:
+            lanc = {'tipo': 'entrada', 'categoria': 'suprimento', 'valor': 20.0, 'descricao': 'Troco'}
+        else:
+            lanc = {'tipo': 'entrada', 'categoria': 'venda', 'valor': 12.5 + i % 7,
+                    'forma_pagamento': formas[i % len(formas)], 'descricao': f'Venda {i}'}
+        lanc.update(id=i + 1, data_hora=hora, estornado=False)
+        lancamentos.append(lanc)
+
+    entradas = sum(l['valor'] for l in lancamentos if l['tipo'] == 'entrada')
+    saidas = sum(l['valor'] for l in lancamentos if l['tipo'] == 'saida')
+    caixa = {
+        'id': 1, 'operador': 'benchmark', 'status': 'fechado',
+        'data_abertura': '2026-01-15T08:00:00', 'data_fechamento': '2026-01-15T18:00:00',
+        'troco_inicial': 100.0, 'total_entradas': entradas, 'total_saidas': saidas,
+        'saldo_atual': 100.0 + entradas - saidas, 'valor_contado': 100.0 + entradas - saidas,
+        'diferenca': 0.0,
+    }
+    vendas_por_forma = {}
+    for l in lancamentos:
+        if l['categoria'] == 'venda':
+            vendas_por_forma[l['forma_pagamento']] = vendas_por_forma.get(l['forma_pagamento'], 0) + l['valor']
+    periodo = {
+        'periodo': {'inicio': '2026-01-15T00:00:00', 'fim': '2026-01-15T23:59:59'},
+        'totais': {'entradas': entradas, 'saidas': saidas, 'saldo': entradas - saidas},
+        'categorias': [{'categoria': 'venda', 'tipo': 'entrada', 'total': sum(vendas_por_forma.values())}],
+        'pagamentos': [{'forma': f, 'total': v} for f, v in vendas_por_forma.items()],
+        'lancamentos': lancamentos,
+    }
+    # O resumo diário chega em centavos, como a rota o monta
+    vendas_centavos = {f: para_centavos(v) for f, v in vendas_por_forma.items()}
+    diario = {
+        'data': '2026-01-15',
+        'total_vendas': sum(vendas_centavos.values()),
+        'vendas': vendas_centavos,
+        'movimentacoes': {'sangrias': para_centavos(saidas), 'suprimentos': 0},
+        'lancamentos': lancamentos,
+    }
+    return caixa, lancamentos, periodo, diario
+
+
+def _estilos_sem_cache():
+    """Monta estilos e estilos de tabela do zero, como os geradores faziam a cada chamada"""
+    from app import pdf_modelos as m
+
+    m.montar_estilos()
+    m.estilo_tabela.__wrapped__('#26a269', '#e8f5e9')
+    m.estilo_tabela.__wrapped__('#ff7043', '#fff3e0', linha_destaque=-1, cor_destaque='#26a269')
+    m.estilo_tabela.__wrapped__('#5c6bc0', '#e8eaf6', linha_destaque=5, cor_destaque='#1a5fb4')
+    for secao in m.SECOES.values():
+        m.estilo_titulo_secao.__wrapped__(secao.cor)
+        m.estilo_tabela_detalhe.__wrapped__(secao.cor, secao.fundo, len(secao.campos) - 1, 5, 10)
+
+
+def _estilos_com_cache():
+    from app import pdf_modelos as m
+
+    m.estilos()
+    m.estilo_tabela('#26a269', '#e8f5e9')
+    m.estilo_tabela('#ff7043', '#fff3e0', linha_destaque=-1, cor_destaque='#26a269')
+    m.estilo_tabela('#5c6bc0', '#e8eaf6', linha_destaque=5, cor_destaque='#1a5fb4')
+    for secao in m.SECOES.values():
+        m.estilo_titulo_secao(secao.cor)
+        m.estilo_tabela_detalhe(secao.cor, secao.fundo, len(secao.campos) - 1, 5, 10)
+
+
+def benchmark_pdf(repeticoes=20, lancamentos=200):
+    """
+    Mede a montagem dos estilos (do zero x em cache) e cada gerador de PDF.
+    Retorna {etapa: {'media', 'mediana', 'p95', 'max'}}; não usa banco.
+    """
+    from app.pdf_generator import (
+        gerar_relatorio_caixa_pdf, gerar_relatorio_periodo_pdf, gerar_resumo_diario_pdf,
+        gerar_cupom_termico_caixa
+    )
+
+    caixa, lista, periodo, diario = _dados_pdf(lancamentos)
+    etapas = (
+        ('estilos (novo)', _estilos_sem_cache),
+        ('estilos (cache)', _estilos_com_cache),
+        ('caixa', lambda: gerar_relatorio_caixa_pdf(caixa, lista)),
+        ('cupom', lambda: gerar_cupom_termico_caixa(caixa, lista)),
+        ('período', lambda: gerar_relatorio_periodo_pdf(periodo)),
+        ('diário', lambda: gerar_resumo_diario_pdf(diario)),
+    )
+
+    resultados = {}
+    for nome, funcao in etapas:
+        funcao()  # aquecimento (fontes, caches)
+        resultados[nome] = resumir_duracoes(medir(funcao, repeticoes))
+    return resultados
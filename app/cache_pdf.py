@@ -0,0 +1,91 @@
+"""
+Cache em disco dos PDFs de caixas fechados (relatório e cupom)
+
+Depois de fechado, um caixa só muda por estorno ou exclusão de lançamento,
+e toda mudança incrementa Caixa.versao. Cada PDF é guardado num arquivo
+com o hash de (tipo, caixa, versão do caixa, versão do modelo, nome da
+loja) no nome, e o mesmo hash é a ETag: qualquer mudança aponta para outro
+arquivo e o antigo deixa de ser usado até sair pelo limite de tamanho.
+
+Os workers dividem o diretório (PDF_CACHE_DIR). A gravação é atômica
+(arquivo temporário + os.replace). Cada acesso atualiza a data do arquivo,
+e acima de PDF_CACHE_MAX_MB saem os acessados há mais tempo.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from app.pdf_modelos import VERSAO
+
+DIRETORIO = os.environ.get('PDF_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'simplescaixa-pdf')
+LIMITE_BYTES = int(float(os.environ.get('PDF_CACHE_MAX_MB', 200)) * 1024 * 1024)
+
+TIPOS = ('caixa', 'cupom')
+
+_lock = threading.Lock()
+
+
+def chave(tipo, caixa_id, versao, nome_loja):
+    """Hash que identifica o PDF (também usado como ETag)"""
+    texto = f'{tipo}|{caixa_id}|{versao}|{VERSAO}|{nome_loja}'
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()[:32]
+
+
+def caminho(tipo, caixa_id, etag):
+    return os.path.join(DIRETORIO, f'{tipo}-{caixa_id}-{etag}.pdf')
+
+
+def buscar(arquivo):
+    """True se o PDF já está guardado; marca o acesso"""
+    try:
+        os.utime(arquivo)
+        return True
+    except OSError:
+        return False
+
+
+def guardar(arquivo, conteudo):
+    """Grava o PDF e remove os mais antigos se o cache passou do limite"""
+    os.makedirs(DIRETORIO, exist_ok=True)
+    fd, temporario = tempfile.mkstemp(dir=DIRETORIO, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as saida:
+            saida.write(conteudo)
+        os.replace(temporario, arquivo)
+    except OSError:
+        _remover(temporario)
+        raise
+    limpar()
+
+
+def limpar(limite=None):
+    """Remove os PDFs acessados há mais tempo até o total caber no limite"""
+    limite = LIMITE_BYTES if limite is None else limite
+    with _lock:
+        arquivos = []
+        try:
+            entradas = list(os.scandir(DIRETORIO))
+        except OSError:
+            return
+        for entrada in entradas:
+            if not entrada.name.endswith('.pdf'):
+                continue
+            try:
+                info = entrada.stat()
+            except OSError:
+                continue
+            arquivos.append((info.st_mtime, info.st_size, entrada.path))
+
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        for _, tamanho, arquivo in sorted(arquivos):
+            if total <= limite:
+                break
+            _remover(arquivo)
+            total -= tamanho
+
+
+def _remover(arquivo):
+    try:
+        os.remove(arquivo)
+    except OSError:
+        pass
@@ -0,0 +1,194 @@
+"""
+Comandos de linha de comando (flask <comando>)
+"""
+import click
+from flask.cli import AppGroup
+from app.models import db, Caixa
+from app.dinheiro import formatar_centavos
+
+totais_cli = AppGroup('totais', help='Totais acumulados dos caixas')
+banco_cli = AppGroup('banco', help='Esquema e migrações do banco de dados')
+resumo_cli = AppGroup('resumo-diario', help='Resumo diário consolidado dos painéis')
+benchmark_cli = AppGroup('benchmark', help='Medições de desempenho')
+relatorios_cli = AppGroup('relatorios', help='Fila de relatórios em PDF')
+
+
+@banco_cli.command('migrar')
+def migrar():
+    """Cria as tabelas e aplica as migrações pendentes"""
+    from app.migrations import aplicar_migracoes, versao_esperada
+    aplicadas = aplicar_migracoes(echo=click.echo)
+    if aplicadas:
+        click.echo(f"✓ {len(aplicadas)} migração(ões) aplicada(s), banco na versão {versao_esperada()}")
+    else:
+        click.echo(f"✓ Banco já está na versão {versao_esperada()}")
+
+
+@banco_cli.command('versao')
+def versao():
+    """Mostra a versão do esquema do banco"""
+    from app.migrations import versao_atual, versao_esperada, MIGRACOES
+    with db.engine.connect() as conn:
+        atual = versao_atual(conn)
+    click.echo(f"Versão atual: {atual} | esperada: {versao_esperada()}")
+    for numero, descricao, _ in MIGRACOES:
+        marca = '✓' if numero <= atual else '·'
+        click.echo(f"  {marca} {numero:03d} {descricao}")
+
+
+def _comparar_totais(caixa):
+    """Lista as divergências entre os totais acumulados e o livro de lançamentos"""
+    campos_livro, totais_livro = caixa.totais_do_livro()
+    campos_acum, totais_acum = caixa.totais_acumulados()
+    
+    divergencias = []
+    for campo, valor in campos_livro.items():
+        if valor != (campos_acum.get(campo) or 0):
+            divergencias.append((campo, campos_acum.get(campo), valor))
+    
+    for chave in set(totais_livro) | set(totais_acum):
+        esperado = totais_livro.get(chave, 0)
+        atual = totais_acum.get(chave, 0)
+        if esperado != atual:
+            divergencias.append(('/'.join(chave), atual, esperado))
+    
+    return divergencias
+
+
+def _caixas_selecionados(caixa_id):
+    query = Caixa.query
+    if caixa_id:
+        query = query.filter_by(id=caixa_id)
+    return query.order_by(Caixa.id).all()
+
+
+@totais_cli.command('verificar')
+@click.option('--caixa', 'caixa_id', type=int, help='Verificar apenas este caixa')
+def verificar_totais(caixa_id):
+    """Compara os totais acumulados com o livro de lançamentos"""
+    com_erro = 0
+    for caixa in _caixas_selecionados(caixa_id):
+        divergencias = _comparar_totais(caixa)
+        if divergencias:
+            com_erro += 1
+            click.echo(f"❌ Caixa #{caixa.id}:")
+            for campo, atual, esperado in divergencias:
+                click.echo(
+                    f"   {campo}: acumulado={formatar_centavos(atual or 0)} "
+                    f"livro={formatar_centavos(esperado)}"
+                )
+    
+    if com_erro:
+        click.echo(f"⚠️  {com_erro} caixa(s) com divergência. Use 'flask totais reconstruir'.")
+        raise SystemExit(1)
+    click.echo("✓ Totais acumulados conferem com o livro")
+
+
+@totais_cli.command('reconstruir')
+@click.option('--caixa', 'caixa_id', type=int, help='Reconstruir apenas este caixa')
+def reconstruir_totais(caixa_id):
+    """Recalcula os totais acumulados a partir do livro de lançamentos"""
+    caixas = _caixas_selecionados(caixa_id)
+    for caixa in caixas:
+        caixa.reconstruir_totais()
+    db.session.commit()
+    click.echo(f"✓ Totais reconstruídos para {len(caixas)} caixa(s)")
+
+
+@resumo_cli.command('reconstruir')
+@click.option('--desde', type=click.DateTime(formats=['%Y-%m-%d']), help='Reconstruir só a partir desta data (AAAA-MM-DD)')
+def reconstruir_resumo(desde):
+    """Recalcula o resumo diário a partir do livro de lançamentos"""
+    from app.resumo_diario import reconstruir
+    linhas = reconstruir(desde.date() if desde else None)
+    click.echo(f"✓ Resumo diário reconstruído ({linhas} linha(s) dia/caixa)")
+
+
+@relatorios_cli.command('trabalhar')
+@click.option('-p', '--processos', type=int, help='Relatórios gerados ao mesmo tempo (padrão: RELATORIOS_PROCESSOS ou 2)')
+def trabalhar_relatorios(processos):
+    """Processa a fila de relatórios até ser interrompido"""
+    from flask import current_app
+    from app import fila_relatorios
+
+    processos = processos or fila_relatorios.PROCESSOS
+    click.echo(
+        f"📄 Fila de relatórios: {processos} processo(s), até {fila_relatorios.TEMPO_MAXIMO}s e "
+        f"{fila_relatorios.MEMORIA_MAXIMA_MB} MB cada, arquivos em {fila_relatorios.DIRETORIO}"
+    )
+    fila_relatorios.trabalhar(current_app._get_current_object(), processos, echo=click.echo)
+
+
+@relatorios_cli.command('limpar')
+def limpar_relatorios():
+    """Remove os pedidos expirados e seus arquivos"""
+    from app.fila_relatorios import limpar
+    click.echo(f"✓ {limpar()} pedido(s) expirado(s) removido(s)")
+
+
+@benchmark_cli.command('lancamento')
+@click.option('-n', '--repeticoes', default=200, show_default=True, help='Vendas gravadas por caminho')
+@click.option('--banco-atual', is_flag=True, help='Usar o DATABASE_URL configurado em vez de um SQLite temporário')
+def benchmark_lancamento(repeticoes, banco_atual):
+    """Latência por venda: caminho ORM anterior x caminho rápido"""
+    from app.benchmark import benchmark_lancamento as medir
+    
+    try:
+        resultados = medir(repeticoes, banco_atual)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    
+    click.echo(f"⏱️  {repeticoes} vendas por caminho (ms por venda)")
+    click.echo(f"   {'caminho':<14}{'média':>8}{'mediana':>9}{'p95':>8}{'máx':>8}{'SQL/venda':>11}")
+    for nome, r in resultados.items():
+        click.echo(
+            f"   {nome:<14}{r['media']:>8.2f}{r['mediana']:>9.2f}{r['p95']:>8.2f}"
+            f"{r['max']:>8.2f}{r['consultas']:>11.1f}"
+        )
+
+
+@benchmark_cli.command('pdf')
+@click.option('-n', '--repeticoes', default=20, show_default=True, help='Execuções por etapa')
+@click.option('-l', '--lancamentos', default=200, show_default=True, help='Lançamentos nos relatórios de exemplo')
+def benchmark_pdf(repeticoes, lancamentos):
+    """Tempo dos estilos (do zero x em cache) e de cada relatório em PDF"""
+    from app.benchmark import benchmark_pdf as medir
+
+    resultados = medir(repeticoes, lancamentos)
+
+    click.echo(f"⏱️  {repeticoes} execuções por etapa, {lancamentos} lançamentos (ms)")
+    click.echo(f"   {'etapa':<17}{'média':>8}{'mediana':>9}{'p95':>8}{'máx':>8}")
+    for nome, r in resultados.items():
+        click.echo(
+            f"   {nome:<17}{r['media']:>8.3f}{r['mediana']:>9.3f}{r['p95']:>8.3f}{r['max']:>8.3f}"
+        )
+
+
+@click.command('exportar')
+@click.argument('tabela', type=click.Choice(['lancamentos', 'caixas']))
+@click.option('--formato', type=click.Choice(['ndjson', 'csv']), default='ndjson', show_default=True)
+@click.option('--gzip', 'comprimir', is_flag=True, help='Comprimir a saída em gzip')
+@click.option('--saida', type=click.Path(dir_okay=False, writable=True), help='Arquivo de saída (padrão: stdout)')
+@click.option('--data-inicio', help='Data/hora inicial (ISO, ex.: 2025-01-01)')
+@click.option('--data-fim', help='Data/hora final (ISO, ex.: 2025-12-31T23:59:59)')
+@click.option('--tipo', help='Somente lançamentos deste tipo (entrada/saida)')
+@click.option('--categoria', help='Somente lançamentos desta categoria')
+@click.option('--status', help='Somente caixas neste status (aberto/fechado)')
+@click.option('--caixa', 'caixa_id', type=int, help='Somente este caixa')
+@click.option('--fields', help='Campos separados por vírgula')
+def exportar_cli(tabela, formato, comprimir, saida, **filtros):
+    """Exporta lançamentos ou caixas em NDJSON/CSV sem carregar tudo na memória"""
+    from app.exportacao import exportar
+    
+    args = {chave: valor for chave, valor in filtros.items() if valor is not None}
+    try:
+        conteudo = exportar(tabela, args, formato=formato, gzip=comprimir)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    
+    destino = click.open_file(saida or '-', 'wb')
+    with destino:
+        for bloco in conteudo:
+            destino.write(bloco)
+    if saida:
+        click.echo(f"✓ Exportação salva em {saida}", err=True)
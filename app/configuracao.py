@@ -0,0 +1,79 @@
+"""
+Cache da configuração da loja por worker
+
+A configuração é lida uma vez e servida da memória. A cada poucos segundos
+o worker confere só a coluna versao (leitura pela chave primária); se outro
+worker salvou uma alteração, a versão mudou e a configuração é recarregada.
+"""
+import threading
+import time
+from collections import namedtuple
+from sqlalchemy import select, update
+from app.models import db, Configuracao
+
+# Intervalo máximo para um worker perceber alteração feita em outro
+INTERVALO_VERIFICACAO = 5
+
+ConfigLoja = namedtuple('ConfigLoja', 'nome_loja responsavel formas_pagamento versao')
+
+_cache = None
+_verificado_em = 0.0
+_lock = threading.Lock()
+
+
+def _versao_no_banco():
+    return db.session.execute(
+        select(Configuracao.versao).where(Configuracao.id == Configuracao.ID_UNICO)
+    ).scalar()
+
+
+def _carregar():
+    config = Configuracao.get_config()
+    return ConfigLoja(
+        nome_loja=config.nome_loja,
+        responsavel=config.responsavel,
+        formas_pagamento=tuple(config.formas_pagamento.split(',')),
+        versao=config.versao,
+    )
+
+
+def obter_configuracao():
+    """Configuração da loja (nome_loja, responsavel, formas_pagamento, versao)"""
+    global _cache, _verificado_em
+
+    agora = time.monotonic()
+    cache = _cache
+    if cache is not None and agora - _verificado_em < INTERVALO_VERIFICACAO:
+        return cache
+
+    with _lock:
+        cache = _cache
+        if cache is None or _versao_no_banco() != cache.versao:
+            cache = _cache = _carregar()
+        _verificado_em = agora
+        return cache
+
+
+def atualizar_configuracao(nome_loja=None, responsavel=None, formas_pagamento=None):
+    """Grava as alterações incrementando a versão e invalida o cache local"""
+    global _cache
+
+    valores = {}
+    if nome_loja is not None:
+        valores['nome_loja'] = nome_loja
+    if responsavel is not None:
+        valores['responsavel'] = responsavel
+    if formas_pagamento is not None:
+        valores['formas_pagamento'] = ','.join(formas_pagamento)
+
+    Configuracao.garantir_existente()
+    if valores:
+        db.session.execute(
+            update(Configuracao)
+            .where(Configuracao.id == Configuracao.ID_UNICO)
+            .values(**valores, versao=Configuracao.versao + 1)
+        )
+    db.session.commit()
+
+    with _lock:
+        _cache = None
@@ -0,0 +1,145 @@
+"""
+Consulta paginada de lançamentos (histórico e exportação)
+
+Os filtros vêm da query string e a listagem usa paginação por cursor
+(keyset) em (data_hora, id), do mais recente para o mais antigo: cada
+página é um SELECT limitado que continua de onde a anterior parou, sem
+OFFSET e sem montar objetos ORM.
+"""
+from datetime import datetime
+from sqlalchemy import func, case, and_, or_
+from app.models import db, Lancamento, Estorno
+from app.dinheiro import para_reais
+
+LIMITE_PADRAO = 100
+LIMITE_MAXIMO = 500
+
+
+def para_iso(valor):
+    """Data/hora em ISO 8601 para JSON e CSV (None continua None)"""
+    return valor.isoformat() if valor else None
+
+
+# campo -> (expressão SQL, conversão para JSON)
+CAMPOS_LANCAMENTO = {
+    'id': (Lancamento.id, None),
+    'caixa_id': (Lancamento.caixa_id, None),
+    'data_hora': (Lancamento.data_hora, para_iso),
+    'tipo': (Lancamento.tipo, None),
+    'categoria': (Lancamento.categoria, None),
+    'forma_pagamento': (Lancamento.forma_pagamento, None),
+    'valor': (Lancamento.valor, para_reais),
+    'valor_recebido': (Lancamento.valor_recebido, para_reais),
+    'troco': (Lancamento.troco, para_reais),
+    'descricao': (Lancamento.descricao, None),
+    'estornado': (Estorno.id.isnot(None), bool),
+    'motivo_estorno': (Estorno.motivo, None),
+}
+
+
+def filtros_lancamentos(args):
+    """
+    Monta os filtros a partir da query string (caixa_id, data_inicio,
+    data_fim, tipo, categoria). Levanta ValueError se algum for inválido.
+    """
+    filtros = []
+
+    if args.get('caixa_id'):
+        filtros.append(Lancamento.caixa_id == int(args['caixa_id']))
+    if args.get('data_inicio'):
+        filtros.append(Lancamento.data_hora >= datetime.fromisoformat(args['data_inicio']))
+    if args.get('data_fim'):
+        filtros.append(Lancamento.data_hora <= datetime.fromisoformat(args['data_fim']))
+    if args.get('tipo'):
+        filtros.append(Lancamento.tipo == args['tipo'])
+    if args.get('categoria'):
+        filtros.append(Lancamento.categoria == args['categoria'])
+
+    return filtros
+
+
+def campos_solicitados(fields, mapa=CAMPOS_LANCAMENTO):
+    """Lista de campos do parâmetro fields= (todos do mapa se vazio). ValueError se desconhecido."""
+    if not fields:
+        return list(mapa)
+
+    campos = [campo.strip() for campo in fields.split(',') if campo.strip()]
+    desconhecidos = [campo for campo in campos if campo not in mapa]
+    if desconhecidos:
+        raise ValueError(f"Campo(s) desconhecido(s): {', '.join(desconhecidos)}")
+    return campos
+
+
+def codificar_cursor(data_hora, id):
+    return f"{data_hora.isoformat()}_{id}"
+
+
+def decodificar_cursor(cursor):
+    data_hora, _, id = cursor.rpartition('_')
+    return datetime.fromisoformat(data_hora), int(id)
+
+
+def consultar_lancamentos(campos, filtros):
+    """SELECT só das colunas pedidas, com as colunas do cursor sempre incluídas"""
+    colunas = [CAMPOS_LANCAMENTO[campo][0].label(campo) for campo in campos]
+    query = db.session.query(
+        *colunas,
+        Lancamento.data_hora.label('_data_hora'),
+        Lancamento.id.label('_id')
+    ).select_from(Lancamento)
+
+    if any(campo in ('estornado', 'motivo_estorno') for campo in campos):
+        query = query.outerjoin(Estorno, Estorno.lancamento_id == Lancamento.id)
+
+    return query.filter(*filtros).order_by(Lancamento.data_hora.desc(), Lancamento.id.desc())
+
+
+def serializar(linha, campos, mapa=CAMPOS_LANCAMENTO):
+    dados = {}
+    for campo in campos:
+        valor = getattr(linha, campo)
+        conversao = mapa[campo][1]
+        dados[campo] = conversao(valor) if conversao and valor is not None else valor
+    return dados
+
+
+def pagina_lancamentos(campos, filtros, limite=LIMITE_PADRAO, cursor=None):
+    """
+    Uma página de lançamentos a partir do cursor.
+
+    Returns:
+        (lista de dicts, próximo cursor ou None quando não há mais páginas)
+    """
+    limite = max(1, min(limite, LIMITE_MAXIMO))
+    query = consultar_lancamentos(campos, filtros)
+
+    if cursor:
+        data_hora, id = decodificar_cursor(cursor)
+        query = query.filter(or_(
+            Lancamento.data_hora < data_hora,
+            and_(Lancamento.data_hora == data_hora, Lancamento.id < id)
+        ))
+
+    # Uma linha a mais só para saber se existe próxima página
+    linhas = query.limit(limite + 1).all()
+    proximo = None
+    if len(linhas) > limite:
+        linhas = linhas[:limite]
+        proximo = codificar_cursor(linhas[-1]._data_hora, linhas[-1]._id)
+
+    return [serializar(linha, campos) for linha in linhas], proximo
+
+
+def contar_lancamentos(filtros):
+    """Quantidade e totais de entradas/saídas dos filtros (só quando pedido)"""
+    linha = db.session.query(
+        func.count(Lancamento.id),
+        func.sum(case((Lancamento.tipo == 'entrada', Lancamento.valor), else_=0)),
+        func.sum(case((Lancamento.tipo != 'entrada', Lancamento.valor), else_=0)),
+    ).filter(*filtros).one()
+
+    return {
+        'quantidade': linha[0],
+        'entradas': para_reais(int(linha[1] or 0)),
+        'saidas': para_reais(int(linha[2] or 0)),
+    }
@@ -0,0 +1,293 @@
+"""
+Cupom térmico de fechamento em texto (48 colunas) e ESC/POS
+
+linhas_cupom() monta o cupom uma vez; o PDF
+(pdf_generator.gerar_cupom_termico_caixa), o texto puro e o ESC/POS (com
+negrito, tamanhos, acentos na página de código 860 e corte do papel) só
+desenham essas linhas. Texto e ESC/POS vão direto para a impressora de
+80mm (Elgin I9 e similares) em milissegundos e com poucos KB, sem passar
+pelo PDF e pelo driver da impressora.
+
+Com IMPRESSORA_HOST configurado, imprimir() envia o ESC/POS por TCP para a
+impressora em rede (porta IMPRESSORA_PORTA, padrão 9100).
+"""
+import os
+import socket
+import textwrap
+from datetime import datetime
+from app.pdf_modelos import formatar_hora, encurtar
+from app.dinheiro import para_centavos, centavos_de, formatar_centavos
+
+COLUNAS = 48
+FORMATOS = ('escpos', 'text')
+
+IMPRESSORA_HOST = os.environ.get('IMPRESSORA_HOST')
+IMPRESSORA_PORTA = int(os.environ.get('IMPRESSORA_PORTA', 9100))
+IMPRESSORA_TEMPO = float(os.environ.get('IMPRESSORA_TEMPO', 5))
+
+CATEGORIAS_CUPOM = ('venda', 'sangria', 'suprimento')
+
+# Comandos ESC/POS
+ESC = b'\x1b'
+GS = b'\x1d'
+INICIAR = ESC + b'@'
+PAGINA_CP860 = ESC + b't\x03'
+ALINHAR = {'esquerda': ESC + b'a\x00', 'centro': ESC + b'a\x01'}
+NEGRITO = {False: ESC + b'E\x00', True: ESC + b'E\x01'}
+TAMANHO = {1: GS + b'!\x00', 2: GS + b'!\x11'}
+AVANCAR_E_CORTAR = GS + b'V\x42\x03'
+
+# estilo: (alinhamento, negrito, tamanho)
+ESTILOS = {
+    'titulo': ('centro', True, 2),
+    'subtitulo': ('centro', True, 1),
+    'valor': ('centro', True, 2),
+    'central': ('centro', False, 1),
+    'destaque': ('centro', True, 1),
+    'item': ('esquerda', False, 1),
+}
+
+
+def dados_cupom(caixa_data, lancamentos, resumo=None):
+    """
+    Valores do cupom: saldo em dinheiro, vendas por forma de pagamento,
+    quantidades e lançamentos separados por categoria. Os lançamentos
+    chegam como na API (em reais); os totais saem em centavos.
+
+    resumo: resultado de agregacao.resumir() para o caixa; se omitido,
+    os totais são calculados a partir da lista de lançamentos.
+    """
+    troco_inicial = centavos_de(caixa_data, 'troco_inicial')
+
+    # Saldo em dinheiro (usar do caixa_data se disponível, senão calcular)
+    saldo_dinheiro = para_centavos(caixa_data.get('saldo_dinheiro'))
+
+    if saldo_dinheiro is None:
+        # Calcular se não estiver disponível (para retrocompatibilidade)
+        vendas_dinheiro = 0
+        sangrias_total = 0
+        suprimentos_total = 0
+        despesas_dinheiro = 0
+
+        for lanc in lancamentos:
+            if lanc.get('categoria') == 'venda' and lanc.get('tipo') == 'entrada':
+                if lanc.get('forma_pagamento') == 'Dinheiro':
+                    vendas_dinheiro += centavos_de(lanc, 'valor')
+            elif lanc.get('categoria') == 'sangria' and lanc.get('tipo') == 'saida':
+                sangrias_total += centavos_de(lanc, 'valor')
+            elif lanc.get('categoria') == 'suprimento' and lanc.get('tipo') == 'entrada':
+                suprimentos_total += centavos_de(lanc, 'valor')
+            elif lanc.get('categoria') not in CATEGORIAS_CUPOM and lanc.get('tipo') == 'saida':
+                if lanc.get('forma_pagamento') == 'Dinheiro' or not lanc.get('forma_pagamento'):
+                    despesas_dinheiro += centavos_de(lanc, 'valor')
+
+        saldo_dinheiro = troco_inicial + vendas_dinheiro + suprimentos_total - sangrias_total - despesas_dinheiro
+
+    # Vendas por forma de pagamento
+    if resumo is not None:
+        vendas_por_forma = resumo['vendas_por_forma']
+        total_vendas = resumo['vendas']['total']
+    else:
+        vendas_por_forma = {}
+        total_vendas = 0
+        for lanc in lancamentos:
+            if lanc.get('categoria') == 'venda' and lanc.get('tipo') == 'entrada':
+                forma = lanc.get('forma_pagamento') or 'N/I'
+                valor = centavos_de(lanc, 'valor')
+                vendas_por_forma[forma] = vendas_por_forma.get(forma, 0) + valor
+                total_vendas += valor
+
+    # Contagem de lançamentos
+    if resumo is not None:
+        quantidades = {
+            'vendas': resumo['quantidades']['vendas'],
+            'sangrias': resumo['quantidades']['sangrias'],
+            'suprimentos': resumo['quantidades']['suprimentos'],
+        }
+    else:
+        quantidades = {
+            'vendas': len([l for l in lancamentos if l.get('categoria') == 'venda']),
+            'sangrias': len([l for l in lancamentos if l.get('categoria') == 'sangria']),
+            'suprimentos': len([l for l in lancamentos if l.get('categoria') == 'suprimento']),
+        }
+
+    return {
+        'saldo_dinheiro': saldo_dinheiro,
+        'vendas_por_forma': vendas_por_forma,
+        'total_vendas': total_vendas,
+        'quantidades': quantidades,
+        'vendas': [l for l in lancamentos if l.get('categoria') == 'venda'],
+        'sangrias': [l for l in lancamentos if l.get('categoria') == 'sangria'],
+        'suprimentos': [l for l in lancamentos if l.get('categoria') == 'suprimento'],
+        'outros': [l for l in lancamentos if l.get('categoria') not in CATEGORIAS_CUPOM],
+    }
+
+
+# ===== LINHAS =====
+
+def _colunas(esquerda, direita, largura=COLUNAS):
+    """Texto à esquerda e valor à direita na mesma linha"""
+    esquerda = esquerda[:max(largura - len(direita) - 1, 0)]
+    return f"{esquerda}{' ' * (largura - len(esquerda) - len(direita))}{direita}"
+
+
+def _lancamento(lanc, descricao, sinal=''):
+    hora = formatar_hora(lanc.get('data_hora', ''), '%H:%M', '--:--')
+    return (f"{hora} {encurtar(descricao, 25)}", f"{sinal}{formatar_centavos(centavos_de(lanc, 'valor'))}")
+
+
+def linhas_cupom(caixa_data, lancamentos, nome_loja='Minha Loja', resumo=None):
+    """
+    Lista de (estilo, texto) do cupom. texto é uma str ou um par (rótulo,
+    valor) para as linhas de duas colunas; estilo None é a linha divisória
+    e texto vazio, um espaço.
+    """
+    dados = dados_cupom(caixa_data, lancamentos, resumo)
+    linhas = []
+
+    def linha(estilo, texto=''):
+        linhas.append((estilo, texto))
+
+    def divisoria():
+        linhas.append((None, '-' * COLUNAS))
+
+    # Cabeçalho
+    linha('titulo', nome_loja.upper())
+    linha('subtitulo', 'FECHAMENTO DE CAIXA')
+    divisoria()
+
+    status_texto = "ABERTO" if caixa_data.get('status') == 'aberto' else "FECHADO"
+    linha('destaque', f"Caixa #{caixa_data.get('id', '-')} - {status_texto}")
+    if caixa_data.get('operador'):
+        linha('central', f"Operador: {caixa_data.get('operador')}")
+    linha('central', f"Abertura: {_data(caixa_data.get('data_abertura'))}")
+    if caixa_data.get('data_fechamento'):
+        linha('central', f"Fechamento: {_data(caixa_data.get('data_fechamento'))}")
+    divisoria()
+
+    # Resumo financeiro
+    linha('subtitulo', 'RESUMO')
+    linha('item', ('Troco Inicial:', formatar_centavos(centavos_de(caixa_data, 'troco_inicial'))))
+    linha('item', ('(+) Entradas:', formatar_centavos(centavos_de(caixa_data, 'total_entradas'))))
+    linha('item', ('(-) Saídas:', formatar_centavos(centavos_de(caixa_data, 'total_saidas'))))
+    linha('item')
+    linha('subtitulo', 'SALDO FINAL')
+    linha('valor', formatar_centavos(centavos_de(caixa_data, 'saldo_atual')))
+    linha('subtitulo', 'SALDO EM DINHEIRO')
+    linha('valor', formatar_centavos(dados['saldo_dinheiro']))
+
+    # Diferença (se houver)
+    if caixa_data.get('valor_contado') is not None:
+        divisoria()
+        diferenca = centavos_de(caixa_data, 'diferenca')
+        linha('central', f"Valor Contado: {formatar_centavos(centavos_de(caixa_data, 'valor_contado'))}")
+        if diferenca == 0:
+            linha('central', "Diferença: CONFERIDO")
+        elif diferenca > 0:
+            linha('central', f"Diferença: +{formatar_centavos(diferenca)} (SOBRA)")
+        else:
+            linha('central', f"Diferença: {formatar_centavos(diferenca)} (FALTA)")
+    divisoria()
+
+    if dados['vendas_por_forma']:
+        linha('subtitulo', 'VENDAS POR PAGAMENTO')
+        for forma in sorted(dados['vendas_por_forma']):
+            linha('item', (forma, formatar_centavos(dados['vendas_por_forma'][forma])))
+        linha('destaque', ('TOTAL VENDAS', formatar_centavos(dados['total_vendas'])))
+        divisoria()
+
+    qtd = dados['quantidades']
+    linha('subtitulo', 'MOVIMENTO')
+    linha('central', f"Vendas: {qtd['vendas']} | Sangrias: {qtd['sangrias']} | Suprimentos: {qtd['suprimentos']}")
+    divisoria()
+
+    # ===== LANÇAMENTOS DETALHADOS =====
+    if dados['vendas']:
+        linha('subtitulo', 'VENDAS')
+        for lanc in dados['vendas']:
+            linha('item', _lancamento(lanc, lanc.get('forma_pagamento') or 'N/I'))
+            if lanc.get('descricao'):
+                linha('item', f"  {encurtar(lanc['descricao'], COLUNAS - 2)}")
+        divisoria()
+
+    for chave, titulo, padrao, sinal in (
+        ('sangrias', 'SANGRIAS', 'Sangria', '-'),
+        ('suprimentos', 'SUPRIMENTOS', 'Suprimento', '+'),
+    ):
+        if not dados[chave]:
+            continue
+        linha('subtitulo', titulo)
+        for lanc in dados[chave]:
+            linha('item', _lancamento(lanc, lanc.get('descricao') or padrao, sinal))
+        total = sum(centavos_de(lanc, 'valor') for lanc in dados[chave])
+        linha('destaque', f"TOTAL {titulo}: {formatar_centavos(total)}")
+        divisoria()
+
+    if dados['outros']:
+        linha('subtitulo', 'OUTROS')
+        for lanc in dados['outros']:
+            sinal = '+' if lanc.get('tipo') == 'entrada' else '-'
+            linha('item', _lancamento(lanc, lanc.get('descricao') or lanc.get('categoria') or 'outros', sinal))
+        divisoria()
+
+    # Observação (se houver)
+    if caixa_data.get('observacao'):
+        linha('item', f"Obs: {caixa_data.get('observacao')}")
+        divisoria()
+
+    # Rodapé
+    linha('item')
+    linha('central', f"Impresso: {datetime.now().strftime('%d/%m/%Y %H:%M')}")
+    linha('central', 'Sistema PDV')
+    return linhas
+
+
+def _data(data_str):
+    return formatar_hora(data_str, '%d/%m/%Y %H:%M', data_str or '-')
+
+
+def _texto(texto):
+    """Linha de duas colunas já alinhada em COLUNAS"""
+    return _colunas(*texto) if isinstance(texto, tuple) else texto
+
+
+def _quebrar(texto, largura):
+    """Quebra o texto em linhas de até largura colunas"""
+    return textwrap.wrap(texto, largura, break_long_words=True) or ['']
+
+
+# ===== SAÍDAS =====
+
+def gerar_cupom_texto(caixa_data, lancamentos, nome_loja='Minha Loja', resumo=None):
+    """Cupom em texto puro de 48 colunas (str)"""
+    saida = []
+    for estilo, texto in linhas_cupom(caixa_data, lancamentos, nome_loja, resumo):
+        alinhamento = ESTILOS[estilo][0] if estilo else 'esquerda'
+        for parte in _quebrar(_texto(texto), COLUNAS):
+            saida.append(parte.center(COLUNAS).rstrip() if alinhamento == 'centro' else parte)
+    return '\n'.join(saida) + '\n'
+
+
+def gerar_cupom_escpos(caixa_data, lancamentos, nome_loja='Minha Loja', resumo=None):
+    """Cupom em comandos ESC/POS (bytes), terminando com avanço e corte do papel"""
+    saida = bytearray(INICIAR + PAGINA_CP860)
+    atual = None
+    for estilo, texto in linhas_cupom(caixa_data, lancamentos, nome_loja, resumo):
+        alinhamento, negrito, tamanho = ESTILOS[estilo] if estilo else ('esquerda', False, 1)
+        if (alinhamento, negrito, tamanho) != atual:
+            atual = (alinhamento, negrito, tamanho)
+            saida += ALINHAR[alinhamento] + NEGRITO[negrito] + TAMANHO[tamanho]
+        # Letra dupla ocupa duas colunas
+        for parte in _quebrar(_texto(texto), COLUNAS // tamanho):
+            saida += parte.encode('cp860', errors='replace') + b'\n'
+    saida += AVANCAR_E_CORTAR
+    return bytes(saida)
+
+
+def imprimir(conteudo, host=None, porta=None):
+    """Envia o ESC/POS para a impressora em rede (TCP, porta 9100); OSError se falhar"""
+    host = host or IMPRESSORA_HOST
+    if not host:
+        raise RuntimeError('Impressora em rede não configurada (IMPRESSORA_HOST)')
+    with socket.create_connection((host, porta or IMPRESSORA_PORTA), timeout=IMPRESSORA_TEMPO) as conexao:
+        conexao.sendall(conteudo)
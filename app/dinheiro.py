@@ -0,0 +1,52 @@
+"""
+Valores monetários em centavos inteiros
+
+O banco, os modelos e a agregação trabalham com centavos (int): somas são
+exatas e comparações não precisam de tolerância. A conversão para reais
+acontece só nas bordas (JSON da API e formatação dos relatórios).
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy.types import TypeDecorator, BigInteger
+
+
+class Centavos(TypeDecorator):
+    """Coluna monetária: BIGINT no banco, int (centavos) no Python"""
+    impl = BigInteger
+    cache_ok = True
+
+    def process_result_value(self, value, dialect):
+        # SUM no PostgreSQL devolve NUMERIC; normaliza para int
+        return int(value) if value is not None else None
+
+
+def para_centavos(valor):
+    """Converte reais (número ou texto, ex.: 12.5 ou '12.50') em centavos"""
+    if valor is None:
+        return None
+    centavos = (Decimal(str(valor)) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP)
+    return int(centavos)
+
+
+def para_reais(centavos):
+    """Converte centavos em reais para serialização JSON"""
+    if centavos is None:
+        return None
+    return centavos / 100
+
+
+def centavos_de(dados, chave):
+    """Lê em centavos um valor em reais de um dicionário da API (ausente ou None vale 0)"""
+    return para_centavos(dados.get(chave) or 0)
+
+
+def reais(valores):
+    """Converte os valores de um dicionário de centavos para reais"""
+    return {chave: para_reais(valor) for chave, valor in valores.items()}
+
+
+def formatar_centavos(centavos):
+    """Formata centavos como moeda brasileira (R$ 1.234,56) sem passar por float"""
+    sinal = '-' if centavos < 0 else ''
+    inteiro, resto = divmod(abs(centavos), 100)
+    milhar = f"{inteiro:,}".replace(',', '.')
+    return f"R$ {sinal}{milhar},{resto:02d}"
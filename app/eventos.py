@@ -0,0 +1,301 @@
+"""
+Canal de eventos do livro (GET /api/eventos, Server-Sent Events)
+
+Cada alteração (lançamento, exclusão, estorno, abertura e fechamento de
+caixa) grava uma linha na tabela evento dentro da mesma transação. Depois
+do commit, o worker que gravou avisa os outros com um datagrama no socket
+Unix de cada processo (um arquivo por worker em EVENTOS_DIR). O worker que
+tem painéis conectados acorda e lê só os eventos com id maior que o último
+enviado.
+
+Sem alterações, as conexões ficam esperando o aviso sem consultar o banco.
+Enquanto houver conexões, o worker confere MAX(id) uma vez a cada
+INTERVALO_VERIFICACAO, cobrindo avisos perdidos (ex.: workers em outra
+máquina, sem o diretório compartilhado).
+
+Os ids vêm da sequência do banco, sem trava global: no PostgreSQL dois
+caixas gravando ao mesmo tempo podem confirmar os ids fora de ordem. Cada
+conexão guarda os ids pulados (lacunas) e os procura de novo por até
+JANELA_LACUNA segundos antes de desistir (transação desfeita).
+"""
+import atexit
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, insert, delete, func, or_, event
+from sqlalchemy.orm import Session
+from app.models import db, Evento
+
+DIRETORIO = os.environ.get('EVENTOS_DIR') or os.path.join(tempfile.gettempdir(), 'simplescaixa-eventos')
+
+# Conexões simultâneas por worker; cada uma ocupa uma thread do gunicorn
+MAX_CONEXOES = int(os.environ.get('EVENTOS_MAX_CONEXOES', 8))
+INTERVALO_PING = 15
+INTERVALO_VERIFICACAO = 30
+# O navegador reconecta sozinho (com Last-Event-ID) depois desse tempo
+DURACAO_MAXIMA = 600
+LOTE = 200
+# Tempo máximo entre gerar o id de um evento e o commit da transação
+JANELA_LACUNA = 30
+
+RETENCAO = timedelta(days=1)
+LIMPAR_A_CADA = 500
+
+_condicao = threading.Condition()
+_geracao = 0
+_conexoes = 0
+_ouvinte_pid = None
+_maior_id = 0
+_resumo = (None, None)
+
+
+# ===== PUBLICAÇÃO =====
+
+def publicar(tipo, caixa_id=None, dados=None):
+    """Registra o evento na transação atual; os workers são avisados após o commit"""
+    id = db.session.execute(
+        insert(Evento)
+        .values(tipo=tipo, caixa_id=caixa_id, dados=json.dumps(dados or {}), criado_em=datetime.now())
+        .returning(Evento.id)
+    ).scalar_one()
+    db.session.info['eventos_publicados'] = True
+
+    if id % LIMPAR_A_CADA == 0:
+        db.session.execute(delete(Evento).where(Evento.criado_em < datetime.now() - RETENCAO))
+    return id
+
+
+@event.listens_for(Session, 'after_commit')
+def _apos_commit(session):
+    if session.info.pop('eventos_publicados', False):
+        avisar_workers()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _apos_rollback(session):
+    session.info.pop('eventos_publicados', None)
+
+
+def _caminho_socket(pid):
+    return os.path.join(DIRETORIO, f'{pid}.sock')
+
+
+def avisar_workers():
+    """Acorda as conexões deste processo e manda um datagrama aos demais workers"""
+    _acordar()
+    if not hasattr(socket, 'AF_UNIX'):
+        return
+
+    try:
+        nomes = os.listdir(DIRETORIO)
+    except FileNotFoundError:
+        return
+
+    proprio = os.path.basename(_caminho_socket(os.getpid()))
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as aviso:
+        aviso.setblocking(False)
+        for nome in nomes:
+            if nome == proprio or not nome.endswith('.sock'):
+                continue
+            caminho = os.path.join(DIRETORIO, nome)
+            try:
+                aviso.sendto(b'1', caminho)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Worker que terminou sem remover o socket
+                try:
+                    os.remove(caminho)
+                except OSError:
+                    pass
+            except OSError:
+                pass  # Fila cheia: o worker já tem um aviso pendente
+
+
+# ===== OUVINTE (um por worker) =====
+
+def _acordar():
+    global _geracao
+    with _condicao:
+        _geracao += 1
+        _condicao.notify_all()
+
+
+def _ultimo_id_no_banco():
+    return db.session.execute(select(func.max(Evento.id))).scalar() or 0
+
+
+def _verificar_banco(app):
+    global _maior_id
+    with app.app_context():
+        maior = _ultimo_id_no_banco()
+        db.session.remove()
+    if maior != _maior_id:
+        _maior_id = maior
+        _acordar()
+
+
+def _ouvir(app, sock):
+    ultima_verificacao = time.monotonic()
+    while True:
+        try:
+            sock.recv(16)
+            _acordar()
+        except socket.timeout:
+            pass
+        except OSError:
+            time.sleep(1)
+
+        agora = time.monotonic()
+        if _conexoes and agora - ultima_verificacao >= INTERVALO_VERIFICACAO:
+            ultima_verificacao = agora
+            try:
+                _verificar_banco(app)
+            except Exception as e:
+                print(f"⚠️  Erro ao verificar eventos: {e}")
+
+
+def _remover_socket(caminho):
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass
+
+
+def _iniciar_ouvinte(app):
+    """Abre o socket deste worker na primeira conexão (depois do fork do gunicorn)"""
+    global _ouvinte_pid
+    pid = os.getpid()
+    with _condicao:
+        if _ouvinte_pid == pid:
+            return
+        _ouvinte_pid = pid
+
+    sock = None
+    if hasattr(socket, 'AF_UNIX'):
+        caminho = _caminho_socket(pid)
+        try:
+            os.makedirs(DIRETORIO, exist_ok=True)
+            _remover_socket(caminho)
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.bind(caminho)
+            atexit.register(_remover_socket, caminho)
+        except OSError as e:
+            print(f"⚠️  Eventos sem socket local ({e}); usando só a verificação no banco")
+            sock = None
+
+    if sock is None:
+        # Sem socket o laço só faz a verificação periódica
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(('127.0.0.1', 0))
+    sock.settimeout(INTERVALO_PING)
+
+    threading.Thread(target=_ouvir, args=(app, sock), daemon=True, name='eventos').start()
+
+
+# ===== TRANSMISSÃO =====
+
+def aceitando_conexoes():
+    return _conexoes < MAX_CONEXOES
+
+
+def _mensagem(tipo, dados, id=None):
+    linhas = f'id: {id}\n' if id is not None else ''
+    return f'{linhas}event: {tipo}\ndata: {json.dumps(dados)}\n\n'
+
+
+def _eventos_apos(ultimo_id, lacunas):
+    """Eventos com id maior que ultimo_id e os das lacunas que já foram confirmados"""
+    condicao = Evento.id > ultimo_id
+    if lacunas:
+        condicao = or_(condicao, Evento.id.in_(lacunas))
+    return db.session.execute(
+        select(Evento).where(condicao).order_by(Evento.id).limit(LOTE)
+    ).scalars().all()
+
+
+def _resumo_do_dia(chave):
+    """
+    Totais de hoje (resumo diário), calculados uma vez por worker para cada
+    conjunto de eventos conhecido (último id e lacunas ainda abertas)
+    """
+    global _resumo
+    chave_resumo, dados = _resumo
+    if chave_resumo != chave:
+        from app.resumo_diario import resumir_periodo
+        from app.dinheiro import para_reais
+
+        hoje = date.today()
+        resumo = resumir_periodo(hoje, hoje)
+        dados = {
+            'data': hoje.isoformat(),
+            'total_vendas': para_reais(resumo['vendas']['total']),
+            'qtd_vendas': resumo['quantidades']['vendas'],
+            'qtd_lancamentos': resumo['quantidades']['lancamentos'],
+        }
+        _resumo = (chave, dados)
+    return dados
+
+
+def transmitir(ultimo_id=None):
+    """
+    Gerador das mensagens SSE a partir do evento seguinte a ultimo_id (ou
+    dos próximos, se None). Cada lote de eventos é seguido de um 'resumo'.
+    """
+    global _conexoes, _maior_id
+    _iniciar_ouvinte(current_app._get_current_object())
+
+    with _condicao:
+        _conexoes += 1
+        geracao = _geracao
+    try:
+        if ultimo_id is None:
+            ultimo_id = _ultimo_id_no_banco()
+        db.session.close()
+
+        yield 'retry: 3000\n\n'
+        yield _mensagem('conectado', {'id': ultimo_id}, id=ultimo_id)
+
+        lacunas = {}  # id pulado -> prazo (monotonic) para aparecer
+        limite = time.monotonic() + DURACAO_MAXIMA
+        pendente = True  # confere eventos gravados entre o Last-Event-ID e agora
+        while time.monotonic() < limite:
+            if not pendente:
+                with _condicao:
+                    _condicao.wait_for(lambda: _geracao != geracao, timeout=INTERVALO_PING)
+                    pendente = _geracao != geracao
+                    geracao = _geracao
+                if not pendente:
+                    yield ': ping\n\n'
+                    continue
+
+            agora = time.monotonic()
+            lacunas = {id: prazo for id, prazo in lacunas.items() if prazo > agora}
+            eventos = _eventos_apos(ultimo_id, lacunas)
+            for evento in eventos:
+                if lacunas.pop(evento.id, None) is None:
+                    if evento.id - ultimo_id <= LOTE:
+                        # Ids pulados podem ser de transações ainda abertas
+                        for id in range(ultimo_id + 1, evento.id):
+                            lacunas[id] = agora + JANELA_LACUNA
+                    ultimo_id = evento.id
+                dados = json.loads(evento.dados or '{}')
+                dados.update(
+                    id=evento.id, caixa_id=evento.caixa_id,
+                    criado_em=evento.criado_em.isoformat()
+                )
+                # O id da mensagem é o cursor da conexão (Last-Event-ID ao reconectar)
+                yield _mensagem(evento.tipo, dados, id=ultimo_id)
+
+            if eventos:
+                _maior_id = max(_maior_id, ultimo_id)
+                yield _mensagem('resumo', _resumo_do_dia((ultimo_id, frozenset(lacunas))))
+            db.session.close()
+
+            pendente = len(eventos) == LOTE
+    finally:
+        with _condicao:
+            _conexoes -= 1
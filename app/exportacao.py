@@ -0,0 +1,151 @@
+"""
+Exportação em massa de lançamentos e caixas (NDJSON ou CSV)
+
+As linhas são lidas com yield_per (cursor no servidor no PostgreSQL) e
+escritas aos poucos por geradores, então a memória fica constante mesmo
+exportando anos inteiros. Usado pela rota /api/exportar/<tabela> e pelo
+comando flask exportar.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timedelta
+from app.models import db, Caixa, Lancamento
+from app.dinheiro import para_reais
+from app.consultas import (
+    CAMPOS_LANCAMENTO, filtros_lancamentos, campos_solicitados, consultar_lancamentos,
+    serializar, para_iso
+)
+
+LINHAS_POR_LOTE = 1000
+FORMATOS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+# campo -> (expressão SQL, conversão)
+CAMPOS_CAIXA = {
+    'id': (Caixa.id, None),
+    'data_abertura': (Caixa.data_abertura, para_iso),
+    'data_fechamento': (Caixa.data_fechamento, para_iso),
+    'operador': (Caixa.operador, None),
+    'status': (Caixa.status, None),
+    'troco_inicial': (Caixa.troco_inicial, para_reais),
+    'total_entradas': (Caixa.total_entradas, para_reais),
+    'total_saidas': (Caixa.total_saidas, para_reais),
+    'saldo_atual': (Caixa.troco_inicial + Caixa.total_entradas - Caixa.total_saidas, para_reais),
+    'saldo_dinheiro': (Caixa.troco_inicial + Caixa.movimento_dinheiro, para_reais),
+    'valor_contado': (Caixa.valor_contado, para_reais),
+    'diferenca': (Caixa.diferenca, para_reais),
+    'observacao': (Caixa.observacao, None),
+}
+
+
+def filtros_caixas(args):
+    """Filtros de caixa: caixa_id, status e data de abertura (data_inicio/data_fim)"""
+    filtros = []
+    if args.get('caixa_id'):
+        filtros.append(Caixa.id == int(args['caixa_id']))
+    if args.get('status'):
+        filtros.append(Caixa.status == args['status'])
+    if args.get('data_inicio'):
+        filtros.append(Caixa.data_abertura >= datetime.fromisoformat(args['data_inicio']))
+    if args.get('data_fim'):
+        data_fim = args['data_fim']
+        fim = datetime.fromisoformat(data_fim)
+        if len(data_fim) == 10:
+            # Só a data: inclui o dia inteiro
+            filtros.append(Caixa.data_abertura < fim + timedelta(days=1))
+        else:
+            filtros.append(Caixa.data_abertura <= fim)
+    return filtros
+
+
+def preparar_exportacao(tabela, args):
+    """
+    Valida os parâmetros e monta a consulta da exportação.
+
+    Returns:
+        (campos, mapa de campos, query ordenada do mais antigo para o mais recente)
+    """
+    if tabela == 'lancamentos':
+        campos = campos_solicitados(args.get('fields'))
+        query = consultar_lancamentos(campos, filtros_lancamentos(args))
+        query = query.order_by(None).order_by(Lancamento.data_hora, Lancamento.id)
+        return campos, CAMPOS_LANCAMENTO, query
+
+    if tabela == 'caixas':
+        campos = campos_solicitados(args.get('fields'), CAMPOS_CAIXA)
+        colunas = [CAMPOS_CAIXA[campo][0].label(campo) for campo in campos]
+        query = db.session.query(*colunas).select_from(Caixa).filter(
+            *filtros_caixas(args)
+        ).order_by(Caixa.data_abertura, Caixa.id)
+        return campos, CAMPOS_CAIXA, query
+
+    raise ValueError(f"Tabela desconhecida: {tabela}")
+
+
+def gerar_linhas(campos, mapa, query):
+    """Dicionários já convertidos, lidos em lotes do banco"""
+    for linha in query.yield_per(LINHAS_POR_LOTE):
+        yield serializar(linha, campos, mapa)
+
+
+def _em_lotes(linhas, formatar):
+    """Agrupa as linhas formatadas em blocos para não escrever linha a linha"""
+    bloco = []
+    for linha in linhas:
+        bloco.append(formatar(linha))
+        if len(bloco) >= LINHAS_POR_LOTE:
+            yield ''.join(bloco)
+            bloco = []
+    if bloco:
+        yield ''.join(bloco)
+
+
+def gerar_ndjson(campos, linhas):
+    return _em_lotes(linhas, lambda dados: json.dumps(dados, ensure_ascii=False) + '\n')
+
+
+def gerar_csv(campos, linhas):
+    buffer = io.StringIO()
+    escritor = csv.DictWriter(buffer, fieldnames=campos)
+
+    def formatar(dados):
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerow(dados)
+        return buffer.getvalue()
+
+    escritor.writeheader()
+    yield buffer.getvalue()
+    yield from _em_lotes(linhas, formatar)
+
+
+def comprimir_gzip(blocos):
+    """Comprime os blocos de texto em gzip conforme são gerados"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for bloco in blocos:
+        dados = compressor.compress(bloco.encode('utf-8'))
+        if dados:
+            yield dados
+    yield compressor.flush()
+
+
+def exportar(tabela, args, formato='ndjson', gzip=False):
+    """
+    Gerador com o conteúdo da exportação (bytes).
+    A validação acontece já na chamada, antes do primeiro byte ser gerado.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconhecido: {formato}")
+
+    campos, mapa, query = preparar_exportacao(tabela, args)
+    gerar = gerar_csv if formato == 'csv' else gerar_ndjson
+    blocos = gerar(campos, gerar_linhas(campos, mapa, query))
+
+    if gzip:
+        return comprimir_gzip(blocos)
+    return (bloco.encode('utf-8') for bloco in blocos)
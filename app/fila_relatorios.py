@@ -0,0 +1,274 @@
+"""
+Fila de relatórios em PDF
+
+Os pedidos (POST /api/relatorio/fila) ficam na tabela relatorio_pedido. O
+processo da fila (flask relatorios trabalhar, serviço "relatorios" do
+docker-compose) reserva os pendentes em ordem e gera cada um num processo
+filho próprio, com prioridade baixa e limites de memória e de tempo. Assim
+um relatório grande não ocupa as threads do gunicorn que atendem o caixa,
+e um que passe dos limites derruba só o próprio processo.
+
+O PDF fica em RELATORIOS_DIR/<id>.pdf (diretório compartilhado com o
+serviço web) até o pedido expirar. O processo da fila também toca o
+arquivo fila.ativa a cada volta; sem ele recente, a API recusa pedidos e
+as telas geram o PDF direto.
+"""
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, delete, func
+from app.models import db, RelatorioPedido
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DIRETORIO = os.environ.get('RELATORIOS_DIR') or os.path.join(tempfile.gettempdir(), 'simplescaixa-relatorios')
+
+# Processos gerando ao mesmo tempo e limites de cada um
+PROCESSOS = int(os.environ.get('RELATORIOS_PROCESSOS', 2))
+TEMPO_MAXIMO = int(os.environ.get('RELATORIOS_TEMPO_MAXIMO', 300))
+MEMORIA_MAXIMA_MB = int(os.environ.get('RELATORIOS_MEMORIA_MB', 1024))
+RETENCAO = timedelta(hours=float(os.environ.get('RELATORIOS_RETENCAO_HORAS', 24)))
+MAX_PENDENTES = 20
+
+INTERVALO = 1
+INTERVALO_LIMPEZA = 60
+SINAL_VALIDADE = 30
+
+
+class FilaCheia(Exception):
+    pass
+
+
+def caminho_arquivo(pedido_id):
+    return os.path.join(DIRETORIO, f'{pedido_id}.pdf')
+
+
+def _caminho_sinal():
+    return os.path.join(DIRETORIO, 'fila.ativa')
+
+
+def fila_ativa():
+    """True se o processo da fila deu sinal nos últimos SINAL_VALIDADE segundos"""
+    try:
+        return time.time() - os.path.getmtime(_caminho_sinal()) < SINAL_VALIDADE
+    except OSError:
+        return False
+
+
+def _sinal():
+    with open(_caminho_sinal(), 'a'):
+        pass
+    os.utime(_caminho_sinal())
+
+
+def _remover(arquivo):
+    try:
+        os.remove(arquivo)
+    except OSError:
+        pass
+
+
+# ===== PEDIDOS =====
+
+def enfileirar(tipo, parametros):
+    """Registra um pedido pendente; FilaCheia se já houver MAX_PENDENTES esperando"""
+    pendentes = db.session.execute(
+        select(func.count(RelatorioPedido.id)).where(RelatorioPedido.status == 'pendente')
+    ).scalar()
+    if pendentes >= MAX_PENDENTES:
+        raise FilaCheia(f'Fila de relatórios cheia ({pendentes} pendentes), tente em instantes')
+
+    pedido = RelatorioPedido(tipo=tipo, parametros=json.dumps(parametros), status='pendente')
+    db.session.add(pedido)
+    db.session.commit()
+    return pedido
+
+
+def posicao(pedido):
+    """Quantos pedidos pendentes estão à frente deste"""
+    return db.session.execute(
+        select(func.count(RelatorioPedido.id)).where(
+            RelatorioPedido.status == 'pendente',
+            RelatorioPedido.id < pedido.id
+        )
+    ).scalar()
+
+
+def reservar():
+    """Marca o pedido pendente mais antigo como processando; None se não houver"""
+    while True:
+        pedido_id = db.session.execute(
+            select(RelatorioPedido.id)
+            .where(RelatorioPedido.status == 'pendente')
+            .order_by(RelatorioPedido.id)
+            .limit(1)
+        ).scalar()
+        if pedido_id is None:
+            db.session.commit()
+            return None
+
+        # Outro processo da fila pode ter reservado entre o SELECT e o UPDATE
+        resultado = db.session.execute(
+            update(RelatorioPedido)
+            .where(RelatorioPedido.id == pedido_id, RelatorioPedido.status == 'pendente')
+            .values(status='processando', iniciado_em=datetime.now())
+        )
+        db.session.commit()
+        if resultado.rowcount:
+            return pedido_id
+
+
+def _concluir(pedido_id, status, **valores):
+    """Grava o resultado de um pedido em processamento e a data em que expira"""
+    agora = datetime.now()
+    db.session.execute(
+        update(RelatorioPedido)
+        .where(RelatorioPedido.id == pedido_id, RelatorioPedido.status == 'processando')
+        .values(status=status, concluido_em=agora, expira_em=agora + RETENCAO, **valores)
+    )
+    db.session.commit()
+
+
+def limpar():
+    """Apaga os pedidos expirados com seus arquivos e encerra os interrompidos"""
+    agora = datetime.now()
+    expirados = db.session.execute(
+        select(RelatorioPedido.id).where(RelatorioPedido.expira_em < agora)
+    ).scalars().all()
+    for pedido_id in expirados:
+        _remover(caminho_arquivo(pedido_id))
+    if expirados:
+        db.session.execute(delete(RelatorioPedido).where(RelatorioPedido.id.in_(expirados)))
+
+    # Processando há mais que o tempo máximo: o processo da fila que o reservou caiu
+    limite = agora - timedelta(seconds=TEMPO_MAXIMO + INTERVALO_LIMPEZA)
+    db.session.execute(
+        update(RelatorioPedido)
+        .where(RelatorioPedido.status == 'processando', RelatorioPedido.iniciado_em < limite)
+        .values(status='erro', erro='Geração interrompida, peça o relatório de novo',
+                concluido_em=agora, expira_em=agora + RETENCAO)
+    )
+    db.session.commit()
+    return len(expirados)
+
+
+# ===== PROCESSOS =====
+
+def _limitar():
+    """Prioridade baixa e limites de memória e de CPU do processo filho"""
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
+    if resource is None:
+        return
+    memoria = MEMORIA_MAXIMA_MB * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memoria, memoria))
+    resource.setrlimit(resource.RLIMIT_CPU, (TEMPO_MAXIMO, TEMPO_MAXIMO + 5))
+
+
+def _executar(app, pedido_id):
+    """Gera o PDF de um pedido (processo filho)"""
+    from app.relatorios import gerar
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    _limitar()
+    with app.app_context():
+        # As conexões herdadas do processo da fila continuam dele
+        db.engine.dispose(close=False)
+
+        pedido = db.session.get(RelatorioPedido, pedido_id)
+        arquivo = caminho_arquivo(pedido_id)
+        temporario = f'{arquivo}.tmp'
+        try:
+            with open(temporario, 'wb') as destino:
+                nome_arquivo = gerar(pedido.tipo, json.loads(pedido.parametros), destino)
+            os.replace(temporario, arquivo)
+        except MemoryError:
+            _remover(temporario)
+            db.session.rollback()
+            _concluir(pedido_id, 'erro', erro=f'Relatório passou do limite de {MEMORIA_MAXIMA_MB} MB')
+            return
+        except Exception as e:
+            _remover(temporario)
+            db.session.rollback()
+            _concluir(pedido_id, 'erro', erro=str(e) or e.__class__.__name__)
+            return
+
+        _concluir(pedido_id, 'pronto', nome_arquivo=nome_arquivo, tamanho=os.path.getsize(arquivo))
+
+
+def trabalhar(app, processos=PROCESSOS, echo=print):
+    """Laço do processo da fila: reserva pedidos e gera cada um num processo filho"""
+    contexto = multiprocessing.get_context('fork')
+    os.makedirs(DIRETORIO, exist_ok=True)
+    signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+
+    ativos = {}  # pedido_id: (processo, início)
+    ultima_limpeza = 0
+
+    with app.app_context():
+        try:
+            while True:
+                _sinal()
+                agora = time.monotonic()
+
+                for pedido_id, (processo, inicio) in list(ativos.items()):
+                    if processo.is_alive():
+                        if agora - inicio <= TEMPO_MAXIMO:
+                            continue
+                        processo.kill()
+                        processo.join()
+                        _remover(f'{caminho_arquivo(pedido_id)}.tmp')
+                        _concluir(pedido_id, 'erro', erro=f'Relatório passou do limite de {TEMPO_MAXIMO}s')
+                        echo(f"⏱️  Pedido {pedido_id} interrompido após {TEMPO_MAXIMO}s")
+                    else:
+                        processo.join()
+                        if processo.exitcode != 0:
+                            _concluir(pedido_id, 'erro', erro=f'Processo do relatório terminou com código {processo.exitcode}')
+                            echo(f"❌ Pedido {pedido_id}: processo terminou com código {processo.exitcode}")
+                        else:
+                            echo(f"✓ Pedido {pedido_id} finalizado em {agora - inicio:.1f}s")
+                    del ativos[pedido_id]
+
+                if agora - ultima_limpeza >= INTERVALO_LIMPEZA:
+                    ultima_limpeza = agora
+                    removidos = limpar()
+                    if removidos:
+                        echo(f"🗑️  {removidos} pedido(s) expirado(s) removido(s)")
+
+                pedido_id = reservar() if len(ativos) < processos else None
+                # Nenhuma conexão em uso no fork
+                db.session.remove()
+                if pedido_id is None:
+                    time.sleep(INTERVALO if not ativos else INTERVALO / 5)
+                    continue
+
+                processo = contexto.Process(
+                    target=_executar, args=(app, pedido_id), daemon=True, name=f'relatorio-{pedido_id}'
+                )
+                processo.start()
+                ativos[pedido_id] = (processo, time.monotonic())
+                echo(f"📄 Pedido {pedido_id} em geração (processo {processo.pid})")
+        finally:
+            # Desligando: os pedidos em andamento voltam para a fila
+            for pedido_id, (processo, _) in ativos.items():
+                processo.kill()
+                processo.join()
+                _remover(f'{caminho_arquivo(pedido_id)}.tmp')
+            if ativos:
+                db.session.execute(
+                    update(RelatorioPedido)
+                    .where(RelatorioPedido.id.in_(list(ativos)), RelatorioPedido.status == 'processando')
+                    .values(status='pendente', iniciado_em=None)
+                )
+                db.session.commit()
+            _remover(_caminho_sinal())
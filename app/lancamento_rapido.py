@@ -0,0 +1,263 @@
+"""
+Caminho rápido de gravação de lançamentos (POST /api/lancamento)
+
+O id do caixa aberto fica guardado no worker e é validado na própria
+transação: o UPDATE dos totais só vale para caixa com status 'aberto', e
+se nenhuma linha for afetada o ponteiro é descartado e resolvido de novo.
+O lançamento é inserido com INSERT ... RETURNING id e serializado a partir
+do objeto montado, sem recarregar nada depois do commit. O evento para os
+painéis (app/eventos.py) vai na mesma transação.
+
+Lotes (POST /api/lancamentos/lote) seguem o mesmo caminho: um INSERT com
+vários VALUES, um UPDATE do caixa e um commit para o lote inteiro.
+
+Com caixa_id (o caixa aberto quando o lançamento foi feito no aparelho),
+o lançamento só entra se esse ainda for o caixa aberto: uma venda feita
+sem conexão não vai parar no caixa de outro turno.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert
+from sqlalchemy.exc import IntegrityError
+from app.models import db, Caixa, Lancamento, aplicar_lote_nos_totais
+from app.dinheiro import para_centavos, para_reais
+from app.eventos import publicar
+
+COLUNAS_INSERT = (
+    'caixa_id', 'data_hora', 'tipo', 'categoria', 'forma_pagamento',
+    'valor', 'valor_recebido', 'troco', 'descricao', 'chave_idempotencia',
+)
+
+# Itens por requisição em POST /api/lancamentos/lote
+MAX_LOTE = 500
+
+_caixa_aberto_id = None
+
+
+def esquecer_caixa_aberto():
+    """Descarta o ponteiro local (abertura/fechamento feitos neste worker)"""
+    global _caixa_aberto_id
+    _caixa_aberto_id = None
+
+
+def _resolver_caixa_aberto():
+    global _caixa_aberto_id
+    _caixa_aberto_id = db.session.execute(
+        select(Caixa.id).where(Caixa.status == 'aberto').limit(1)
+    ).scalar()
+    return _caixa_aberto_id
+
+
+def montar_lancamento(data):
+    """Lançamento (ainda fora da sessão) a partir do JSON da requisição"""
+    valor = para_centavos(data['valor'])
+    lancamento = Lancamento(
+        data_hora=datetime.now(),
+        tipo=data['tipo'],
+        categoria=data['categoria'],
+        valor=valor,
+        forma_pagamento=data.get('forma_pagamento'),
+        descricao=data.get('descricao')
+    )
+
+    # Calcular troco para vendas em dinheiro
+    if data['categoria'] == 'venda' and 'valor_recebido' in data:
+        lancamento.valor_recebido = para_centavos(data['valor_recebido'])
+        lancamento.troco = lancamento.valor_recebido - valor
+
+    return lancamento
+
+
+def _aplicar_no_caixa(caixa_id, lancamentos):
+    if caixa_id is None:
+        return False
+    for lancamento in lancamentos:
+        lancamento.caixa_id = caixa_id
+    if aplicar_lote_nos_totais(caixa_id, lancamentos):
+        return True
+    db.session.rollback()
+    return False
+
+
+def _aplicar_no_caixa_aberto(lancamentos):
+    if _aplicar_no_caixa(_caixa_aberto_id, lancamentos):
+        return True
+    # Ponteiro vazio ou vencido (caixa fechado em outro worker)
+    if _aplicar_no_caixa(_resolver_caixa_aberto(), lancamentos):
+        return True
+    db.session.rollback()
+    return False
+
+
+def ler_caixa_id(data):
+    """caixa_id opcional do JSON (None se ausente); ValueError se inválido"""
+    if data.get('caixa_id') is None:
+        return None
+    try:
+        return int(data['caixa_id'])
+    except (TypeError, ValueError):
+        raise ValueError('Caixa inválido')
+
+
+def gravar_lancamento(lancamento, caixa_id=None):
+    """
+    Grava o lançamento no caixa aberto em uma transação.
+    Com caixa_id, só grava se esse for o caixa aberto.
+    Retorna o lançamento com id, ou None se não há caixa aberto.
+    """
+    if caixa_id is not None:
+        if not _aplicar_no_caixa(caixa_id, [lancamento]):
+            db.session.rollback()
+            return None
+    elif not _aplicar_no_caixa_aberto([lancamento]):
+        return None
+
+    lancamento.id = db.session.execute(
+        insert(Lancamento)
+        .values({coluna: getattr(lancamento, coluna) for coluna in COLUNAS_INSERT})
+        .returning(Lancamento.id)
+    ).scalar_one()
+    publicar('lancamento', lancamento.caixa_id, {
+        'lancamento_id': lancamento.id,
+        'tipo': lancamento.tipo,
+        'categoria': lancamento.categoria,
+        'forma_pagamento': lancamento.forma_pagamento,
+        'valor': para_reais(lancamento.valor),
+    })
+    db.session.commit()
+    return lancamento
+
+
+# ===== LOTE =====
+
+def _montar_item(item):
+    """Lançamento de um item do lote. ValueError com a mensagem se inválido."""
+    if not isinstance(item, dict):
+        raise ValueError('Item inválido')
+
+    chave = item.get('chave')
+    if not isinstance(chave, str) or not 0 < len(chave) <= 64:
+        raise ValueError('Chave de idempotência ausente ou inválida')
+    if 'tipo' not in item or 'categoria' not in item or 'valor' not in item:
+        raise ValueError('Dados incompletos')
+
+    try:
+        lancamento = montar_lancamento(item)
+        # Hora em que a venda foi feita no caixa, mesmo que enviada depois
+        if item.get('data_hora'):
+            data_hora = datetime.fromisoformat(item['data_hora'])
+            if data_hora.tzinfo:
+                data_hora = data_hora.astimezone().replace(tzinfo=None)
+            lancamento.data_hora = data_hora
+        elif item.get('idade_ms') is not None:
+            # Há quanto tempo foi registrada: não depende do relógio do aparelho
+            lancamento.data_hora -= timedelta(milliseconds=max(0, int(item['idade_ms'])))
+    except (TypeError, ValueError, ArithmeticError):
+        raise ValueError('Valor ou data inválidos')
+
+    lancamento.chave_idempotencia = chave
+    # Caixa em que foi feito; _aplicar_no_caixa troca pelo caixa em que entra
+    lancamento.caixa_id = ler_caixa_id(item)
+    return lancamento
+
+
+def _chaves_gravadas(chaves):
+    if not chaves:
+        return {}
+    linhas = db.session.execute(
+        select(Lancamento.chave_idempotencia, Lancamento.id)
+        .where(Lancamento.chave_idempotencia.in_(chaves))
+    )
+    return dict(linhas.all())
+
+
+def _recusar_de_outro_caixa(novos):
+    """
+    Tira de novos (e marca como erro) os itens feitos num caixa que não é
+    mais o aberto. Retorna o id do caixa aberto (None se não houver).
+    """
+    caixa_id = _resolver_caixa_aberto()
+    for chave, (lancamento, resultado) in list(novos.items()):
+        if lancamento.caixa_id is not None and lancamento.caixa_id != caixa_id:
+            del novos[chave]
+            resultado.update(status='erro', mensagem='Caixa do lançamento já foi fechado')
+    return caixa_id
+
+
+def _gravar_lote(itens):
+    resultados = []
+    novos = {}  # chave -> (lançamento, resultado)
+    repetidos = []  # (resultado, resultado do primeiro item com a mesma chave)
+
+    for item in itens:
+        try:
+            lancamento = _montar_item(item)
+        except ValueError as e:
+            chave = item.get('chave') if isinstance(item, dict) else None
+            resultados.append({'chave': chave, 'status': 'erro', 'mensagem': str(e)})
+            continue
+
+        chave = lancamento.chave_idempotencia
+        if chave in novos:
+            resultado = {'chave': chave, 'status': 'duplicado'}
+            repetidos.append((resultado, novos[chave][1]))
+        else:
+            resultado = {'chave': chave, 'status': 'criado'}
+            novos[chave] = (lancamento, resultado)
+        resultados.append(resultado)
+
+    # Reenvios: chaves que já estão no banco devolvem o lançamento existente
+    for chave, id in _chaves_gravadas(list(novos)).items():
+        novos.pop(chave)[1].update(status='duplicado', id=id)
+
+    caixa_id = _recusar_de_outro_caixa(novos) if novos else None
+
+    lancamentos = [lancamento for lancamento, _ in novos.values()]
+    if lancamentos and not _aplicar_no_caixa(caixa_id, lancamentos):
+        for _, resultado in novos.values():
+            resultado.update(status='erro', mensagem='Não há caixa aberto')
+    elif lancamentos:
+        # Um INSERT com vários VALUES; a chave liga cada id ao seu item
+        ids = dict(db.session.execute(
+            insert(Lancamento).returning(Lancamento.chave_idempotencia, Lancamento.id),
+            [{coluna: getattr(l, coluna) for coluna in COLUNAS_INSERT} for l in lancamentos]
+        ).all())
+        for chave, (lancamento, resultado) in novos.items():
+            lancamento.id = resultado['id'] = ids[chave]
+
+        publicar('lancamentos_lote', lancamentos[0].caixa_id, {
+            'quantidade': len(ids),
+            'lancamento_ids': sorted(ids.values()),
+        })
+        db.session.commit()
+
+    for resultado, primeiro in repetidos:
+        if primeiro['status'] == 'erro':
+            resultado.update(status='erro', mensagem=primeiro['mensagem'])
+        else:
+            resultado['id'] = primeiro['id']
+
+    return resultados
+
+
+def gravar_lote(itens):
+    """
+    Grava os itens novos do lote no caixa aberto em uma única transação.
+
+    Cada item tem uma 'chave' gerada no cliente. Chave já gravada (em outro
+    envio ou antes no mesmo lote) volta como 'duplicado' com o id existente;
+    item inválido, feito num caixa (caixa_id) que não é o aberto, ou novo
+    sem caixa aberto volta como 'erro' sem impedir os demais.
+
+    Returns:
+        lista de resultados na ordem dos itens ({'chave', 'status', 'id' ou
+        'mensagem'})
+    """
+    # Outro envio do mesmo lote pode gravar alguma chave ao mesmo tempo; na
+    # tentativa seguinte ela aparece como duplicada. Cada colisão resolve ao
+    # menos uma chave, então len(itens) tentativas bastam.
+    for _ in range(len(itens)):
+        try:
+            return _gravar_lote(itens)
+        except IntegrityError:
+            db.session.rollback()
+    return _gravar_lote(itens)
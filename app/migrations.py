@@ -0,0 +1,278 @@
+"""
+Migrações versionadas do banco de dados
+
+As migrações rodam no deploy (flask banco migrar) e não na inicialização de
+cada worker. Cada migração é idempotente: bancos novos já nascem com o
+esquema atual via db.create_all() e apenas registram a versão.
+"""
+from datetime import datetime
+from sqlalchemy import text, inspect
+
+# Lista ordenada de (versão, descrição, função)
+MIGRACOES = []
+
+
+def migracao(versao, descricao, transacao=True):
+    """
+    Registra uma função de migração. Com transacao=False a função recebe a
+    engine em vez da conexão e controla as próprias transações (para
+    migrações de dados em lotes, que não devem travar a tabela inteira).
+    """
+    def registrar(funcao):
+        funcao.transacao = transacao
+        MIGRACOES.append((versao, descricao, funcao))
+        MIGRACOES.sort(key=lambda m: m[0])
+        return funcao
+    return registrar
+
+
+def _colunas(conn, tabela):
+    return {c['name'] for c in inspect(conn).get_columns(tabela)}
+
+
+def _adicionar_colunas(conn, tabela, colunas):
+    """Adiciona as colunas que ainda não existem. Retorna True se alguma foi criada."""
+    existentes = _colunas(conn, tabela)
+    novas = [(nome, tipo) for nome, tipo in colunas if nome not in existentes]
+    for nome, tipo in novas:
+        conn.execute(text(f'ALTER TABLE {tabela} ADD COLUMN {nome} {tipo}'))
+    return bool(novas)
+
+
+# ===== MIGRAÇÕES =====
+
+@migracao(1, 'Totais acumulados do caixa')
+def _m001_totais_caixa(conn, pendencias):
+    if 'total_entradas_centavos' in _colunas(conn, 'caixa'):
+        return  # banco novo, já criado com as colunas em centavos
+    adicionadas = _adicionar_colunas(conn, 'caixa', [
+        ('total_entradas', 'FLOAT NOT NULL DEFAULT 0'),
+        ('total_saidas', 'FLOAT NOT NULL DEFAULT 0'),
+        ('movimento_dinheiro', 'FLOAT NOT NULL DEFAULT 0'),
+    ])
+    if adicionadas:
+        pendencias.add('reconstruir_totais')
+
+
+@migracao(2, 'Índices das consultas por caixa, período e caixa aberto')
+def _m002_indices(conn, pendencias):
+    for sql in (
+        'CREATE INDEX IF NOT EXISTS ix_lancamento_caixa_data ON lancamento (caixa_id, data_hora)',
+        'CREATE INDEX IF NOT EXISTS ix_lancamento_data_categoria ON lancamento (data_hora, categoria)',
+        'CREATE INDEX IF NOT EXISTS ix_caixa_data_abertura ON caixa (data_abertura)',
+        "CREATE INDEX IF NOT EXISTS ix_caixa_aberto ON caixa (status) WHERE status = 'aberto'",
+    ):
+        conn.execute(text(sql))
+
+
+# Colunas monetárias convertidas para centavos: tabela -> [(antiga, nova, not null)]
+COLUNAS_CENTAVOS = {
+    'caixa': [
+        ('troco_inicial', 'troco_inicial_centavos', True),
+        ('valor_contado', 'valor_contado_centavos', False),
+        ('diferenca', 'diferenca_centavos', False),
+        ('total_entradas', 'total_entradas_centavos', True),
+        ('total_saidas', 'total_saidas_centavos', True),
+        ('movimento_dinheiro', 'movimento_dinheiro_centavos', True),
+    ],
+    'caixa_total': [
+        ('valor', 'valor_centavos', True),
+    ],
+    'lancamento': [
+        ('valor', 'valor_centavos', True),
+        ('valor_recebido', 'valor_recebido_centavos', False),
+        ('troco', 'troco_centavos', False),
+    ],
+}
+
+TAMANHO_LOTE = 5000
+
+
+def _converter_em_lotes(engine, tabela, pares, chave):
+    """Preenche as colunas novas em lotes por faixa de chave, um commit por lote"""
+    with engine.connect() as conn:
+        maximo = conn.execute(text(f'SELECT MAX({chave}) FROM {tabela}')).scalar()
+    if maximo is None:
+        return
+
+    atribuicoes = ', '.join(
+        f'{nova} = CAST(ROUND({antiga} * 100) AS BIGINT)' for antiga, nova in pares
+    )
+    pendente = ' OR '.join(f'({nova} IS NULL AND {antiga} IS NOT NULL)' for antiga, nova in pares)
+    inicio = 0
+    while inicio <= maximo:
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    f'UPDATE {tabela} SET {atribuicoes} '
+                    f'WHERE {chave} > :inicio AND {chave} <= :fim AND ({pendente})'
+                ),
+                {'inicio': inicio, 'fim': inicio + TAMANHO_LOTE}
+            )
+        inicio += TAMANHO_LOTE
+
+
+@migracao(3, 'Valores monetários em centavos inteiros', transacao=False)
+def _m003_centavos(engine, pendencias):
+    for tabela, colunas in COLUNAS_CENTAVOS.items():
+        with engine.connect() as conn:
+            existentes = _colunas(conn, tabela)
+        pares = [(antiga, nova) for antiga, nova, _ in colunas if antiga in existentes]
+        if not pares:
+            continue  # tabela já criada em centavos
+
+        with engine.begin() as conn:
+            _adicionar_colunas(conn, tabela, [(nova, 'BIGINT') for _, nova in pares])
+
+        # Sem parar o sistema: cada lote é uma transação curta
+        chave = 'caixa_id' if tabela == 'caixa_total' else 'id'
+        _converter_em_lotes(engine, tabela, pares, chave)
+
+        with engine.begin() as conn:
+            postgres = conn.dialect.name == 'postgresql'
+            for antiga, nova, obrigatoria in colunas:
+                if antiga not in existentes:
+                    continue
+                if obrigatoria:
+                    conn.execute(text(f'UPDATE {tabela} SET {nova} = 0 WHERE {nova} IS NULL'))
+                    if postgres:
+                        conn.execute(text(f'ALTER TABLE {tabela} ALTER COLUMN {nova} SET DEFAULT 0'))
+                        conn.execute(text(f'ALTER TABLE {tabela} ALTER COLUMN {nova} SET NOT NULL'))
+                conn.execute(text(f'ALTER TABLE {tabela} DROP COLUMN {antiga}'))
+
+    # Os acumulados convertidos podem carregar o arredondamento de somas em float
+    pendencias.add('reconstruir_totais')
+
+
+@migracao(4, 'Resumo diário consolidado por dia e caixa')
+def _m004_resumo_diario(conn, pendencias):
+    # A tabela é criada por db.create_all(); falta preenchê-la com o histórico
+    pendencias.add('reconstruir_resumo_diario')
+
+
+@migracao(5, 'Configuração em linha única (id 1) com versão para cache')
+def _m005_configuracao_versao(conn, pendencias):
+    _adicionar_colunas(conn, 'configuracao', [('versao', 'INTEGER NOT NULL DEFAULT 1')])
+
+    # get_config() antigo podia criar linhas duplicadas; vale a primeira
+    primeira = conn.execute(text('SELECT MIN(id) FROM configuracao')).scalar()
+    if primeira is not None and primeira != 1:
+        conn.execute(text('UPDATE configuracao SET id = 1 WHERE id = :id'), {'id': primeira})
+    conn.execute(text('DELETE FROM configuracao WHERE id <> 1'))
+
+
+@migracao(6, 'Versão dos caixas (ETag nas leituras)')
+def _m006_versoes(conn, pendencias):
+    _adicionar_colunas(conn, 'caixa', [('versao', 'INTEGER NOT NULL DEFAULT 1')])
+
+
+@migracao(7, 'Chave de idempotência dos lançamentos enviados em lote')
+def _m007_chave_idempotencia(conn, pendencias):
+    _adicionar_colunas(conn, 'lancamento', [('chave_idempotencia', 'VARCHAR(64)')])
+    conn.execute(text(
+        'CREATE UNIQUE INDEX IF NOT EXISTS ux_lancamento_chave ON lancamento (chave_idempotencia)'
+    ))
+
+
+@migracao(8, 'Fila de relatórios em PDF')
+def _m008_fila_relatorios(conn, pendencias):
+    pass  # a tabela relatorio_pedido é criada por db.create_all()
+
+
+# ===== EXECUÇÃO =====
+
+def _garantir_tabela_versao(conn):
+    conn.execute(text(
+        'CREATE TABLE IF NOT EXISTS schema_versao ('
+        'versao INTEGER PRIMARY KEY, '
+        'descricao VARCHAR(200) NOT NULL, '
+        'aplicada_em TIMESTAMP NOT NULL)'
+    ))
+
+
+def versao_atual(conn):
+    """Última versão aplicada (0 se o banco nunca foi migrado)"""
+    if not inspect(conn).has_table('schema_versao'):
+        return 0
+    return conn.execute(text('SELECT MAX(versao) FROM schema_versao')).scalar() or 0
+
+
+def versao_esperada():
+    return MIGRACOES[-1][0] if MIGRACOES else 0
+
+
+def _registrar_versao(conn, versao, descricao):
+    conn.execute(
+        text('INSERT INTO schema_versao (versao, descricao, aplicada_em) VALUES (:v, :d, :a)'),
+        {'v': versao, 'd': descricao, 'a': datetime.now()}
+    )
+
+
+def _aplicar_sem_transacao(engine, versao, descricao, funcao, pendencias, echo):
+    """Migração que controla as próprias transações, sob trava de sessão no PostgreSQL"""
+    with engine.connect() as trava:
+        postgres = trava.dialect.name == 'postgresql'
+        if postgres:
+            trava.execute(text('SELECT pg_advisory_lock(724201)'))
+            trava.commit()
+        try:
+            with engine.connect() as conn:
+                if versao <= versao_atual(conn):
+                    return False
+            echo(f"→ Migração {versao:03d}: {descricao}")
+            funcao(engine, pendencias)
+            with engine.begin() as conn:
+                _registrar_versao(conn, versao, descricao)
+            return True
+        finally:
+            if postgres:
+                trava.execute(text('SELECT pg_advisory_unlock(724201)'))
+                trava.commit()
+
+
+def aplicar_migracoes(echo=print):
+    """
+    Cria as tabelas que faltam e aplica as migrações pendentes, cada uma
+    em sua própria transação. Retorna a lista de versões aplicadas.
+    """
+    from app.models import db, Caixa
+
+    db.create_all()
+    engine = db.engine
+    aplicadas = []
+    pendencias = set()
+
+    with engine.begin() as conn:
+        _garantir_tabela_versao(conn)
+
+    for versao, descricao, funcao in MIGRACOES:
+        if not funcao.transacao:
+            if _aplicar_sem_transacao(engine, versao, descricao, funcao, pendencias, echo):
+                aplicadas.append(versao)
+            continue
+
+        with engine.begin() as conn:
+            if conn.dialect.name == 'postgresql':
+                # Impede que dois deploys simultâneos apliquem a mesma migração
+                conn.execute(text('SELECT pg_advisory_xact_lock(724201)'))
+            if versao <= versao_atual(conn):
+                continue
+
+            echo(f"→ Migração {versao:03d}: {descricao}")
+            funcao(conn, pendencias)
+            _registrar_versao(conn, versao, descricao)
+            aplicadas.append(versao)
+
+    # Tarefas que dependem dos modelos atuais rodam com o esquema já completo
+    if 'reconstruir_totais' in pendencias:
+        for caixa in Caixa.query.all():
+            caixa.reconstruir_totais()
+        db.session.commit()
+        echo("✓ Totais acumulados recalculados para os caixas existentes")
+
+    if 'reconstruir_resumo_diario' in pendencias:
+        from app.resumo_diario import reconstruir
+        linhas = reconstruir()
+        echo(f"✓ Resumo diário reconstruído ({linhas} linha(s) dia/caixa)")
+
+    return aplicadas
@@ -1,96 +1,243 @@
 """
 Modelos do banco de dados para o sistema PDV
 """
+import json
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import func
+from sqlalchemy import func, update, text
+from app.dinheiro import Centavos, para_reais
 
 db = SQLAlchemy()
 
 class Configuracao(db.Model):
     __tablename__ = 'configuracao'
     
+    # Linha única, sempre com este id
+    ID_UNICO = 1
+    
     id = db.Column(db.Integer, primary_key=True)
     nome_loja = db.Column(db.String(200), nullable=False, default='Minha Loja')
     responsavel = db.Column(db.String(200), nullable=False, default='Responsável')
     formas_pagamento = db.Column(db.Text, nullable=False, default='Dinheiro,PIX,PIX Online,Cartão Débito,Cartão Crédito,Link de Cartão')
+    # Incrementada a cada alteração; os workers comparam com a cópia em cache
+    versao = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    
+    @staticmethod
+    def garantir_existente():
+        """Cria a linha de configuração se ainda não existir, sem risco de duplicar"""
+        inserir_se_ausente(Configuracao.__table__, {
+            'id': Configuracao.ID_UNICO,
+            'nome_loja': 'Minha Loja',
+            'responsavel': 'Responsável',
+            'formas_pagamento': 'Dinheiro,PIX,PIX Online,Cartão Débito,Cartão Crédito,Link de Cartão',
+            'versao': 1,
+        })
     
     @staticmethod
     def get_config():
-        config = Configuracao.query.first()
+        """Linha de configuração para alteração. Para leitura use app.configuracao."""
+        config = db.session.get(Configuracao, Configuracao.ID_UNICO)
         if not config:
-            config = Configuracao()
-            db.session.add(config)
+            Configuracao.garantir_existente()
             db.session.commit()
+            config = db.session.get(Configuracao, Configuracao.ID_UNICO)
         return config
 
+# Campos de Caixa mantidos incrementalmente a cada lançamento
+CAMPOS_TOTAIS = ('total_entradas', 'total_saidas', 'movimento_dinheiro')
+
+
+def _insert(tabela):
+    if db.session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(tabela)
+
+
+def inserir_se_ausente(tabela, valores):
+    """INSERT ... ON CONFLICT DO NOTHING (SQLite e PostgreSQL)"""
+    db.session.execute(_insert(tabela).values(**valores).on_conflict_do_nothing())
+
+
+def inserir_ou_somar(tabela, chaves, valores):
+    """
+    INSERT ... ON CONFLICT DO UPDATE somando os valores na linha existente.
+    Funciona em SQLite e PostgreSQL e roda na transação da sessão atual.
+    """
+    stmt = _insert(tabela).values(**chaves, **valores)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(chaves),
+        set_={campo: tabela.c[campo] + stmt.excluded[campo] for campo in valores}
+    )
+    db.session.execute(stmt)
+
+
+def somar_contribuicoes(lancamentos):
+    """Soma Lancamento.contribuicao() de vários lançamentos ativos, no mesmo formato"""
+    campos = dict.fromkeys(CAMPOS_TOTAIS, 0)
+    totais = {}
+    
+    for lanc in lancamentos:
+        campos_lanc, totais_lanc = lanc.contribuicao()
+        for campo, valor in campos_lanc.items():
+            campos[campo] += valor
+        for chave, valor in totais_lanc.items():
+            totais[chave] = totais.get(chave, 0) + valor
+    
+    return campos, totais
+
+
+def _aplicar_contribuicao(caixa_id, campos, totais, sinal=1, somente_aberto=False):
+    """UPDATE dos totais do caixa (sempre incrementando a versão) e dos totais por forma/categoria"""
+    valores = {
+        campo: getattr(Caixa, campo) + sinal * valor
+        for campo, valor in campos.items() if valor
+    }
+    valores['versao'] = Caixa.versao + 1
+    
+    condicoes = [Caixa.id == caixa_id]
+    if somente_aberto:
+        condicoes.append(Caixa.status == 'aberto')
+    resultado = db.session.execute(
+        update(Caixa).where(*condicoes).values(valores)
+        .execution_options(synchronize_session=False)
+    )
+    if somente_aberto and resultado.rowcount != 1:
+        return False
+    
+    for (grupo, chave), valor in totais.items():
+        inserir_ou_somar(
+            CaixaTotal.__table__,
+            {'caixa_id': caixa_id, 'grupo': grupo, 'chave': chave},
+            {'valor_centavos': sinal * valor}
+        )
+    return True
+
+
+def aplicar_nos_totais(caixa_id, lancamento, sinal=1, ativo=True, linha=True, somente_aberto=False):
+    """
+    Atualiza os totais do caixa, os totais por forma/categoria e o resumo
+    diário com a contribuição do lançamento, na transação da sessão atual.
+    
+    O UPDATE do caixa sempre incrementa Caixa.versao. Com somente_aberto=True
+    ele exige status 'aberto': retorna False (sem alterar nada) se o caixa não
+    está aberto.
+    """
+    campos, totais = lancamento.contribuicao() if ativo else ({}, {})
+    if not _aplicar_contribuicao(caixa_id, campos, totais, sinal, somente_aberto):
+        return False
+    
+    from app.resumo_diario import registrar_no_resumo
+    registrar_no_resumo(caixa_id, lancamento, sinal, ativo=ativo, linha=linha)
+    return True
+
+
+def aplicar_lote_nos_totais(caixa_id, lancamentos):
+    """
+    Mesmo efeito de aplicar_nos_totais(..., somente_aberto=True) para cada
+    lançamento novo, com um único UPDATE do caixa e um upsert por chave.
+    Retorna False (sem alterar nada) se o caixa não está aberto.
+    """
+    campos, totais = somar_contribuicoes(lancamentos)
+    if not _aplicar_contribuicao(caixa_id, campos, totais, somente_aberto=True):
+        return False
+    
+    from app.resumo_diario import registrar_lote_no_resumo
+    registrar_lote_no_resumo(caixa_id, lancamentos)
+    return True
+
+
 class Caixa(db.Model):
     __tablename__ = 'caixa'
+    __table_args__ = (
+        db.Index('ix_caixa_data_abertura', 'data_abertura'),
+        # Índice parcial: a busca pelo caixa aberto não percorre o histórico
+        db.Index(
+            'ix_caixa_aberto', 'status',
+            sqlite_where=text("status = 'aberto'"),
+            postgresql_where=text("status = 'aberto'")
+        ),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     data_abertura = db.Column(db.DateTime, nullable=False, default=datetime.now)
     data_fechamento = db.Column(db.DateTime)
     operador = db.Column(db.String(200))
-    troco_inicial = db.Column(db.Float, nullable=False, default=0.0)
-    valor_contado = db.Column(db.Float)
-    diferenca = db.Column(db.Float)
+    # Valores monetários em centavos (ver app/dinheiro.py)
+    troco_inicial = db.Column('troco_inicial_centavos', Centavos, nullable=False, default=0)
+    valor_contado = db.Column('valor_contado_centavos', Centavos)
+    diferenca = db.Column('diferenca_centavos', Centavos)
     observacao = db.Column(db.Text)
     status = db.Column(db.String(20), nullable=False, default='aberto')  # aberto, fechado
     
+    # Totais acumulados (atualizados por aplicar_nos_totais ou aplicar_lote_nos_totais, na mesma transação dos lançamentos)
+    total_entradas = db.Column('total_entradas_centavos', Centavos, nullable=False, default=0, server_default='0')
+    total_saidas = db.Column('total_saidas_centavos', Centavos, nullable=False, default=0, server_default='0')
+    movimento_dinheiro = db.Column('movimento_dinheiro_centavos', Centavos, nullable=False, default=0, server_default='0')
+    # Incrementada a cada alteração do caixa ou dos seus totais (ETag das leituras)
+    versao = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    
     lancamentos = db.relationship('Lancamento', backref='caixa', lazy=True, cascade='all, delete-orphan')
+    totais = db.relationship('CaixaTotal', lazy=True, cascade='all, delete-orphan')
+    
+    def registrar_lancamento(self, lancamento, sinal=1, ativo=True, linha=True):
+        """
+        Aplica (sinal=1) ou remove (sinal=-1) a contribuição de um lançamento
+        nos totais acumulados do caixa e no resumo diário. Deve ser chamado
+        antes do commit.
+        
+        ativo=False: lançamento estornado, que só conta como linha no resumo.
+        linha=False: a linha continua existindo (estorno), só os valores mudam.
+        """
+        aplicar_nos_totais(self.id, lancamento, sinal, ativo=ativo, linha=linha)
+        db.session.expire(self, [*CAMPOS_TOTAIS, 'versao'])
+    
+    def totais_do_livro(self):
+        """Recalcula os totais do caixa percorrendo todos os lançamentos"""
+        lancamentos = Lancamento.query.filter_by(caixa_id=self.id).filter(Lancamento.estorno == None).all()
+        return somar_contribuicoes(lancamentos)
+    
+    def totais_acumulados(self):
+        """Totais mantidos incrementalmente, no mesmo formato de totais_do_livro"""
+        campos = {campo: getattr(self, campo) for campo in CAMPOS_TOTAIS}
+        totais = {
+            (t.grupo, t.chave): t.valor
+            for t in CaixaTotal.query.filter_by(caixa_id=self.id).all()
+        }
+        return campos, totais
+    
+    def reconstruir_totais(self):
+        """Regrava os totais acumulados a partir do livro de lançamentos"""
+        campos, totais = self.totais_do_livro()
+        
+        for campo, valor in campos.items():
+            setattr(self, campo, valor)
+        self.versao = Caixa.versao + 1
+        
+        CaixaTotal.query.filter_by(caixa_id=self.id).delete()
+        for (grupo, chave), valor in totais.items():
+            db.session.add(CaixaTotal(caixa_id=self.id, grupo=grupo, chave=chave, valor=valor))
+    
+    def resumo_acumulado(self, grupo):
+        """Totais acumulados por forma de pagamento ('forma') ou categoria ('categoria')"""
+        totais = CaixaTotal.query.filter_by(caixa_id=self.id, grupo=grupo).all()
+        return {t.chave: t.valor for t in totais if t.valor}
     
     def calcular_totais(self):
         """Calcula os totais de entradas e saídas do caixa"""
-        lancamentos = Lancamento.query.filter_by(caixa_id=self.id).all()
-        
-        total_entradas = sum(l.valor for l in lancamentos if l.tipo == 'entrada' and not l.estorno)
-        total_saidas = sum(l.valor for l in lancamentos if l.tipo == 'saida' and not l.estorno)
-        saldo_atual = self.troco_inicial + total_entradas - total_saidas
+        saldo_atual = self.troco_inicial + self.total_entradas - self.total_saidas
         
         return {
             'troco_inicial': self.troco_inicial,
-            'total_entradas': total_entradas,
-            'total_saidas': total_saidas,
+            'total_entradas': self.total_entradas,
+            'total_saidas': self.total_saidas,
             'saldo_atual': saldo_atual
         }
     
     def calcular_saldo_dinheiro(self):
         """Calcula o saldo esperado em dinheiro no caixa"""
-        lancamentos = Lancamento.query.filter_by(caixa_id=self.id).all()
-        
-        # Vendas em dinheiro (excluindo estornados)
-        vendas_dinheiro = sum(
-            l.valor for l in lancamentos 
-            if l.categoria == 'venda' and l.tipo == 'entrada' and l.forma_pagamento == 'Dinheiro'
-            and not l.estorno
-        )
-        
-        # Sangrias (sempre diminuem o dinheiro no caixa, excluindo estornados)
-        sangrias = sum(
-            l.valor for l in lancamentos 
-            if l.categoria == 'sangria' and l.tipo == 'saida'
-            and not l.estorno
-        )
-        
-        # Suprimentos (sempre aumentam o dinheiro no caixa, excluindo estornados)
-        suprimentos = sum(
-            l.valor for l in lancamentos 
-            if l.categoria == 'suprimento' and l.tipo == 'entrada'
-            and not l.estorno
-        )
-        
-        # Outras despesas em dinheiro (excluindo estornados)
-        despesas_dinheiro = sum(
-            l.valor for l in lancamentos 
-            if l.categoria not in ['venda', 'sangria', 'suprimento'] 
-            and l.tipo == 'saida' 
-            and (l.forma_pagamento == 'Dinheiro' or not l.forma_pagamento)
-            and not l.estorno
-        )
-        
-        saldo_dinheiro = self.troco_inicial + vendas_dinheiro + suprimentos - sangrias - despesas_dinheiro
-        
-        return saldo_dinheiro
+        return self.troco_inicial + self.movimento_dinheiro
     
     def to_dict(self):
         totais = self.calcular_totais()
@@ -99,17 +246,64 @@ class Caixa(db.Model):
             'data_abertura': self.data_abertura.isoformat() if self.data_abertura else None,
             'data_fechamento': self.data_fechamento.isoformat() if self.data_fechamento else None,
             'operador': self.operador,
-            'troco_inicial': self.troco_inicial,
-            'valor_contado': self.valor_contado,
-            'diferenca': self.diferenca,
+            'troco_inicial': para_reais(self.troco_inicial),
+            'valor_contado': para_reais(self.valor_contado),
+            'diferenca': para_reais(self.diferenca),
             'observacao': self.observacao,
             'status': self.status,
-            'saldo_dinheiro': self.calcular_saldo_dinheiro(),
-            **totais
+            'saldo_dinheiro': para_reais(self.calcular_saldo_dinheiro()),
+            **{campo: para_reais(valor) for campo, valor in totais.items()}
         }
 
+
+class CaixaTotal(db.Model):
+    """Totais acumulados de um caixa por forma de pagamento e por categoria"""
+    __tablename__ = 'caixa_total'
+    
+    caixa_id = db.Column(db.Integer, db.ForeignKey('caixa.id'), primary_key=True)
+    grupo = db.Column(db.String(20), primary_key=True)  # forma, categoria
+    chave = db.Column(db.String(50), primary_key=True)
+    valor = db.Column('valor_centavos', Centavos, nullable=False, default=0)
+
+
+class ResumoDiario(db.Model):
+    """
+    Consolidado por dia e por caixa, mantido a cada lançamento (ver
+    app/resumo_diario.py). Os painéis do gerente leem daqui em vez de
+    somar os lançamentos do dia.
+    """
+    __tablename__ = 'resumo_diario'
+    
+    data = db.Column(db.Date, primary_key=True)
+    caixa_id = db.Column(db.Integer, db.ForeignKey('caixa.id'), primary_key=True)
+    
+    vendas_dinheiro = db.Column(Centavos, nullable=False, default=0)
+    vendas_pix = db.Column(Centavos, nullable=False, default=0)
+    vendas_cartao_credito = db.Column(Centavos, nullable=False, default=0)
+    vendas_cartao_debito = db.Column(Centavos, nullable=False, default=0)
+    vendas_outras = db.Column(Centavos, nullable=False, default=0)
+    qtd_vendas = db.Column(db.Integer, nullable=False, default=0)
+    troco_dado = db.Column(Centavos, nullable=False, default=0)
+    sangrias = db.Column(Centavos, nullable=False, default=0)
+    qtd_sangrias = db.Column(db.Integer, nullable=False, default=0)
+    suprimentos = db.Column(Centavos, nullable=False, default=0)
+    qtd_suprimentos = db.Column(db.Integer, nullable=False, default=0)
+    outros_entrada = db.Column(Centavos, nullable=False, default=0)
+    outros_saida = db.Column(Centavos, nullable=False, default=0)
+    estornos = db.Column(Centavos, nullable=False, default=0)
+    estornos_dinheiro = db.Column(Centavos, nullable=False, default=0)
+    qtd_estornos = db.Column(db.Integer, nullable=False, default=0)
+    # Todas as linhas do dia, inclusive as estornadas
+    qtd_lancamentos = db.Column(db.Integer, nullable=False, default=0)
+
+
 class Lancamento(db.Model):
     __tablename__ = 'lancamento'
+    __table_args__ = (
+        db.Index('ix_lancamento_caixa_data', 'caixa_id', 'data_hora'),
+        db.Index('ix_lancamento_data_categoria', 'data_hora', 'categoria'),
+        db.Index('ux_lancamento_chave', 'chave_idempotencia', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     caixa_id = db.Column(db.Integer, db.ForeignKey('caixa.id'), nullable=False)
@@ -117,13 +311,56 @@ class Lancamento(db.Model):
     tipo = db.Column(db.String(20), nullable=False)  # entrada, saida
     categoria = db.Column(db.String(50), nullable=False)  # venda, sangria, suprimento, despesa, outros
     forma_pagamento = db.Column(db.String(50))
-    valor = db.Column(db.Float, nullable=False)
-    valor_recebido = db.Column(db.Float)  # Para vendas em dinheiro
-    troco = db.Column(db.Float)  # Troco calculado
+    # Valores monetários em centavos (ver app/dinheiro.py)
+    valor = db.Column('valor_centavos', Centavos, nullable=False)
+    valor_recebido = db.Column('valor_recebido_centavos', Centavos)  # Para vendas em dinheiro
+    troco = db.Column('troco_centavos', Centavos)  # Troco calculado
     descricao = db.Column(db.Text)
-    estorno = db.relationship('Estorno', back_populates='lancamento', uselist=False, cascade='all, delete-orphan')
+    # Gerada pelo cliente nos envios em lote: reenvio da mesma chave não duplica
+    chave_idempotencia = db.Column(db.String(64))
+    # Carregado no mesmo SELECT (LEFT JOIN pela chave única): listas e PDFs
+    # chamam to_dict() em cada linha e não podem disparar uma consulta por lançamento
+    estorno = db.relationship(
+        'Estorno', back_populates='lancamento', uselist=False,
+        lazy='joined', cascade='all, delete-orphan'
+    )
+    
+    def contribuicao(self):
+        """
+        Quanto este lançamento soma nos totais acumulados do caixa.
+        Retorna (campos de Caixa, {(grupo, chave): valor} de CaixaTotal).
+        Lançamentos estornados não contribuem; quem chama deve tratar isso.
+        """
+        valor = self.valor or 0
+        forma = self.forma_pagamento
+        
+        campos = dict.fromkeys(CAMPOS_TOTAIS, 0)
+        if self.tipo == 'entrada':
+            campos['total_entradas'] = valor
+        elif self.tipo == 'saida':
+            campos['total_saidas'] = valor
+        
+        # Mesmas regras de dinheiro físico usadas no fechamento do caixa
+        if self.categoria == 'venda':
+            if self.tipo == 'entrada' and forma == 'Dinheiro':
+                campos['movimento_dinheiro'] = valor
+        elif self.categoria == 'sangria':
+            if self.tipo == 'saida':
+                campos['movimento_dinheiro'] = -valor
+        elif self.categoria == 'suprimento':
+            if self.tipo == 'entrada':
+                campos['movimento_dinheiro'] = valor
+        elif self.tipo == 'saida' and (forma == 'Dinheiro' or not forma):
+            campos['movimento_dinheiro'] = -valor
+        
+        totais = {('categoria', self.categoria): valor}
+        if self.categoria == 'venda' and self.tipo == 'entrada':
+            totais[('forma', forma or 'Não informado')] = valor
+        
+        return campos, totais
     
     def to_dict(self):
+        estorno = self.estorno
         return {
             'id': self.id,
             'caixa_id': self.caixa_id,
@@ -131,12 +368,12 @@ class Lancamento(db.Model):
             'tipo': self.tipo,
             'categoria': self.categoria,
             'forma_pagamento': self.forma_pagamento,
-            'valor': self.valor,
-            'valor_recebido': self.valor_recebido,
-            'troco': self.troco,
+            'valor': para_reais(self.valor),
+            'valor_recebido': para_reais(self.valor_recebido),
+            'troco': para_reais(self.troco),
             'descricao': self.descricao,
-            'estornado': bool(self.estorno),
-            'motivo_estorno': self.estorno.motivo if self.estorno else None
+            'estornado': estorno is not None,
+            'motivo_estorno': estorno.motivo if estorno else None
         }
 
 
@@ -156,3 +393,52 @@ class Estorno(db.Model):
             'data_hora': self.data_hora.isoformat() if self.data_hora else None
         }
 
+
+class Evento(db.Model):
+    """
+    Alteração no livro para os painéis conectados (ver app/eventos.py).
+    Gravado na mesma transação da alteração; linhas antigas são apagadas.
+    """
+    __tablename__ = 'evento'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(30), nullable=False)  # lancamento, lancamentos_lote, lancamento_removido, estorno, caixa_aberto, caixa_fechado
+    caixa_id = db.Column(db.Integer)
+    dados = db.Column(db.Text)  # JSON
+    criado_em = db.Column(db.DateTime, nullable=False, default=datetime.now, index=True)
+
+
+class RelatorioPedido(db.Model):
+    """
+    Relatório em PDF pedido à fila (ver app/fila_relatorios.py). Os
+    processos da fila geram o arquivo fora dos workers do gunicorn; a linha
+    e o arquivo são apagados quando o pedido expira.
+    """
+    __tablename__ = 'relatorio_pedido'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(20), nullable=False)  # periodo, resumo_diario, caixa, cupom
+    parametros = db.Column(db.Text, nullable=False)  # JSON
+    status = db.Column(db.String(15), nullable=False, default='pendente', index=True)  # pendente, processando, pronto, erro
+    erro = db.Column(db.Text)
+    nome_arquivo = db.Column(db.String(120))
+    tamanho = db.Column(db.Integer)
+    criado_em = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    iniciado_em = db.Column(db.DateTime)
+    concluido_em = db.Column(db.DateTime)
+    expira_em = db.Column(db.DateTime, index=True)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'parametros': json.loads(self.parametros),
+            'status': self.status,
+            'erro': self.erro,
+            'nome_arquivo': self.nome_arquivo,
+            'tamanho': self.tamanho,
+            'criado_em': self.criado_em.isoformat() if self.criado_em else None,
+            'iniciado_em': self.iniciado_em.isoformat() if self.iniciado_em else None,
+            'concluido_em': self.concluido_em.isoformat() if self.concluido_em else None,
+            'expira_em': self.expira_em.isoformat() if self.expira_em else None
+        }
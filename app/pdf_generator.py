@@ -1,19 +1,34 @@
 """
 Módulo de Geração de Relatórios em PDF
+
+Os dicionários da API (caixa, lançamentos, totais do período) chegam em
+reais e são lidos em centavos com centavos_de(); os resumos da agregação
+(resumo do caixa e do dia) já chegam em centavos. Somas e comparações são
+feitas em centavos e só a formatação final gera o texto em reais.
+
+Estilos, estilos de tabela e as seções de lançamentos vêm de app.pdf_modelos,
+montados uma vez por processo.
 """
+import os
 from io import BytesIO
 from datetime import datetime
-from reportlab.lib import colors
+from xml.sax.saxutils import escape
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import mm, cm
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
-
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+from app.pdf_modelos import (
+    estilos, estilo_tabela, estilo_tabela_termica,
+    tabela, secao_lancamentos, secao_por_dia, MODELO_CAIXA, MODELO_PERIODO, MODELO_DIARIO
+)
+from app.dinheiro import para_centavos, centavos_de, formatar_centavos
+from app.cupom_termico import linhas_cupom
 
-def formatar_moeda(valor):
-    """Formata valor para moeda brasileira"""
-    return f"R$ {valor:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+# Relatório por período: acima de LIMITE_LANCAMENTOS_PERIODO a relação sai
+# agrupada por dia e, com mais de LIMITE_DIAS_PERIODO dias, só o resumo
+MODOS_PERIODO = ('completo', 'diario', 'resumo')
+LIMITE_LANCAMENTOS_PERIODO = int(os.environ.get('PDF_PERIODO_MAX_LANCAMENTOS', 5000))
+LIMITE_DIAS_PERIODO = 400
+BLOCO_LINHAS = 50
 
 
 def formatar_data(data_str):
@@ -27,12 +42,18 @@ def formatar_data(data_str):
         return data_str
 
 
-def gerar_relatorio_caixa_pdf(caixa_data, lancamentos, nome_loja='Minha Loja'):
-    """
-    Gera PDF com relatório completo de um caixa específico
-    """
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(
+def modo_periodo(pedido, quantidade, dias):
+    """Modo do relatório por período (completo, diario ou resumo) dentro dos limites"""
+    modo = pedido if pedido in MODOS_PERIODO else 'completo'
+    if modo == 'completo' and quantidade > LIMITE_LANCAMENTOS_PERIODO:
+        modo = 'diario'
+    if modo == 'diario' and dias > LIMITE_DIAS_PERIODO:
+        modo = 'resumo'
+    return modo
+
+
+def _documento_a4(buffer):
+    return SimpleDocTemplate(
         buffer,
         pagesize=A4,
         rightMargin=2*cm,
@@ -40,35 +61,23 @@ def gerar_relatorio_caixa_pdf(caixa_data, lancamentos, nome_loja='Minha Loja'):
         topMargin=2*cm,
         bottomMargin=2*cm
     )
+
+
+def gerar_relatorio_caixa_pdf(caixa_data, lancamentos, nome_loja='Minha Loja', resumo=None, destino=None):
+    """
+    Gera PDF com relatório completo de um caixa específico
     
-    styles = getSampleStyleSheet()
-    
-    # Estilos customizados
-    titulo_style = ParagraphStyle(
-        'Titulo',
-        parent=styles['Heading1'],
-        fontSize=18,
-        alignment=TA_CENTER,
-        spaceAfter=20,
-        textColor=colors.HexColor('#1a5fb4')
-    )
-    
-    subtitulo_style = ParagraphStyle(
-        'Subtitulo',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceBefore=15,
-        spaceAfter=10,
-        textColor=colors.HexColor('#333333')
-    )
+    resumo: resultado de agregacao.resumir() para o caixa; se omitido,
+    os totais são calculados a partir da lista de lançamentos.
+    destino: arquivo binário onde gravar o PDF (padrão: BytesIO)
+    """
+    buffer = destino if destino is not None else BytesIO()
+    doc = _documento_a4(buffer)
     
-    info_style = ParagraphStyle(
-        'Info',
-        parent=styles['Normal'],
-        fontSize=10,
-        alignment=TA_CENTER,
-        textColor=colors.grey
-    )
+    estilo = estilos()
+    titulo_style = estilo['titulo']
+    subtitulo_style = estilo['subtitulo']
+    info_style = estilo['info']
     
     elements = []
     
@@ -91,74 +100,51 @@ def gerar_relatorio_caixa_pdf(caixa_data, lancamentos, nome_loja='Minha Loja'):
         ['Data Abertura', formatar_data(caixa_data.get('data_abertura'))],
         ['Data Fechamento', formatar_data(caixa_data.get('data_fechamento'))],
         ['Status', caixa_data.get('status', '-').upper()],
-        ['Troco Inicial', formatar_moeda(caixa_data.get('troco_inicial', 0))],
+        ['Troco Inicial', formatar_centavos(centavos_de(caixa_data, 'troco_inicial'))],
     ]
     
-    tabela_info = Table(info_caixa, colWidths=[200, 250])
-    tabela_info.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1a5fb4')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-        ('TOPPADDING', (0, 0), (-1, 0), 10),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f5f5f5')]),
-    ]))
-    elements.append(tabela_info)
+    elements.append(tabela(info_caixa, (200, 250), estilo_tabela(
+        '#1a5fb4', '#f5f5f5', alinhamento=((0, 0), (-1, -1), 'LEFT')
+    )))
     elements.append(Spacer(1, 20))
     
     # Resumo Financeiro
     elements.append(Paragraph("💰 Resumo Financeiro", subtitulo_style))
     
-    total_entradas = caixa_data.get('total_entradas', 0)
-    total_saidas = caixa_data.get('total_saidas', 0)
-    saldo = caixa_data.get('saldo_atual', 0)
-    diferenca = caixa_data.get('diferenca')
+    total_entradas = centavos_de(caixa_data, 'total_entradas')
+    total_saidas = centavos_de(caixa_data, 'total_saidas')
+    saldo = centavos_de(caixa_data, 'saldo_atual')
+    diferenca = para_centavos(caixa_data.get('diferenca'))
     
     resumo_data = [
         ['Descrição', 'Valor'],
-        ['Total de Entradas', formatar_moeda(total_entradas)],
-        ['Total de Saídas', formatar_moeda(total_saidas)],
-        ['Saldo Final', formatar_moeda(saldo)],
+        ['Total de Entradas', formatar_centavos(total_entradas)],
+        ['Total de Saídas', formatar_centavos(total_saidas)],
+        ['Saldo Final', formatar_centavos(saldo)],
     ]
     
     if caixa_data.get('valor_contado') is not None:
-        resumo_data.append(['Valor Contado', formatar_moeda(caixa_data.get('valor_contado', 0))])
+        resumo_data.append(['Valor Contado', formatar_centavos(centavos_de(caixa_data, 'valor_contado'))])
     
     if diferenca is not None:
-        status_diferenca = "✅ Conferido" if abs(diferenca) < 0.01 else (
-            f"⬆️ Sobra: {formatar_moeda(diferenca)}" if diferenca > 0 
-            else f"⬇️ Falta: {formatar_moeda(abs(diferenca))}"
+        status_diferenca = "✅ Conferido" if diferenca == 0 else (
+            f"⬆️ Sobra: {formatar_centavos(diferenca)}" if diferenca > 0 
+            else f"⬇️ Falta: {formatar_centavos(abs(diferenca))}"
         )
         resumo_data.append(['Diferença', status_diferenca])
     
-    tabela_resumo = Table(resumo_data, colWidths=[200, 250])
-    tabela_resumo.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#26a269')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-        ('TOPPADDING', (0, 0), (-1, 0), 10),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#e8f5e9')]),
-    ]))
-    elements.append(tabela_resumo)
+    elements.append(tabela(resumo_data, (200, 250), estilo_tabela('#26a269', '#e8f5e9')))
     elements.append(Spacer(1, 20))
     
     # Totais por Forma de Pagamento (apenas vendas)
-    vendas_por_forma = {}
-    for lanc in lancamentos:
-        if lanc.get('categoria') == 'venda' and lanc.get('tipo') == 'entrada':
-            forma = lanc.get('forma_pagamento') or 'Não informado'
-            valor = lanc.get('valor', 0)
-            if forma in vendas_por_forma:
-                vendas_por_forma[forma] += valor
-            else:
-                vendas_por_forma[forma] = valor
+    if resumo is not None:
+        vendas_por_forma = resumo['vendas_por_forma']
+    else:
+        vendas_por_forma = {}
+        for lanc in lancamentos:
+            if lanc.get('categoria') == 'venda' and lanc.get('tipo') == 'entrada':
+                forma = lanc.get('forma_pagamento') or 'Não informado'
+                vendas_por_forma[forma] = vendas_por_forma.get(forma, 0) + centavos_de(lanc, 'valor')
     
     if vendas_por_forma:
         elements.append(Paragraph("💳 Total por Forma de Pagamento", subtitulo_style))
@@ -167,87 +153,61 @@ def gerar_relatorio_caixa_pdf(caixa_data, lancamentos, nome_loja='Minha Loja'):
         total_vendas = 0
         for forma in sorted(vendas_por_forma.keys()):
             valor = vendas_por_forma[forma]
-            formas_data.append([forma, formatar_moeda(valor)])
+            formas_data.append([forma, formatar_centavos(valor)])
             total_vendas += valor
         
         # Linha de total
-        formas_data.append(['TOTAL DE VENDAS', formatar_moeda(total_vendas)])
+        formas_data.append(['TOTAL DE VENDAS', formatar_centavos(total_vendas)])
         
-        tabela_formas = Table(formas_data, colWidths=[250, 200])
-        tabela_formas.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#ff7043')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-            ('TOPPADDING', (0, 0), (-1, 0), 10),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.HexColor('#fff3e0')]),
-            # Destacar linha de total
-            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#26a269')),
-            ('TEXTCOLOR', (0, -1), (-1, -1), colors.white),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, -1), (-1, -1), 11),
-        ]))
-        elements.append(tabela_formas)
+        elements.append(tabela(formas_data, (250, 200), estilo_tabela(
+            '#ff7043', '#fff3e0', linha_destaque=-1, cor_destaque='#26a269'
+        )))
         elements.append(Spacer(1, 20))
     
     # Fechamento de Caixa (apenas se o caixa estiver fechado)
     if caixa_data.get('status') == 'fechado':
         elements.append(Paragraph("💵 Fechamento de Caixa (Dinheiro)", subtitulo_style))
         
-        troco_inicial = caixa_data.get('troco_inicial', 0)
+        troco_inicial = centavos_de(caixa_data, 'troco_inicial')
         vendas_dinheiro = vendas_por_forma.get('Dinheiro', 0)
         
         # Calcular sangrias e suprimentos em dinheiro
-        sangrias_dinheiro = 0
-        suprimentos_dinheiro = 0
-        
-        for lanc in lancamentos:
-            if lanc.get('forma_pagamento') == 'Dinheiro' or lanc.get('categoria') in ['sangria', 'suprimento']:
+        if resumo is not None:
+            sangrias_dinheiro = resumo['movimentacoes']['sangrias']
+            suprimentos_dinheiro = resumo['movimentacoes']['suprimentos']
+        else:
+            sangrias_dinheiro = 0
+            suprimentos_dinheiro = 0
+            
+            for lanc in lancamentos:
                 if lanc.get('categoria') == 'sangria' and lanc.get('tipo') == 'saida':
-                    sangrias_dinheiro += lanc.get('valor', 0)
+                    sangrias_dinheiro += centavos_de(lanc, 'valor')
                 elif lanc.get('categoria') == 'suprimento' and lanc.get('tipo') == 'entrada':
-                    suprimentos_dinheiro += lanc.get('valor', 0)
+                    suprimentos_dinheiro += centavos_de(lanc, 'valor')
         
         previsao_dinheiro = troco_inicial + vendas_dinheiro + suprimentos_dinheiro - sangrias_dinheiro
-        valor_contado = caixa_data.get('valor_contado', 0)
+        valor_contado = centavos_de(caixa_data, 'valor_contado')
         
         fechamento_data = [
             ['Descrição', 'Valor'],
-            ['Troco Inicial', formatar_moeda(troco_inicial)],
-            ['(+) Vendas em Dinheiro', formatar_moeda(vendas_dinheiro)],
-            ['(+) Suprimentos', formatar_moeda(suprimentos_dinheiro)],
-            ['(-) Sangrias', formatar_moeda(sangrias_dinheiro)],
-            ['PREVISÃO DE FECHAMENTO', formatar_moeda(previsao_dinheiro)],
+            ['Troco Inicial', formatar_centavos(troco_inicial)],
+            ['(+) Vendas em Dinheiro', formatar_centavos(vendas_dinheiro)],
+            ['(+) Suprimentos', formatar_centavos(suprimentos_dinheiro)],
+            ['(-) Sangrias', formatar_centavos(sangrias_dinheiro)],
+            ['PREVISÃO DE FECHAMENTO', formatar_centavos(previsao_dinheiro)],
         ]
         
         if valor_contado > 0:
-            fechamento_data.append(['Valor Contado', formatar_moeda(valor_contado)])
+            fechamento_data.append(['Valor Contado', formatar_centavos(valor_contado)])
             diferenca_dinheiro = valor_contado - previsao_dinheiro
-            if abs(diferenca_dinheiro) >= 0.01:
-                status_dif = f"{'Sobra' if diferenca_dinheiro > 0 else 'Falta'}: {formatar_moeda(abs(diferenca_dinheiro))}"
+            if diferenca_dinheiro != 0:
+                status_dif = f"{'Sobra' if diferenca_dinheiro > 0 else 'Falta'}: {formatar_centavos(abs(diferenca_dinheiro))}"
                 fechamento_data.append(['Diferença', status_dif])
         
-        tabela_fechamento = Table(fechamento_data, colWidths=[250, 200])
-        tabela_fechamento.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#5c6bc0')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-            ('TOPPADDING', (0, 0), (-1, 0), 10),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#e8eaf6')]),
-            # Destacar linha de previsão
-            ('BACKGROUND', (0, 5), (-1, 5), colors.HexColor('#1a5fb4')),
-            ('TEXTCOLOR', (0, 5), (-1, 5), colors.white),
-            ('FONTNAME', (0, 5), (-1, 5), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 5), (-1, 5), 11),
-        ]))
-        elements.append(tabela_fechamento)
+        # Destacar linha de previsão
+        elements.append(tabela(fechamento_data, (250, 200), estilo_tabela(
+            '#5c6bc0', '#e8eaf6', linha_destaque=5, cor_destaque='#1a5fb4'
+        )))
         elements.append(Spacer(1, 20))
     
     # Lista de Lançamentos Detalhada
@@ -259,175 +219,11 @@ def gerar_relatorio_caixa_pdf(caixa_data, lancamentos, nome_loja='Minha Loja'):
         sangrias = [l for l in lancamentos if l.get('categoria') == 'sangria']
         suprimentos = [l for l in lancamentos if l.get('categoria') == 'suprimento']
         outros = [l for l in lancamentos if l.get('categoria') not in ['venda', 'sangria', 'suprimento']]
+        despesas = sangrias + [l for l in outros if l.get('tipo') == 'saida']
         
-        # VENDAS
-        if vendas:
-            elements.append(Spacer(1, 10))
-            elements.append(Paragraph("💰 VENDAS", ParagraphStyle('VendasTitulo', parent=subtitulo_style, fontSize=12, textColor=colors.HexColor('#26a269'))))
-            
-            lanc_data = [['Hora', 'Forma Pagamento', 'Descrição', 'Valor']]
-            total_vendas = 0
-            
-            for lanc in vendas:
-                hora = ''
-                try:
-                    dt = datetime.fromisoformat(lanc.get('data_hora', '').replace('Z', '+00:00'))
-                    hora = dt.strftime('%H:%M')
-                except:
-                    hora = '-'
-                
-                forma_pag = lanc.get('forma_pagamento') or 'Não informado'
-                descricao = lanc.get('descricao') or 'Venda'
-                
-                # Adicionar informação de troco
-                if lanc.get('valor_recebido'):
-                    troco = lanc.get('valor_recebido') - lanc.get('valor', 0)
-                    if troco > 0:
-                        descricao += f" | Recebido: {formatar_moeda(lanc.get('valor_recebido'))} | Troco: {formatar_moeda(troco)}"
-                
-                valor = lanc.get('valor', 0)
-                total_vendas += valor
-                
-                lanc_data.append([
-                    hora,
-                    forma_pag,
-                    descricao,
-                    formatar_moeda(valor)
-                ])
-            
-            # Adicionar linha de total
-            lanc_data.append(['', '', 'TOTAL VENDAS', formatar_moeda(total_vendas)])
-            
-            tabela_lanc = Table(lanc_data, colWidths=[50, 110, 240, 80])
-            tabela_lanc.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#26a269')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('ALIGN', (3, 1), (3, -1), 'RIGHT'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                ('TOPPADDING', (0, 0), (-1, 0), 8),
-                ('BOTTOMPADDING', (0, 1), (-1, -1), 5),
-                ('TOPPADDING', (0, 1), (-1, -1), 5),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.HexColor('#e8f5e9')]),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                # Destacar total
-                ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#26a269')),
-                ('TEXTCOLOR', (0, -1), (-1, -1), colors.white),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, -1), (-1, -1), 10),
-            ]))
-            elements.append(tabela_lanc)
-        
-        # DESPESAS/SAÍDAS
-        if sangrias or outros:
-            despesas_lista = sangrias + [l for l in outros if l.get('tipo') == 'saida']
-            if despesas_lista:
-                elements.append(Spacer(1, 15))
-                elements.append(Paragraph("💸 DESPESAS E SAÍDAS", ParagraphStyle('DespesasTitulo', parent=subtitulo_style, fontSize=12, textColor=colors.HexColor('#c01c28'))))
-                
-                lanc_data = [['Hora', 'Categoria', 'Descrição/Motivo', 'Valor']]
-                total_despesas = 0
-                
-                for lanc in despesas_lista:
-                    hora = ''
-                    try:
-                        dt = datetime.fromisoformat(lanc.get('data_hora', '').replace('Z', '+00:00'))
-                        hora = dt.strftime('%H:%M')
-                    except:
-                        hora = '-'
-                    
-                    categoria = lanc.get('categoria', '-').capitalize()
-                    descricao = lanc.get('descricao') or 'Sem descrição'
-                    valor = lanc.get('valor', 0)
-                    total_despesas += valor
-                    
-                    lanc_data.append([
-                        hora,
-                        categoria,
-                        descricao,
-                        formatar_moeda(valor)
-                    ])
-                
-                # Adicionar linha de total
-                lanc_data.append(['', '', 'TOTAL SAÍDAS', formatar_moeda(total_despesas)])
-                
-                tabela_lanc = Table(lanc_data, colWidths=[50, 80, 270, 80])
-                tabela_lanc.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#c01c28')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 9),
-                    ('FONTSIZE', (0, 1), (-1, -1), 8),
-                    ('ALIGN', (3, 1), (3, -1), 'RIGHT'),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                    ('TOPPADDING', (0, 0), (-1, 0), 8),
-                    ('BOTTOMPADDING', (0, 1), (-1, -1), 5),
-                    ('TOPPADDING', (0, 1), (-1, -1), 5),
-                    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.HexColor('#fce4e4')]),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    # Destacar total
-                    ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#c01c28')),
-                    ('TEXTCOLOR', (0, -1), (-1, -1), colors.white),
-                    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, -1), (-1, -1), 10),
-                ]))
-                elements.append(tabela_lanc)
-        
-        # SUPRIMENTOS
-        if suprimentos:
-            elements.append(Spacer(1, 15))
-            elements.append(Paragraph("💵 SUPRIMENTOS", ParagraphStyle('SuprimentosTitulo', parent=subtitulo_style, fontSize=12, textColor=colors.HexColor('#1a5fb4'))))
-            
-            lanc_data = [['Hora', 'Descrição/Motivo', 'Valor']]
-            total_suprimentos = 0
-            
-            for lanc in suprimentos:
-                hora = ''
-                try:
-                    dt = datetime.fromisoformat(lanc.get('data_hora', '').replace('Z', '+00:00'))
-                    hora = dt.strftime('%H:%M')
-                except:
-                    hora = '-'
-                
-                descricao = lanc.get('descricao') or 'Suprimento'
-                valor = lanc.get('valor', 0)
-                total_suprimentos += valor
-                
-                lanc_data.append([
-                    hora,
-                    descricao,
-                    formatar_moeda(valor)
-                ])
-            
-            # Adicionar linha de total
-            lanc_data.append(['', 'TOTAL SUPRIMENTOS', formatar_moeda(total_suprimentos)])
-            
-            tabela_lanc = Table(lanc_data, colWidths=[50, 350, 80])
-            tabela_lanc.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1a5fb4')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('ALIGN', (2, 1), (2, -1), 'RIGHT'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                ('TOPPADDING', (0, 0), (-1, 0), 8),
-                ('BOTTOMPADDING', (0, 1), (-1, -1), 5),
-                ('TOPPADDING', (0, 1), (-1, -1), 5),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.HexColor('#e8eaf6')]),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                # Destacar total
-                ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#1a5fb4')),
-                ('TEXTCOLOR', (0, -1), (-1, -1), colors.white),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, -1), (-1, -1), 10),
-            ]))
-            elements.append(tabela_lanc)
+        elements += secao_lancamentos('vendas', vendas, MODELO_CAIXA)
+        elements += secao_lancamentos('despesas', despesas, MODELO_CAIXA)
+        elements += secao_lancamentos('suprimentos', suprimentos, MODELO_CAIXA)
     
     # Rodapé
     elements.append(Spacer(1, 30))
@@ -441,47 +237,22 @@ def gerar_relatorio_caixa_pdf(caixa_data, lancamentos, nome_loja='Minha Loja'):
     return buffer
 
 
-def gerar_relatorio_periodo_pdf(dados_relatorio, nome_loja='Minha Loja'):
+def gerar_relatorio_periodo_pdf(dados_relatorio, nome_loja='Minha Loja', destino=None):
     """
     Gera PDF com relatório de um período
+
+    dados_relatorio traz 'lancamentos' (relação completa) ou 'por_dia'
+    ({seção: [(data, quantidade, total em centavos)]}), e 'qtd_lancamentos' quando a
+    relação não é a completa. destino: arquivo binário onde gravar o PDF
+    (padrão: BytesIO), devolvido no início.
     """
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        rightMargin=2*cm,
-        leftMargin=2*cm,
-        topMargin=2*cm,
-        bottomMargin=2*cm
-    )
-    
-    styles = getSampleStyleSheet()
-    
-    titulo_style = ParagraphStyle(
-        'Titulo',
-        parent=styles['Heading1'],
-        fontSize=18,
-        alignment=TA_CENTER,
-        spaceAfter=20,
-        textColor=colors.HexColor('#1a5fb4')
-    )
+    buffer = destino if destino is not None else BytesIO()
+    doc = _documento_a4(buffer)
     
-    subtitulo_style = ParagraphStyle(
-        'Subtitulo',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceBefore=15,
-        spaceAfter=10,
-        textColor=colors.HexColor('#333333')
-    )
-    
-    info_style = ParagraphStyle(
-        'Info',
-        parent=styles['Normal'],
-        fontSize=10,
-        alignment=TA_CENTER,
-        textColor=colors.grey
-    )
+    estilo = estilos()
+    titulo_style = estilo['titulo']
+    subtitulo_style = estilo['subtitulo']
+    info_style = estilo['info']
     
     elements = []
     
@@ -506,24 +277,12 @@ def gerar_relatorio_periodo_pdf(dados_relatorio, nome_loja='Minha Loja'):
     totais = dados_relatorio.get('totais', {})
     resumo_data = [
         ['Descrição', 'Valor'],
-        ['Total de Entradas', formatar_moeda(totais.get('entradas', 0))],
-        ['Total de Saídas', formatar_moeda(totais.get('saidas', 0))],
-        ['Saldo do Período', formatar_moeda(totais.get('saldo', 0))],
+        ['Total de Entradas', formatar_centavos(centavos_de(totais, 'entradas'))],
+        ['Total de Saídas', formatar_centavos(centavos_de(totais, 'saidas'))],
+        ['Saldo do Período', formatar_centavos(centavos_de(totais, 'saldo'))],
     ]
     
-    tabela_resumo = Table(resumo_data, colWidths=[200, 250])
-    tabela_resumo.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#26a269')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-        ('TOPPADDING', (0, 0), (-1, 0), 10),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#e8f5e9')]),
-    ]))
-    elements.append(tabela_resumo)
+    elements.append(tabela(resumo_data, (200, 250), estilo_tabela('#26a269', '#e8f5e9', tamanho=11)))
     elements.append(Spacer(1, 20))
     
     # Por Categoria
@@ -537,22 +296,12 @@ def gerar_relatorio_periodo_pdf(dados_relatorio, nome_loja='Minha Loja'):
             cat_data.append([
                 cat.get('categoria', '-').capitalize(),
                 f"{tipo_emoji} {cat.get('tipo', '-')}",
-                formatar_moeda(cat.get('total', 0))
+                formatar_centavos(centavos_de(cat, 'total'))
             ])
         
-        tabela_cat = Table(cat_data, colWidths=[150, 150, 150])
-        tabela_cat.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#5c6bc0')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('ALIGN', (2, 1), (2, -1), 'RIGHT'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-            ('TOPPADDING', (0, 0), (-1, 0), 10),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f5f5f5')]),
-        ]))
-        elements.append(tabela_cat)
+        elements.append(tabela(cat_data, (150, 150, 150), estilo_tabela(
+            '#5c6bc0', '#f5f5f5', alinhamento=((2, 1), (2, -1), 'RIGHT')
+        )))
         elements.append(Spacer(1, 20))
     
     # Por Forma de Pagamento
@@ -564,25 +313,17 @@ def gerar_relatorio_periodo_pdf(dados_relatorio, nome_loja='Minha Loja'):
         for pag in pagamentos:
             pag_data.append([
                 pag.get('forma', '-'),
-                formatar_moeda(pag.get('total', 0))
+                formatar_centavos(centavos_de(pag, 'total'))
             ])
         
-        tabela_pag = Table(pag_data, colWidths=[250, 200])
-        tabela_pag.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#ff7043')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('ALIGN', (1, 1), (1, -1), 'RIGHT'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-            ('TOPPADDING', (0, 0), (-1, 0), 10),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#fff3e0')]),
-        ]))
-        elements.append(tabela_pag)
+        elements.append(tabela(pag_data, (250, 200), estilo_tabela(
+            '#ff7043', '#fff3e0', alinhamento=((1, 1), (1, -1), 'RIGHT')
+        )))
     
     # Lista de Lançamentos do Período - Detalhada
     lancamentos = dados_relatorio.get('lancamentos', [])
+    por_dia = dados_relatorio.get('por_dia')
+    quantidade = dados_relatorio.get('qtd_lancamentos')
     if lancamentos:
         elements.append(Spacer(1, 20))
         elements.append(Paragraph("📝 Relação Detalhada de Lançamentos", subtitulo_style))
@@ -592,165 +333,23 @@ def gerar_relatorio_periodo_pdf(dados_relatorio, nome_loja='Minha Loja'):
         despesas = [l for l in lancamentos if l.get('tipo') == 'saida']
         suprimentos = [l for l in lancamentos if l.get('categoria') == 'suprimento']
         
-        # VENDAS
-        if vendas:
-            elements.append(Spacer(1, 10))
-            elements.append(Paragraph("💰 VENDAS DO PERÍODO", ParagraphStyle('VendasTitulo', parent=subtitulo_style, fontSize=12, textColor=colors.HexColor('#26a269'))))
-            
-            lanc_data = [['Data/Hora', 'Forma Pag.', 'Descrição', 'Valor']]
-            total_vendas = 0
-            
-            for lanc in vendas:
-                data_hora = ''
-                try:
-                    dt = datetime.fromisoformat(lanc.get('data_hora', '').replace('Z', '+00:00'))
-                    data_hora = dt.strftime('%d/%m %H:%M')
-                except:
-                    data_hora = '-'
-                
-                forma_pag = lanc.get('forma_pagamento') or 'Não informado'
-                descricao = lanc.get('descricao') or 'Venda'
-                if len(descricao) > 40:
-                    descricao = descricao[:37] + '...'
-                
-                valor = lanc.get('valor', 0)
-                total_vendas += valor
-                
-                lanc_data.append([
-                    data_hora,
-                    forma_pag,
-                    descricao,
-                    formatar_moeda(valor)
-                ])
-            
-            lanc_data.append(['', '', 'TOTAL VENDAS', formatar_moeda(total_vendas)])
-            
-            tabela_lanc = Table(lanc_data, colWidths=[70, 100, 210, 70])
-            tabela_lanc.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#26a269')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('ALIGN', (3, 1), (3, -1), 'RIGHT'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                ('TOPPADDING', (0, 0), (-1, 0), 8),
-                ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-                ('TOPPADDING', (0, 1), (-1, -1), 4),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.HexColor('#e8f5e9')]),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#26a269')),
-                ('TEXTCOLOR', (0, -1), (-1, -1), colors.white),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ]))
-            elements.append(tabela_lanc)
-        
-        # DESPESAS/SAÍDAS
-        if despesas:
-            elements.append(Spacer(1, 15))
-            elements.append(Paragraph("💸 DESPESAS E SAÍDAS DO PERÍODO", ParagraphStyle('DespesasTitulo', parent=subtitulo_style, fontSize=12, textColor=colors.HexColor('#c01c28'))))
-            
-            lanc_data = [['Data/Hora', 'Categoria', 'Descrição', 'Valor']]
-            total_despesas = 0
-            
-            for lanc in despesas:
-                data_hora = ''
-                try:
-                    dt = datetime.fromisoformat(lanc.get('data_hora', '').replace('Z', '+00:00'))
-                    data_hora = dt.strftime('%d/%m %H:%M')
-                except:
-                    data_hora = '-'
-                
-                categoria = lanc.get('categoria', '-').capitalize()
-                descricao = lanc.get('descricao') or 'Sem descrição'
-                if len(descricao) > 40:
-                    descricao = descricao[:37] + '...'
-                
-                valor = lanc.get('valor', 0)
-                total_despesas += valor
-                
-                lanc_data.append([
-                    data_hora,
-                    categoria,
-                    descricao,
-                    formatar_moeda(valor)
-                ])
-            
-            lanc_data.append(['', '', 'TOTAL SAÍDAS', formatar_moeda(total_despesas)])
-            
-            tabela_lanc = Table(lanc_data, colWidths=[70, 80, 230, 70])
-            tabela_lanc.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#c01c28')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('ALIGN', (3, 1), (3, -1), 'RIGHT'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                ('TOPPADDING', (0, 0), (-1, 0), 8),
-                ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-                ('TOPPADDING', (0, 1), (-1, -1), 4),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.HexColor('#fce4e4')]),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#c01c28')),
-                ('TEXTCOLOR', (0, -1), (-1, -1), colors.white),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ]))
-            elements.append(tabela_lanc)
+        elements += secao_lancamentos('vendas', vendas, MODELO_PERIODO, BLOCO_LINHAS)
+        elements += secao_lancamentos('despesas', despesas, MODELO_PERIODO, BLOCO_LINHAS)
+        elements += secao_lancamentos('suprimentos', suprimentos, MODELO_PERIODO, BLOCO_LINHAS)
+    elif por_dia:
+        elements.append(Spacer(1, 20))
+        elements.append(Paragraph("📝 Lançamentos por Dia", subtitulo_style))
+        if quantidade:
+            elements.append(Paragraph(f"{quantidade} lançamentos no período, agrupados por dia", info_style))
         
-        # SUPRIMENTOS
-        if suprimentos:
-            elements.append(Spacer(1, 15))
-            elements.append(Paragraph("💵 SUPRIMENTOS DO PERÍODO", ParagraphStyle('SuprimentosTitulo', parent=subtitulo_style, fontSize=12, textColor=colors.HexColor('#1a5fb4'))))
-            
-            lanc_data = [['Data/Hora', 'Descrição', 'Valor']]
-            total_suprimentos = 0
-            
-            for lanc in suprimentos:
-                data_hora = ''
-                try:
-                    dt = datetime.fromisoformat(lanc.get('data_hora', '').replace('Z', '+00:00'))
-                    data_hora = dt.strftime('%d/%m %H:%M')
-                except:
-                    data_hora = '-'
-                
-                descricao = lanc.get('descricao') or 'Suprimento'
-                if len(descricao) > 50:
-                    descricao = descricao[:47] + '...'
-                
-                valor = lanc.get('valor', 0)
-                total_suprimentos += valor
-                
-                lanc_data.append([
-                    data_hora,
-                    descricao,
-                    formatar_moeda(valor)
-                ])
-            
-            lanc_data.append(['', 'TOTAL SUPRIMENTOS', formatar_moeda(total_suprimentos)])
-            
-            tabela_lanc = Table(lanc_data, colWidths=[70, 310, 70])
-            tabela_lanc.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1a5fb4')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('ALIGN', (2, 1), (2, -1), 'RIGHT'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                ('TOPPADDING', (0, 0), (-1, 0), 8),
-                ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-                ('TOPPADDING', (0, 1), (-1, -1), 4),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.HexColor('#e8eaf6')]),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#1a5fb4')),
-                ('TEXTCOLOR', (0, -1), (-1, -1), colors.white),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ]))
-            elements.append(tabela_lanc)
+        for chave in ('vendas', 'despesas', 'suprimentos'):
+            elements += secao_por_dia(chave, por_dia.get(chave), MODELO_PERIODO, BLOCO_LINHAS)
+    elif quantidade:
+        elements.append(Spacer(1, 20))
+        elements.append(Paragraph(
+            f"{quantidade} lançamentos no período: relação detalhada omitida, gere períodos menores para vê-la",
+            info_style
+        ))
     
     # Rodapé
     elements.append(Spacer(1, 30))
@@ -764,56 +363,19 @@ def gerar_relatorio_periodo_pdf(dados_relatorio, nome_loja='Minha Loja'):
     return buffer
 
 
-def gerar_resumo_diario_pdf(data_resumo, nome_loja='Minha Loja'):
+def gerar_resumo_diario_pdf(data_resumo, nome_loja='Minha Loja', destino=None):
     """
     Gera PDF com resumo diário
+    destino: arquivo binário onde gravar o PDF (padrão: BytesIO)
     """
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        rightMargin=2*cm,
-        leftMargin=2*cm,
-        topMargin=2*cm,
-        bottomMargin=2*cm
-    )
+    buffer = destino if destino is not None else BytesIO()
+    doc = _documento_a4(buffer)
     
-    styles = getSampleStyleSheet()
-    
-    titulo_style = ParagraphStyle(
-        'Titulo',
-        parent=styles['Heading1'],
-        fontSize=20,
-        alignment=TA_CENTER,
-        spaceAfter=20,
-        textColor=colors.HexColor('#1a5fb4')
-    )
-    
-    subtitulo_style = ParagraphStyle(
-        'Subtitulo',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceBefore=15,
-        spaceAfter=10,
-        textColor=colors.HexColor('#333333')
-    )
-    
-    destaque_style = ParagraphStyle(
-        'Destaque',
-        parent=styles['Normal'],
-        fontSize=24,
-        alignment=TA_CENTER,
-        textColor=colors.HexColor('#26a269'),
-        fontName='Helvetica-Bold'
-    )
-    
-    info_style = ParagraphStyle(
-        'Info',
-        parent=styles['Normal'],
-        fontSize=10,
-        alignment=TA_CENTER,
-        textColor=colors.grey
-    )
+    estilo = estilos()
+    titulo_style = estilo['titulo_destaque']
+    subtitulo_style = estilo['subtitulo']
+    destaque_style = estilo['destaque']
+    info_style = estilo['info']
     
     elements = []
     
@@ -831,7 +393,7 @@ def gerar_resumo_diario_pdf(data_resumo, nome_loja='Minha Loja'):
     # Total de Vendas em Destaque
     total_vendas = data_resumo.get('total_vendas', 0)
     elements.append(Paragraph("💰 TOTAL DE VENDAS", subtitulo_style))
-    elements.append(Paragraph(formatar_moeda(total_vendas), destaque_style))
+    elements.append(Paragraph(formatar_centavos(total_vendas), destaque_style))
     elements.append(Spacer(1, 20))
     
     # Vendas por forma de pagamento
@@ -842,22 +404,10 @@ def gerar_resumo_diario_pdf(data_resumo, nome_loja='Minha Loja'):
         vendas_data = [['Forma', 'Valor']]
         for forma, valor in vendas.items():
             if valor > 0:
-                vendas_data.append([forma.replace('_', ' ').title(), formatar_moeda(valor)])
+                vendas_data.append([forma.replace('_', ' ').title(), formatar_centavos(valor)])
         
         if len(vendas_data) > 1:
-            tabela_vendas = Table(vendas_data, colWidths=[200, 200])
-            tabela_vendas.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#26a269')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 11),
-                ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-                ('TOPPADDING', (0, 0), (-1, 0), 10),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#e8f5e9')]),
-            ]))
-            elements.append(tabela_vendas)
+            elements.append(tabela(vendas_data, (200, 200), estilo_tabela('#26a269', '#e8f5e9', tamanho=11)))
     
     elements.append(Spacer(1, 20))
     
@@ -867,22 +417,11 @@ def gerar_resumo_diario_pdf(data_resumo, nome_loja='Minha Loja'):
     
     mov_data = [
         ['Descrição', 'Valor'],
-        ['Sangrias', formatar_moeda(movimentacoes.get('sangrias', 0))],
-        ['Suprimentos', formatar_moeda(movimentacoes.get('suprimentos', 0))],
+        ['Sangrias', formatar_centavos(movimentacoes.get('sangrias', 0))],
+        ['Suprimentos', formatar_centavos(movimentacoes.get('suprimentos', 0))],
     ]
     
-    tabela_mov = Table(mov_data, colWidths=[200, 200])
-    tabela_mov.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#ff7043')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-        ('TOPPADDING', (0, 0), (-1, 0), 10),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-    ]))
-    elements.append(tabela_mov)
+    elements.append(tabela(mov_data, (200, 200), estilo_tabela('#ff7043', tamanho=11)))
     
     # Lista de Lançamentos Detalhada
     lancamentos = data_resumo.get('lancamentos', [])
@@ -895,165 +434,9 @@ def gerar_resumo_diario_pdf(data_resumo, nome_loja='Minha Loja'):
         despesas = [l for l in lancamentos if l.get('tipo') == 'saida' and not l.get('estornado')]
         suprimentos = [l for l in lancamentos if l.get('categoria') == 'suprimento' and not l.get('estornado')]
         
-        # VENDAS
-        if vendas:
-            elements.append(Spacer(1, 10))
-            elements.append(Paragraph("💰 VENDAS DO DIA", ParagraphStyle('VendasTitulo', parent=subtitulo_style, fontSize=12, textColor=colors.HexColor('#26a269'))))
-            
-            lanc_data = [['Hora', 'Forma Pag.', 'Descrição', 'Valor']]
-            total_vendas_lista = 0
-            
-            for lanc in vendas:
-                hora = ''
-                try:
-                    dt = datetime.fromisoformat(lanc.get('data_hora', '').replace('Z', '+00:00'))
-                    hora = dt.strftime('%H:%M')
-                except:
-                    hora = '-'
-                
-                forma_pag = lanc.get('forma_pagamento') or 'Não informado'
-                descricao = lanc.get('descricao') or 'Venda'
-                if len(descricao) > 35:
-                    descricao = descricao[:32] + '...'
-                
-                valor = lanc.get('valor', 0)
-                total_vendas_lista += valor
-                
-                lanc_data.append([
-                    hora,
-                    forma_pag,
-                    descricao,
-                    formatar_moeda(valor)
-                ])
-            
-            lanc_data.append(['', '', 'TOTAL VENDAS', formatar_moeda(total_vendas_lista)])
-            
-            tabela_lanc = Table(lanc_data, colWidths=[50, 100, 220, 80])
-            tabela_lanc.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#26a269')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('ALIGN', (3, 1), (3, -1), 'RIGHT'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                ('TOPPADDING', (0, 0), (-1, 0), 8),
-                ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-                ('TOPPADDING', (0, 1), (-1, -1), 4),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.HexColor('#e8f5e9')]),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#26a269')),
-                ('TEXTCOLOR', (0, -1), (-1, -1), colors.white),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ]))
-            elements.append(tabela_lanc)
-        
-        # DESPESAS/SAÍDAS
-        if despesas:
-            elements.append(Spacer(1, 15))
-            elements.append(Paragraph("💸 DESPESAS E SAÍDAS", ParagraphStyle('DespesasTitulo', parent=subtitulo_style, fontSize=12, textColor=colors.HexColor('#c01c28'))))
-            
-            lanc_data = [['Hora', 'Categoria', 'Descrição', 'Valor']]
-            total_despesas = 0
-            
-            for lanc in despesas:
-                hora = ''
-                try:
-                    dt = datetime.fromisoformat(lanc.get('data_hora', '').replace('Z', '+00:00'))
-                    hora = dt.strftime('%H:%M')
-                except:
-                    hora = '-'
-                
-                categoria = lanc.get('categoria', '-').capitalize()
-                descricao = lanc.get('descricao') or 'Sem descrição'
-                if len(descricao) > 35:
-                    descricao = descricao[:32] + '...'
-                
-                valor = lanc.get('valor', 0)
-                total_despesas += valor
-                
-                lanc_data.append([
-                    hora,
-                    categoria,
-                    descricao,
-                    formatar_moeda(valor)
-                ])
-            
-            lanc_data.append(['', '', 'TOTAL SAÍDAS', formatar_moeda(total_despesas)])
-            
-            tabela_lanc = Table(lanc_data, colWidths=[50, 80, 240, 80])
-            tabela_lanc.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#c01c28')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('ALIGN', (3, 1), (3, -1), 'RIGHT'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                ('TOPPADDING', (0, 0), (-1, 0), 8),
-                ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-                ('TOPPADDING', (0, 1), (-1, -1), 4),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.HexColor('#fce4e4')]),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#c01c28')),
-                ('TEXTCOLOR', (0, -1), (-1, -1), colors.white),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ]))
-            elements.append(tabela_lanc)
-        
-        # SUPRIMENTOS
-        if suprimentos:
-            elements.append(Spacer(1, 15))
-            elements.append(Paragraph("💵 SUPRIMENTOS", ParagraphStyle('SuprimentosTitulo', parent=subtitulo_style, fontSize=12, textColor=colors.HexColor('#1a5fb4'))))
-            
-            lanc_data = [['Hora', 'Descrição', 'Valor']]
-            total_suprimentos = 0
-            
-            for lanc in suprimentos:
-                hora = ''
-                try:
-                    dt = datetime.fromisoformat(lanc.get('data_hora', '').replace('Z', '+00:00'))
-                    hora = dt.strftime('%H:%M')
-                except:
-                    hora = '-'
-                
-                descricao = lanc.get('descricao') or 'Suprimento'
-                if len(descricao) > 50:
-                    descricao = descricao[:47] + '...'
-                
-                valor = lanc.get('valor', 0)
-                total_suprimentos += valor
-                
-                lanc_data.append([
-                    hora,
-                    descricao,
-                    formatar_moeda(valor)
-                ])
-            
-            lanc_data.append(['', 'TOTAL SUPRIMENTOS', formatar_moeda(total_suprimentos)])
-            
-            tabela_lanc = Table(lanc_data, colWidths=[50, 320, 80])
-            tabela_lanc.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1a5fb4')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('ALIGN', (2, 1), (2, -1), 'RIGHT'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                ('TOPPADDING', (0, 0), (-1, 0), 8),
-                ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-                ('TOPPADDING', (0, 1), (-1, -1), 4),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.HexColor('#e8eaf6')]),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#1a5fb4')),
-                ('TEXTCOLOR', (0, -1), (-1, -1), colors.white),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ]))
-            elements.append(tabela_lanc)
+        elements += secao_lancamentos('vendas', vendas, MODELO_DIARIO)
+        elements += secao_lancamentos('despesas', despesas, MODELO_DIARIO)
+        elements += secao_lancamentos('suprimentos', suprimentos, MODELO_DIARIO)
     
     # Rodapé
     elements.append(Spacer(1, 30))
@@ -1071,12 +454,18 @@ def gerar_resumo_diario_pdf(data_resumo, nome_loja='Minha Loja'):
     return buffer
 
 
-def gerar_cupom_termico_caixa(caixa_data, lancamentos, nome_loja='Minha Loja'):
+def gerar_cupom_termico_caixa(caixa_data, lancamentos, nome_loja='Minha Loja', resumo=None, destino=None):
     """
     Gera cupom térmico para impressora 80mm (Elgin I9 e similares)
     Papel: 80mm largura = aproximadamente 72mm área útil
+    
+    O conteúdo vem de cupom_termico.linhas_cupom(), o mesmo do cupom em
+    texto e ESC/POS; linhas de duas colunas seguidas viram uma tabela.
+    resumo: resultado de agregacao.resumir() para o caixa; se omitido,
+    os totais são calculados a partir da lista de lançamentos.
+    destino: arquivo binário onde gravar o PDF (padrão: BytesIO)
     """
-    buffer = BytesIO()
+    buffer = destino if destino is not None else BytesIO()
     
     # Tamanho do papel: 80mm largura (72mm área de impressão)
     # Altura dinâmica baseada no conteúdo
@@ -1093,320 +482,45 @@ def gerar_cupom_termico_caixa(caixa_data, lancamentos, nome_loja='Minha Loja'):
     )
     
     largura_util = largura_papel - 4*mm  # Descontando margens
+    larguras = (largura_util * 0.7, largura_util * 0.3)
     
     # Estilos otimizados para cupom térmico
-    styles = getSampleStyleSheet()
-    
-    titulo_style = ParagraphStyle(
-        'TituloTermico',
-        parent=styles['Normal'],
-        fontSize=11,
-        alignment=TA_CENTER,
-        spaceAfter=2*mm,
-        fontName='Helvetica-Bold'
-    )
-    
-    subtitulo_style = ParagraphStyle(
-        'SubtituloTermico',
-        parent=styles['Normal'],
-        fontSize=9,
-        alignment=TA_CENTER,
-        spaceAfter=1*mm,
-        fontName='Helvetica-Bold'
-    )
-    
-    normal_style = ParagraphStyle(
-        'NormalTermico',
-        parent=styles['Normal'],
-        fontSize=7,
-        alignment=TA_LEFT,
-        spaceAfter=0.5*mm,
-        fontName='Helvetica'
-    )
-    
-    central_style = ParagraphStyle(
-        'CentralTermico',
-        parent=styles['Normal'],
-        fontSize=7,
-        alignment=TA_CENTER,
-        spaceAfter=0.5*mm,
-        fontName='Helvetica'
-    )
-    
-    valor_style = ParagraphStyle(
-        'ValorTermico',
-        parent=styles['Normal'],
-        fontSize=10,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold',
-        spaceAfter=1*mm
-    )
+    estilo = estilos()
+    por_estilo = {
+        'titulo': estilo['termico_titulo'],
+        'subtitulo': estilo['termico_subtitulo'],
+        'valor': estilo['termico_valor'],
+        'central': estilo['termico_central'],
+        'destaque': estilo['termico_central'],
+        'item': estilo['termico_item'],
+    }
     
     elements = []
-    
-    # Linha divisória
-    def linha_divisoria():
-        return Paragraph("-" * 48, central_style)
-    
-    # Cabeçalho
-    elements.append(Paragraph(nome_loja.upper(), titulo_style))
-    elements.append(Paragraph("FECHAMENTO DE CAIXA", subtitulo_style))
-    elements.append(linha_divisoria())
-    
-    # Informações do caixa
-    status_texto = "ABERTO" if caixa_data.get('status') == 'aberto' else "FECHADO"
-    elements.append(Paragraph(f"<b>Caixa #{caixa_data.get('id', '-')}</b> - {status_texto}", central_style))
-    
-    if caixa_data.get('operador'):
-        elements.append(Paragraph(f"Operador: {caixa_data.get('operador')}", central_style))
-    
-    elements.append(Paragraph(f"Abertura: {formatar_data(caixa_data.get('data_abertura'))}", central_style))
-    
-    if caixa_data.get('data_fechamento'):
-        elements.append(Paragraph(f"Fechamento: {formatar_data(caixa_data.get('data_fechamento'))}", central_style))
-    
-    elements.append(linha_divisoria())
-    
-    # Resumo financeiro
-    elements.append(Paragraph("RESUMO", subtitulo_style))
-    
-    troco_inicial = caixa_data.get('troco_inicial', 0)
-    total_entradas = caixa_data.get('total_entradas', 0)
-    total_saidas = caixa_data.get('total_saidas', 0)
-    saldo_atual = caixa_data.get('saldo_atual', 0)
-    
-    resumo_data = [
-        ['Troco Inicial:', formatar_moeda(troco_inicial)],
-        ['(+) Entradas:', formatar_moeda(total_entradas)],
-        ['(-) Saídas:', formatar_moeda(total_saidas)],
-    ]
-    
-    col_width = largura_util / 2
-    tabela_resumo = Table(resumo_data, colWidths=[col_width, col_width])
-    tabela_resumo.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 7),
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
-        ('TOPPADDING', (0, 0), (-1, -1), 1),
-    ]))
-    elements.append(tabela_resumo)
-    
-    elements.append(Spacer(1, 2*mm))
-    elements.append(Paragraph("SALDO FINAL", subtitulo_style))
-    elements.append(Paragraph(formatar_moeda(saldo_atual), valor_style))
-    
-    # Saldo em dinheiro (usar do caixa_data se disponível, senão calcular)
-    saldo_dinheiro = caixa_data.get('saldo_dinheiro')
-    
-    if saldo_dinheiro is None:
-        # Calcular se não estiver disponível (para retrocompatibilidade)
-        vendas_dinheiro = 0
-        sangrias_total = 0
-        suprimentos_total = 0
-        despesas_dinheiro = 0
-        
-        for lanc in lancamentos:
-            if lanc.get('categoria') == 'venda' and lanc.get('tipo') == 'entrada':
-                if lanc.get('forma_pagamento') == 'Dinheiro':
-                    vendas_dinheiro += lanc.get('valor', 0)
-            elif lanc.get('categoria') == 'sangria' and lanc.get('tipo') == 'saida':
-                sangrias_total += lanc.get('valor', 0)
-            elif lanc.get('categoria') == 'suprimento' and lanc.get('tipo') == 'entrada':
-                suprimentos_total += lanc.get('valor', 0)
-            elif lanc.get('categoria') not in ['venda', 'sangria', 'suprimento'] and lanc.get('tipo') == 'saida':
-                if lanc.get('forma_pagamento') == 'Dinheiro' or not lanc.get('forma_pagamento'):
-                    despesas_dinheiro += lanc.get('valor', 0)
-        
-        saldo_dinheiro = troco_inicial + vendas_dinheiro + suprimentos_total - sangrias_total - despesas_dinheiro
-    
-    elements.append(Spacer(1, 1*mm))
-    elements.append(Paragraph("SALDO EM DINHEIRO", subtitulo_style))
-    elements.append(Paragraph(formatar_moeda(saldo_dinheiro), valor_style))
-    
-    # Diferença (se houver)
-    if caixa_data.get('valor_contado') is not None:
-        elements.append(linha_divisoria())
-        valor_contado = caixa_data.get('valor_contado', 0)
-        diferenca = caixa_data.get('diferenca', 0)
-        
-        elements.append(Paragraph(f"Valor Contado: {formatar_moeda(valor_contado)}", central_style))
-        
-        if abs(diferenca) < 0.01:
-            elements.append(Paragraph("Diferença: CONFERIDO", central_style))
-        elif diferenca > 0:
-            elements.append(Paragraph(f"Diferença: +{formatar_moeda(diferenca)} (SOBRA)", central_style))
+    pares = []  # linhas de duas colunas ainda não desenhadas
+    
+    def desenhar_pares():
+        if pares:
+            com_total = pares[-1][0] == 'destaque'
+            dados = [list(par) for _, par in pares]
+            elements.append(tabela(dados, larguras, estilo_tabela_termica(com_total=com_total)))
+            pares.clear()
+    
+    for tipo, texto in linhas_cupom(caixa_data, lancamentos, nome_loja, resumo):
+        if isinstance(texto, tuple):
+            pares.append((tipo, texto))
+            continue
+        desenhar_pares()
+        
+        if tipo is None:
+            elements.append(Paragraph(texto, por_estilo['central']))
+        elif not texto:
+            elements.append(Spacer(1, 2*mm))
+        elif tipo == 'destaque':
+            elements.append(Paragraph(f"<b>{escape(texto)}</b>", por_estilo[tipo]))
         else:
-            elements.append(Paragraph(f"Diferença: {formatar_moeda(diferenca)} (FALTA)", central_style))
-    
-    elements.append(linha_divisoria())
-    
-    # Vendas por forma de pagamento
-    vendas_por_forma = {}
-    total_vendas = 0
-    for lanc in lancamentos:
-        if lanc.get('categoria') == 'venda' and lanc.get('tipo') == 'entrada':
-            forma = lanc.get('forma_pagamento') or 'N/I'
-            valor = lanc.get('valor', 0)
-            vendas_por_forma[forma] = vendas_por_forma.get(forma, 0) + valor
-            total_vendas += valor
-    
-    if vendas_por_forma:
-        elements.append(Paragraph("VENDAS POR PAGAMENTO", subtitulo_style))
-        
-        formas_data = []
-        for forma in sorted(vendas_por_forma.keys()):
-            formas_data.append([forma, formatar_moeda(vendas_por_forma[forma])])
-        formas_data.append(['TOTAL VENDAS', formatar_moeda(total_vendas)])
-        
-        tabela_formas = Table(formas_data, colWidths=[col_width, col_width])
-        tabela_formas.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -2), 'Helvetica'),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 7),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
-            ('TOPPADDING', (0, 0), (-1, -1), 1),
-            ('LINEABOVE', (0, -1), (-1, -1), 0.5, colors.black),
-        ]))
-        elements.append(tabela_formas)
-        elements.append(linha_divisoria())
-    
-    # Contagem de lançamentos
-    qtd_vendas = len([l for l in lancamentos if l.get('categoria') == 'venda'])
-    qtd_sangrias = len([l for l in lancamentos if l.get('categoria') == 'sangria'])
-    qtd_suprimentos = len([l for l in lancamentos if l.get('categoria') == 'suprimento'])
-    
-    elements.append(Paragraph("MOVIMENTO", subtitulo_style))
-    elements.append(Paragraph(f"Vendas: {qtd_vendas} | Sangrias: {qtd_sangrias} | Suprimentos: {qtd_suprimentos}", central_style))
-    
-    elements.append(linha_divisoria())
-    
-    # ===== LANÇAMENTOS DETALHADOS =====
-    if lancamentos:
-        # Separar por categoria
-        vendas = [l for l in lancamentos if l.get('categoria') == 'venda']
-        sangrias = [l for l in lancamentos if l.get('categoria') == 'sangria']
-        suprimentos = [l for l in lancamentos if l.get('categoria') == 'suprimento']
-        outros = [l for l in lancamentos if l.get('categoria') not in ['venda', 'sangria', 'suprimento']]
-        
-        item_style = ParagraphStyle(
-            'ItemTermico',
-            parent=styles['Normal'],
-            fontSize=6,
-            alignment=TA_LEFT,
-            spaceAfter=0.3*mm,
-            fontName='Helvetica'
-        )
-        
-        # VENDAS
-        if vendas:
-            elements.append(Paragraph("VENDAS", subtitulo_style))
-            
-            for lanc in vendas:
-                hora = ''
-                try:
-                    dt = datetime.fromisoformat(lanc.get('data_hora', '').replace('Z', '+00:00'))
-                    hora = dt.strftime('%H:%M')
-                except:
-                    hora = '--:--'
-                
-                forma = lanc.get('forma_pagamento') or 'N/I'
-                valor = formatar_moeda(lanc.get('valor', 0))
-                descricao = lanc.get('descricao') or ''
-                
-                # Linha principal: hora, forma e valor
-                elements.append(Paragraph(f"{hora} {forma[:12]:<12} {valor}", item_style))
-                
-                # Descrição em linha separada se existir
-                if descricao:
-                    desc_curta = descricao[:35] + '...' if len(descricao) > 35 else descricao
-                    elements.append(Paragraph(f"  {desc_curta}", item_style))
-            
-            elements.append(linha_divisoria())
-        
-        # SANGRIAS
-        if sangrias:
-            elements.append(Paragraph("SANGRIAS", subtitulo_style))
-            
-            total_sangrias = 0
-            for lanc in sangrias:
-                hora = ''
-                try:
-                    dt = datetime.fromisoformat(lanc.get('data_hora', '').replace('Z', '+00:00'))
-                    hora = dt.strftime('%H:%M')
-                except:
-                    hora = '--:--'
-                
-                valor = lanc.get('valor', 0)
-                total_sangrias += valor
-                descricao = lanc.get('descricao') or 'Sangria'
-                desc_curta = descricao[:25] + '...' if len(descricao) > 25 else descricao
-                
-                elements.append(Paragraph(f"{hora} {desc_curta:<25} -{formatar_moeda(valor)}", item_style))
-            
-            elements.append(Paragraph(f"<b>TOTAL SANGRIAS: {formatar_moeda(total_sangrias)}</b>", central_style))
-            elements.append(linha_divisoria())
-        
-        # SUPRIMENTOS
-        if suprimentos:
-            elements.append(Paragraph("SUPRIMENTOS", subtitulo_style))
-            
-            total_suprimentos = 0
-            for lanc in suprimentos:
-                hora = ''
-                try:
-                    dt = datetime.fromisoformat(lanc.get('data_hora', '').replace('Z', '+00:00'))
-                    hora = dt.strftime('%H:%M')
-                except:
-                    hora = '--:--'
-                
-                valor = lanc.get('valor', 0)
-                total_suprimentos += valor
-                descricao = lanc.get('descricao') or 'Suprimento'
-                desc_curta = descricao[:25] + '...' if len(descricao) > 25 else descricao
-                
-                elements.append(Paragraph(f"{hora} {desc_curta:<25} +{formatar_moeda(valor)}", item_style))
-            
-            elements.append(Paragraph(f"<b>TOTAL SUPRIMENTOS: {formatar_moeda(total_suprimentos)}</b>", central_style))
-            elements.append(linha_divisoria())
-        
-        # OUTROS
-        if outros:
-            elements.append(Paragraph("OUTROS", subtitulo_style))
-            
-            for lanc in outros:
-                hora = ''
-                try:
-                    dt = datetime.fromisoformat(lanc.get('data_hora', '').replace('Z', '+00:00'))
-                    hora = dt.strftime('%H:%M')
-                except:
-                    hora = '--:--'
-                
-                tipo = '+' if lanc.get('tipo') == 'entrada' else '-'
-                valor = formatar_moeda(lanc.get('valor', 0))
-                categoria = lanc.get('categoria') or 'outros'
-                descricao = lanc.get('descricao') or categoria
-                desc_curta = descricao[:25] + '...' if len(descricao) > 25 else descricao
-                
-                elements.append(Paragraph(f"{hora} {desc_curta:<25} {tipo}{valor}", item_style))
-            
-            elements.append(linha_divisoria())
-    
-    # Observação (se houver)
-    if caixa_data.get('observacao'):
-        elements.append(Paragraph(f"Obs: {caixa_data.get('observacao')}", normal_style))
-        elements.append(linha_divisoria())
+            elements.append(Paragraph(escape(texto), por_estilo[tipo]))
+    desenhar_pares()
     
-    # Rodapé
-    elements.append(Spacer(1, 2*mm))
-    elements.append(Paragraph(
-        f"Impresso: {datetime.now().strftime('%d/%m/%Y %H:%M')}",
-        central_style
-    ))
-    elements.append(Paragraph("Sistema PDV", central_style))
     elements.append(Spacer(1, 5*mm))  # Espaço para corte
     
     doc.build(elements)
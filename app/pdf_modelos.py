@@ -0,0 +1,325 @@
+"""
+Modelo dos relatórios em PDF: estilos, estilos de tabela e seções
+
+Os estilos de parágrafo e de tabela são montados uma vez por processo (na
+primeira geração) e reaproveitados por todos os relatórios. As seções de
+lançamentos (vendas, despesas, suprimentos) são descritas uma vez em SECOES;
+cada relatório (MODELO_CAIXA, MODELO_PERIODO, MODELO_DIARIO) só informa
+título, cabeçalho, larguras e limite da descrição de cada seção.
+
+Os lançamentos chegam como na API (valores em reais); valores e totais são
+lidos e somados em centavos (app/dinheiro.py).
+"""
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.platypus import Paragraph, Spacer, Table, LongTable, TableStyle
+from app.dinheiro import centavos_de, formatar_centavos
+
+# Suba a cada mudança de layout: os PDFs guardados em app.cache_pdf são descartados
+VERSAO = 2
+
+
+def formatar_hora(data_hora, formato, vazio='-'):
+    """Hora (ou data/hora) de um lançamento no formato informado"""
+    try:
+        return datetime.fromisoformat(data_hora.replace('Z', '+00:00')).strftime(formato)
+    except (AttributeError, TypeError, ValueError):
+        return vazio
+
+
+def encurtar(texto, limite):
+    """Corta o texto em limite caracteres (com reticências); None = sem limite"""
+    if limite and len(texto) > limite:
+        return texto[:limite - 3] + '...'
+    return texto
+
+
+# ===== ESTILOS DE PARÁGRAFO =====
+
+def montar_estilos():
+    """Monta os estilos de parágrafo de todos os relatórios (use estilos())"""
+    base = getSampleStyleSheet()
+
+    def estilo(nome, pai, **atributos):
+        return ParagraphStyle(nome, parent=base[pai], **atributos)
+
+    return {
+        # Relatórios A4
+        'titulo': estilo('Titulo', 'Heading1', fontSize=18, alignment=TA_CENTER, spaceAfter=20,
+                         textColor=colors.HexColor('#1a5fb4')),
+        'titulo_destaque': estilo('Titulo', 'Heading1', fontSize=20, alignment=TA_CENTER, spaceAfter=20,
+                                  textColor=colors.HexColor('#1a5fb4')),
+        'subtitulo': estilo('Subtitulo', 'Heading2', fontSize=14, spaceBefore=15, spaceAfter=10,
+                            textColor=colors.HexColor('#333333')),
+        'info': estilo('Info', 'Normal', fontSize=10, alignment=TA_CENTER, textColor=colors.grey),
+        'destaque': estilo('Destaque', 'Normal', fontSize=24, alignment=TA_CENTER,
+                           textColor=colors.HexColor('#26a269'), fontName='Helvetica-Bold'),
+
+        # Cupom térmico
+        'termico_titulo': estilo('TituloTermico', 'Normal', fontSize=11, alignment=TA_CENTER,
+                                 spaceAfter=2*mm, fontName='Helvetica-Bold'),
+        'termico_subtitulo': estilo('SubtituloTermico', 'Normal', fontSize=9, alignment=TA_CENTER,
+                                    spaceAfter=1*mm, fontName='Helvetica-Bold'),
+        'termico_normal': estilo('NormalTermico', 'Normal', fontSize=7, alignment=TA_LEFT,
+                                 spaceAfter=0.5*mm, fontName='Helvetica'),
+        'termico_central': estilo('CentralTermico', 'Normal', fontSize=7, alignment=TA_CENTER,
+                                  spaceAfter=0.5*mm, fontName='Helvetica'),
+        'termico_valor': estilo('ValorTermico', 'Normal', fontSize=10, alignment=TA_CENTER,
+                                fontName='Helvetica-Bold', spaceAfter=1*mm),
+        'termico_item': estilo('ItemTermico', 'Normal', fontSize=6, alignment=TA_LEFT,
+                               spaceAfter=0.3*mm, fontName='Helvetica'),
+    }
+
+
+@lru_cache(maxsize=None)
+def estilos():
+    """Estilos de parágrafo, montados na primeira chamada"""
+    return montar_estilos()
+
+
+@lru_cache(maxsize=None)
+def estilo_titulo_secao(cor):
+    """Título de seção de lançamentos (subtítulo menor, na cor da seção)"""
+    return ParagraphStyle('TituloSecao', parent=estilos()['subtitulo'], fontSize=12, textColor=colors.HexColor(cor))
+
+
+# ===== ESTILOS DE TABELA =====
+
+ALINHAR_VALORES = ((1, 1), (-1, -1), 'RIGHT')
+
+
+@lru_cache(maxsize=None)
+def estilo_tabela(cor, fundo=None, tamanho=10, alinhamento=ALINHAR_VALORES, linha_destaque=None, cor_destaque=None):
+    """
+    Tabela de resumo: cabeçalho na cor informada, linhas alternando com
+    fundo e, opcionalmente, uma linha em destaque (ex.: -1 para o total)
+    """
+    comandos = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(cor)),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), tamanho),
+        ('ALIGN', *alinhamento),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+        ('TOPPADDING', (0, 0), (-1, 0), 10),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ]
+    if fundo:
+        ultima = -2 if linha_destaque == -1 else -1
+        comandos.append(('ROWBACKGROUNDS', (0, 1), (-1, ultima), [colors.white, colors.HexColor(fundo)]))
+    if linha_destaque is not None:
+        linha = ((0, linha_destaque), (-1, linha_destaque))
+        comandos += [
+            ('BACKGROUND', *linha, colors.HexColor(cor_destaque)),
+            ('TEXTCOLOR', *linha, colors.white),
+            ('FONTNAME', *linha, 'Helvetica-Bold'),
+            ('FONTSIZE', *linha, 11),
+        ]
+    return TableStyle(comandos)
+
+
+@lru_cache(maxsize=None)
+def estilo_tabela_detalhe(cor, fundo, coluna_valor, padding, tamanho_total=None, com_total=True):
+    """Tabela de lançamentos de uma seção, com a linha de total na cor da seção"""
+    fim = -2 if com_total else -1
+    comandos = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(cor)),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 9),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+        ('ALIGN', (coluna_valor, 1), (coluna_valor, -1), 'RIGHT'),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ('TOPPADDING', (0, 0), (-1, 0), 8),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), padding),
+        ('TOPPADDING', (0, 1), (-1, -1), padding),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, fim), [colors.white, colors.HexColor(fundo)]),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ]
+    if com_total:
+        comandos += [
+            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor(cor)),
+            ('TEXTCOLOR', (0, -1), (-1, -1), colors.white),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ]
+    if com_total and tamanho_total:
+        comandos.append(('FONTSIZE', (0, -1), (-1, -1), tamanho_total))
+    return TableStyle(comandos)
+
+
+@lru_cache(maxsize=None)
+def estilo_tabela_termica(com_total=False):
+    """Tabela de duas colunas do cupom (rótulo à esquerda, valor à direita)"""
+    if com_total:
+        comandos = [
+            ('FONTNAME', (0, 0), (-1, -2), 'Helvetica'),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ]
+    else:
+        comandos = [('FONTNAME', (0, 0), (-1, -1), 'Helvetica')]
+    comandos += [
+        ('FONTSIZE', (0, 0), (-1, -1), 7),
+        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
+        ('TOPPADDING', (0, 0), (-1, -1), 1),
+    ]
+    if com_total:
+        comandos.append(('LINEABOVE', (0, -1), (-1, -1), 0.5, colors.black))
+    return TableStyle(comandos)
+
+
+def tabela(dados, larguras, estilo):
+    """Table com colWidths e estilo já montado"""
+    resultado = Table(dados, colWidths=list(larguras))
+    resultado.setStyle(estilo)
+    return resultado
+
+
+# ===== SEÇÕES DE LANÇAMENTOS =====
+
+# campos: colunas da tabela (hora, forma, categoria, descricao, valor)
+# padrao: descrição de lançamentos sem descrição; espaco: Spacer antes do título
+Secao = namedtuple('Secao', 'cor fundo campos padrao total espaco')
+
+SECOES = {
+    'vendas': Secao('#26a269', '#e8f5e9', ('hora', 'forma', 'descricao', 'valor'), 'Venda', 'TOTAL VENDAS', 10),
+    'despesas': Secao('#c01c28', '#fce4e4', ('hora', 'categoria', 'descricao', 'valor'), 'Sem descrição', 'TOTAL SAÍDAS', 15),
+    'suprimentos': Secao('#1a5fb4', '#e8eaf6', ('hora', 'descricao', 'valor'), 'Suprimento', 'TOTAL SUPRIMENTOS', 15),
+}
+
+# Como um relatório mostra uma seção; limite: tamanho máximo da descrição
+Detalhe = namedtuple('Detalhe', 'titulo cabecalho larguras limite')
+
+# formato_hora, padding e tamanho da linha de total de cada relatório
+Modelo = namedtuple('Modelo', 'formato_hora padding tamanho_total troco secoes')
+
+MODELO_CAIXA = Modelo('%H:%M', 5, 10, True, {
+    'vendas': Detalhe('💰 VENDAS', ('Hora', 'Forma Pagamento', 'Descrição', 'Valor'), (50, 110, 240, 80), None),
+    'despesas': Detalhe('💸 DESPESAS E SAÍDAS', ('Hora', 'Categoria', 'Descrição/Motivo', 'Valor'), (50, 80, 270, 80), None),
+    'suprimentos': Detalhe('💵 SUPRIMENTOS', ('Hora', 'Descrição/Motivo', 'Valor'), (50, 350, 80), None),
+})
+
+MODELO_PERIODO = Modelo('%d/%m %H:%M', 4, None, False, {
+    'vendas': Detalhe('💰 VENDAS DO PERÍODO', ('Data/Hora', 'Forma Pag.', 'Descrição', 'Valor'), (70, 100, 210, 70), 40),
+    'despesas': Detalhe('💸 DESPESAS E SAÍDAS DO PERÍODO', ('Data/Hora', 'Categoria', 'Descrição', 'Valor'), (70, 80, 230, 70), 40),
+    'suprimentos': Detalhe('💵 SUPRIMENTOS DO PERÍODO', ('Data/Hora', 'Descrição', 'Valor'), (70, 310, 70), 50),
+})
+
+MODELO_DIARIO = Modelo('%H:%M', 4, None, False, {
+    'vendas': Detalhe('💰 VENDAS DO DIA', ('Hora', 'Forma Pag.', 'Descrição', 'Valor'), (50, 100, 220, 80), 35),
+    'despesas': Detalhe('💸 DESPESAS E SAÍDAS', ('Hora', 'Categoria', 'Descrição', 'Valor'), (50, 80, 240, 80), 35),
+    'suprimentos': Detalhe('💵 SUPRIMENTOS', ('Hora', 'Descrição', 'Valor'), (50, 320, 80), 50),
+})
+
+
+# Seções agrupadas por dia (relatório por período grande)
+CABECALHO_POR_DIA = ('Data', 'Lançamentos', 'Total')
+LARGURAS_POR_DIA = (150, 150, 150)
+
+
+def _celula(campo, lanc, secao, modelo, limite):
+    if campo == 'hora':
+        return formatar_hora(lanc.get('data_hora', ''), modelo.formato_hora)
+    if campo == 'forma':
+        return lanc.get('forma_pagamento') or 'Não informado'
+    if campo == 'categoria':
+        return lanc.get('categoria', '-').capitalize()
+    if campo == 'valor':
+        return formatar_centavos(centavos_de(lanc, 'valor'))
+
+    descricao = lanc.get('descricao') or secao.padrao
+    if modelo.troco and lanc.get('valor_recebido'):
+        recebido = centavos_de(lanc, 'valor_recebido')
+        troco = recebido - centavos_de(lanc, 'valor')
+        if troco > 0:
+            descricao += f" | Recebido: {formatar_centavos(recebido)} | Troco: {formatar_centavos(troco)}"
+    return encurtar(descricao, limite)
+
+
+def secao_lancamentos(chave, lancamentos, modelo, bloco=None):
+    """
+    Elementos (espaço, título e tabela com total) de uma seção; [] se vazia.
+
+    Com bloco, a tabela sai em LongTables de até bloco linhas, cada uma com
+    o cabeçalho (repetido também na quebra de página). O reportlab divide uma
+    tabela muito grande página a página, copiando o restante a cada quebra;
+    em blocos o custo fica proporcional ao número de lançamentos.
+    """
+    if not lancamentos:
+        return []
+
+    secao = SECOES[chave]
+    detalhe = modelo.secoes[chave]
+
+    linhas = []
+    total = 0
+    for lanc in lancamentos:
+        linhas.append([_celula(campo, lanc, secao, modelo, detalhe.limite) for campo in secao.campos])
+        total += centavos_de(lanc, 'valor')
+    linha_total = [''] * (len(secao.campos) - 2) + [secao.total, formatar_centavos(total)]
+
+    elementos = [
+        Spacer(1, secao.espaco),
+        Paragraph(detalhe.titulo, estilo_titulo_secao(secao.cor)),
+    ]
+    if bloco is None:
+        estilo = estilo_tabela_detalhe(
+            secao.cor, secao.fundo, len(secao.campos) - 1, modelo.padding, modelo.tamanho_total
+        )
+        elementos.append(tabela([list(detalhe.cabecalho)] + linhas + [linha_total], detalhe.larguras, estilo))
+        return elementos
+
+    elementos += _blocos(secao, detalhe.cabecalho, detalhe.larguras, linhas, linha_total, modelo, bloco)
+    return elementos
+
+
+def secao_por_dia(chave, dias, modelo, bloco=None):
+    """
+    Seção com uma linha por dia (data, quantidade e total), para períodos
+    com lançamentos demais para a relação detalhada; [] se vazia.
+    dias: [(date, quantidade, total em centavos)]
+    """
+    if not dias:
+        return []
+
+    secao = SECOES[chave]
+    detalhe = modelo.secoes[chave]
+
+    linhas = [[dia.strftime('%d/%m/%Y'), str(quantidade), formatar_centavos(valor)] for dia, quantidade, valor in dias]
+    linha_total = [
+        secao.total,
+        str(sum(quantidade for _, quantidade, _ in dias)),
+        formatar_centavos(sum(valor for _, _, valor in dias)),
+    ]
+
+    elementos = [
+        Spacer(1, secao.espaco),
+        Paragraph(f"{detalhe.titulo} (POR DIA)", estilo_titulo_secao(secao.cor)),
+    ]
+    elementos += _blocos(secao, CABECALHO_POR_DIA, LARGURAS_POR_DIA, linhas, linha_total, modelo, bloco or len(linhas))
+    return elementos
+
+
+def _blocos(secao, cabecalho, larguras, linhas, linha_total, modelo, bloco):
+    """LongTables de até bloco linhas com cabeçalho; a última leva o total"""
+    coluna_valor = len(cabecalho) - 1
+    tabelas = []
+    for inicio in range(0, len(linhas), bloco):
+        dados = [list(cabecalho)] + linhas[inicio:inicio + bloco]
+        com_total = inicio + bloco >= len(linhas)
+        if com_total:
+            dados.append(linha_total)
+
+        parte = LongTable(dados, colWidths=list(larguras), repeatRows=1)
+        parte.setStyle(estilo_tabela_detalhe(
+            secao.cor, secao.fundo, coluna_valor, modelo.padding, modelo.tamanho_total, com_total
+        ))
+        tabelas.append(parte)
+    return tabelas
@@ -0,0 +1,201 @@
+"""
+Dados e geração dos relatórios em PDF (e do cupom em ESC/POS ou texto)
+
+Usado pelas rotas síncronas (/api/relatorio/.../pdf) e pelos processos da
+fila de relatórios (app/fila_relatorios.py), que geram o mesmo PDF fora
+dos workers do gunicorn.
+"""
+from datetime import datetime
+from sqlalchemy import func, and_
+from app.models import db, Caixa, Lancamento
+from app.agregacao import resumir, secoes_por_dia
+from app.configuracao import obter_configuracao
+from app.dinheiro import para_reais
+from app.pdf_generator import (
+    gerar_relatorio_caixa_pdf, gerar_relatorio_periodo_pdf, gerar_resumo_diario_pdf,
+    gerar_cupom_termico_caixa, modo_periodo, MODOS_PERIODO
+)
+from app.cupom_termico import gerar_cupom_escpos, gerar_cupom_texto
+
+TIPOS = ('periodo', 'resumo_diario', 'caixa', 'cupom')
+
+
+def resumo_periodo(data_inicio_dt, data_fim_dt):
+    """Totais, categorias e formas de pagamento do período (uma consulta, ver app/agregacao.py)"""
+    resumo = resumir(
+        Lancamento.data_hora >= data_inicio_dt,
+        Lancamento.data_hora <= data_fim_dt
+    )
+    totais = resumo['totais']
+
+    return {
+        'totais': {
+            'entradas': para_reais(totais['entradas']),
+            'saidas': para_reais(totais['saidas']),
+            'saldo': para_reais(totais['entradas'] - totais['saidas'])
+        },
+        'categorias': [
+            {'categoria': c['categoria'], 'tipo': c['tipo'], 'total': para_reais(c['total'])}
+            for c in resumo['categorias']
+        ],
+        'pagamentos': [
+            {'forma': forma, 'total': para_reais(total)}
+            for forma, total in resumo['vendas_por_forma'].items()
+        ]
+    }
+
+
+def dados_periodo(data_inicio, data_fim, detalhe='completo'):
+    """Dados do relatório por período (datas ISO); ValueError se a data for inválida"""
+    data_inicio_dt = datetime.fromisoformat(data_inicio)
+    data_fim_dt = datetime.fromisoformat(data_fim)
+
+    # Relação completa só até o limite de lançamentos; acima, agrupada por dia ou só o resumo
+    no_periodo = and_(Lancamento.data_hora >= data_inicio_dt, Lancamento.data_hora <= data_fim_dt)
+    quantidade = db.session.query(func.count(Lancamento.id)).filter(no_periodo).scalar()
+    dias = (data_fim_dt.date() - data_inicio_dt.date()).days + 1
+    modo = modo_periodo(detalhe, quantidade, dias)
+
+    dados_relatorio = {
+        'periodo': {
+            'inicio': data_inicio,
+            'fim': data_fim
+        },
+        **resumo_periodo(data_inicio_dt, data_fim_dt),
+    }
+
+    if modo == 'completo':
+        lancamentos = Lancamento.query.filter(no_periodo).order_by(Lancamento.data_hora).all()
+        dados_relatorio['lancamentos'] = [l.to_dict() for l in lancamentos]
+    else:
+        dados_relatorio['qtd_lancamentos'] = quantidade
+    if modo == 'diario':
+        dados_relatorio['por_dia'] = secoes_por_dia(no_periodo)
+    return dados_relatorio
+
+
+def dados_resumo_diario(data_str):
+    """Dados do resumo de um dia (AAAA-MM-DD; data inválida vale hoje), valores em centavos"""
+    try:
+        data = datetime.strptime(data_str, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        data = datetime.now().date()
+
+    inicio_dia = datetime.combine(data, datetime.min.time())
+    fim_dia = datetime.combine(data, datetime.max.time())
+
+    lancamentos = Lancamento.query.filter(
+        Lancamento.data_hora >= inicio_dia,
+        Lancamento.data_hora <= fim_dia
+    ).order_by(Lancamento.data_hora).all()
+
+    resumo = resumir(
+        Lancamento.data_hora >= inicio_dia,
+        Lancamento.data_hora <= fim_dia
+    )
+    vendas = resumo['vendas']
+
+    # O resumo diário não detalha outras formas de pagamento
+    total_vendas = vendas['dinheiro'] + vendas['pix'] + vendas['cartao_credito'] + vendas['cartao_debito']
+
+    return {
+        'data': data_str,
+        'total_vendas': total_vendas,
+        'vendas': {
+            'dinheiro': vendas['dinheiro'],
+            'pix': vendas['pix'],
+            'cartao_credito': vendas['cartao_credito'],
+            'cartao_debito': vendas['cartao_debito']
+        },
+        'movimentacoes': {
+            'sangrias': resumo['movimentacoes']['sangrias'],
+            'suprimentos': resumo['movimentacoes']['suprimentos']
+        },
+        'lancamentos': [l.to_dict() for l in lancamentos]
+    }
+
+
+def gerar_pdf_caixa(tipo, caixa, nome_loja, destino=None):
+    """Relatório (tipo 'caixa') ou cupom térmico ('cupom') do caixa"""
+    lancamentos = Lancamento.query.filter_by(caixa_id=caixa.id).order_by(Lancamento.data_hora).all()
+    gerar = gerar_cupom_termico_caixa if tipo == 'cupom' else gerar_relatorio_caixa_pdf
+
+    return gerar(
+        caixa.to_dict(),
+        [l.to_dict() for l in lancamentos],
+        nome_loja,
+        resumo=resumir(Lancamento.caixa_id == caixa.id),
+        destino=destino
+    )
+
+
+def gerar_cupom_caixa(formato, caixa, nome_loja):
+    """Cupom térmico do caixa em ESC/POS (bytes, formato 'escpos') ou texto de 48 colunas (str)"""
+    lancamentos = Lancamento.query.filter_by(caixa_id=caixa.id).order_by(Lancamento.data_hora).all()
+    gerar = gerar_cupom_escpos if formato == 'escpos' else gerar_cupom_texto
+
+    return gerar(
+        caixa.to_dict(),
+        [l.to_dict() for l in lancamentos],
+        nome_loja,
+        resumo=resumir(Lancamento.caixa_id == caixa.id)
+    )
+
+
+# ===== FILA =====
+
+def validar_parametros(tipo, dados):
+    """Parâmetros de um pedido da fila; ValueError com a mensagem se inválidos"""
+    if tipo not in TIPOS:
+        raise ValueError(f"Tipo de relatório inválido (use {', '.join(TIPOS)})")
+
+    if tipo == 'periodo':
+        data_inicio, data_fim = dados.get('data_inicio'), dados.get('data_fim')
+        if not data_inicio or not data_fim:
+            raise ValueError('Período não informado')
+        try:
+            datetime.fromisoformat(data_inicio)
+            datetime.fromisoformat(data_fim)
+        except (TypeError, ValueError):
+            raise ValueError('Data inválida (use AAAA-MM-DD ou AAAA-MM-DDTHH:MM:SS)')
+        detalhe = dados.get('detalhe') or 'completo'
+        if detalhe not in MODOS_PERIODO:
+            raise ValueError(f"Detalhe inválido (use {', '.join(MODOS_PERIODO)})")
+        return {'data_inicio': data_inicio, 'data_fim': data_fim, 'detalhe': detalhe}
+
+    if tipo == 'resumo_diario':
+        data_str = dados.get('data') or datetime.now().strftime('%Y-%m-%d')
+        try:
+            datetime.strptime(data_str, '%Y-%m-%d')
+        except (TypeError, ValueError):
+            raise ValueError('Data inválida (use AAAA-MM-DD)')
+        return {'data': data_str}
+
+    try:
+        caixa_id = int(dados.get('caixa_id'))
+    except (TypeError, ValueError):
+        raise ValueError('Informe caixa_id')
+    if db.session.get(Caixa, caixa_id) is None:
+        raise ValueError('Caixa não encontrado')
+    return {'caixa_id': caixa_id}
+
+
+def gerar(tipo, parametros, destino):
+    """Grava no arquivo destino o PDF de um pedido da fila; retorna o nome para download"""
+    nome_loja = obter_configuracao().nome_loja
+
+    if tipo == 'periodo':
+        dados = dados_periodo(parametros['data_inicio'], parametros['data_fim'], parametros['detalhe'])
+        gerar_relatorio_periodo_pdf(dados, nome_loja, destino=destino)
+        return f"relatorio_{parametros['data_inicio']}_{parametros['data_fim']}.pdf"
+
+    if tipo == 'resumo_diario':
+        gerar_resumo_diario_pdf(dados_resumo_diario(parametros['data']), nome_loja, destino=destino)
+        return f"resumo_diario_{parametros['data']}.pdf"
+
+    caixa = db.session.get(Caixa, parametros['caixa_id'])
+    if caixa is None:
+        raise ValueError('Caixa não encontrado')
+    gerar_pdf_caixa(tipo, caixa, nome_loja, destino=destino)
+    prefixo = 'cupom_caixa' if tipo == 'cupom' else 'relatorio_caixa'
+    return f"{prefixo}_{caixa.id}_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
@@ -0,0 +1,171 @@
+"""
+Resumo diário consolidado (tabela resumo_diario)
+
+Cada lançamento soma sua contribuição na linha (dia, caixa) dentro da mesma
+transação em que é gravado, com as mesmas regras de resumir(). Os painéis
+do gerente (hoje, semana, calendário) leem poucas linhas desta tabela em
+vez de varrer os lançamentos. flask resumo-diario reconstruir recalcula
+tudo a partir do livro.
+"""
+from datetime import datetime
+from sqlalchemy import func
+from app.models import db, Caixa, Lancamento, Estorno, ResumoDiario, inserir_ou_somar
+from app.agregacao import CLASSES_VENDA, classificar_forma
+
+COLUNAS = [
+    coluna.name for coluna in ResumoDiario.__table__.columns
+    if coluna.name not in ('data', 'caixa_id')
+]
+
+
+def contribuicao_diaria(lancamento):
+    """Quanto um lançamento ativo (não estornado) soma em cada coluna do resumo"""
+    valor = lancamento.valor or 0
+    categoria = lancamento.categoria
+    classe = classificar_forma(lancamento.forma_pagamento)
+    valores = {}
+
+    if categoria == 'venda':
+        valores[f'vendas_{classe}'] = valor
+        valores['qtd_vendas'] = 1
+        if classe == 'dinheiro' and (lancamento.troco or 0) > 0:
+            valores['troco_dado'] = lancamento.troco
+    elif categoria == 'sangria':
+        valores['sangrias'] = valor
+        valores['qtd_sangrias'] = 1
+    elif categoria == 'suprimento':
+        valores['suprimentos'] = valor
+        valores['qtd_suprimentos'] = 1
+    elif categoria == 'outros':
+        valores['outros_entrada' if lancamento.tipo == 'entrada' else 'outros_saida'] = valor
+    elif categoria == 'estorno':
+        valores['estornos'] = valor
+        valores['qtd_estornos'] = 1
+        if classe == 'dinheiro':
+            valores['estornos_dinheiro'] = valor
+
+    return valores
+
+
+def registrar_no_resumo(caixa_id, lancamento, sinal=1, ativo=True, linha=True):
+    """Soma (ou subtrai) o lançamento na linha (dia, caixa) do resumo"""
+    if lancamento.data_hora is None:
+        db.session.flush()  # data_hora é preenchida no INSERT
+
+    valores = contribuicao_diaria(lancamento) if ativo else {}
+    if linha:
+        valores['qtd_lancamentos'] = 1
+    if not valores:
+        return
+
+    inserir_ou_somar(
+        ResumoDiario.__table__,
+        {'data': lancamento.data_hora.date(), 'caixa_id': caixa_id},
+        {coluna: sinal * valor for coluna, valor in valores.items()}
+    )
+
+
+def registrar_lote_no_resumo(caixa_id, lancamentos):
+    """Soma vários lançamentos novos (ativos) com um upsert por dia"""
+    por_dia = {}
+    for lancamento in lancamentos:
+        valores = por_dia.setdefault(lancamento.data_hora.date(), {'qtd_lancamentos': 0})
+        valores['qtd_lancamentos'] += 1
+        for coluna, valor in contribuicao_diaria(lancamento).items():
+            valores[coluna] = valores.get(coluna, 0) + valor
+
+    for data, valores in por_dia.items():
+        inserir_ou_somar(ResumoDiario.__table__, {'data': data, 'caixa_id': caixa_id}, valores)
+
+
+def reconstruir(desde=None):
+    """
+    Recalcula o resumo a partir dos lançamentos (a partir de uma data, se
+    informada). Lê o livro em lotes; só o acumulado por dia fica em memória.
+    Retorna a quantidade de linhas (dia, caixa) gravadas.
+    """
+    query = db.session.query(
+        Lancamento.data_hora, Lancamento.caixa_id, Lancamento.tipo,
+        Lancamento.categoria, Lancamento.forma_pagamento,
+        Lancamento.valor, Lancamento.troco, Estorno.id.label('estorno_id')
+    ).outerjoin(Estorno, Estorno.lancamento_id == Lancamento.id)
+
+    apagar = ResumoDiario.query
+    if desde:
+        query = query.filter(Lancamento.data_hora >= datetime.combine(desde, datetime.min.time()))
+        apagar = apagar.filter(ResumoDiario.data >= desde)
+
+    acumulado = {}
+    for lancamento in query.yield_per(1000):
+        chave = (lancamento.data_hora.date(), lancamento.caixa_id)
+        linha = acumulado.setdefault(chave, dict.fromkeys(COLUNAS, 0))
+        linha['qtd_lancamentos'] += 1
+        if lancamento.estorno_id is None:
+            for coluna, valor in contribuicao_diaria(lancamento).items():
+                linha[coluna] += valor
+
+    apagar.delete(synchronize_session=False)
+    for (data, caixa_id), valores in acumulado.items():
+        db.session.add(ResumoDiario(data=data, caixa_id=caixa_id, **valores))
+    # Invalida as ETags dos painéis (versão do livro, ver app/versoes.py)
+    Caixa.query.update({Caixa.versao: Caixa.versao + 1}, synchronize_session=False)
+    db.session.commit()
+
+    return len(acumulado)
+
+
+def _somas(*filtros):
+    return db.session.query(
+        *[func.coalesce(func.sum(getattr(ResumoDiario, coluna)), 0).label(coluna) for coluna in COLUNAS]
+    ).filter(*filtros).one()
+
+
+def resumir_periodo(data_inicio, data_fim):
+    """
+    Mesmo formato de agregacao.resumir() (sem 'vendas_por_forma') para os
+    dias de data_inicio a data_fim, inclusive, somando as linhas do resumo.
+    """
+    linha = _somas(ResumoDiario.data >= data_inicio, ResumoDiario.data <= data_fim)
+
+    vendas = {classe: int(getattr(linha, f'vendas_{classe}')) for classe in CLASSES_VENDA}
+    vendas['total'] = sum(vendas[classe] for classe in CLASSES_VENDA)
+
+    return {
+        'vendas': vendas,
+        'movimentacoes': {
+            coluna: int(getattr(linha, coluna))
+            for coluna in ('sangrias', 'suprimentos', 'troco_dado', 'outros_entrada',
+                           'outros_saida', 'estornos_dinheiro')
+        },
+        'quantidades': {
+            'vendas': int(linha.qtd_vendas),
+            'sangrias': int(linha.qtd_sangrias),
+            'suprimentos': int(linha.qtd_suprimentos),
+            'estornos': int(linha.qtd_estornos),
+            'lancamentos': int(linha.qtd_lancamentos),
+        },
+    }
+
+
+def vendas_por_dia(data_inicio, data_fim):
+    """{data: (total de vendas em centavos, quantidade de vendas)} dos dias com movimento"""
+    total = sum(getattr(ResumoDiario, f'vendas_{classe}') for classe in CLASSES_VENDA)
+    linhas = db.session.query(
+        ResumoDiario.data,
+        func.sum(total),
+        func.sum(ResumoDiario.qtd_vendas)
+    ).filter(
+        ResumoDiario.data >= data_inicio,
+        ResumoDiario.data <= data_fim
+    ).group_by(ResumoDiario.data).all()
+
+    return {data: (int(vendas or 0), int(qtd or 0)) for data, vendas, qtd in linhas}
+
+
+def datas_com_movimento(desde):
+    """Dias (date) a partir de desde que tiveram algum lançamento"""
+    linhas = db.session.query(ResumoDiario.data).filter(
+        ResumoDiario.data >= desde,
+        ResumoDiario.qtd_lancamentos > 0
+    ).distinct().order_by(ResumoDiario.data).all()
+    return [linha.data for linha in linhas]
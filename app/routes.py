@@ -1,13 +1,36 @@
 """
 Rotas da aplicação
 """
-from flask import Blueprint, render_template, request, jsonify, Response
-from app.models import db, Caixa, Lancamento, Configuracao, Estorno
-from app.pdf_generator import (
-    gerar_relatorio_caixa_pdf, gerar_relatorio_periodo_pdf, gerar_resumo_diario_pdf,
-    gerar_cupom_termico_caixa
+from flask import Blueprint, render_template, request, jsonify, Response, stream_with_context, current_app, send_from_directory, send_file
+from app.models import db, Caixa, Lancamento, Estorno, RelatorioPedido
+from app import cache_pdf
+from app.pdf_generator import gerar_relatorio_periodo_pdf, gerar_resumo_diario_pdf
+from app.relatorios import (
+    dados_periodo, dados_resumo_diario, resumo_periodo, gerar_pdf_caixa, gerar_cupom_caixa, validar_parametros
 )
+from app.cupom_termico import imprimir, IMPRESSORA_HOST, FORMATOS as FORMATOS_CUPOM
+from app.fila_relatorios import enfileirar, fila_ativa, posicao, caminho_arquivo, FilaCheia
 from app.time_sync import get_time_sync, get_brasilia_time, get_brasilia_time_iso
+from app.agregacao import resumir
+from app.dinheiro import para_centavos, para_reais, reais
+from app.consultas import (
+    filtros_lancamentos, campos_solicitados, pagina_lancamentos,
+    contar_lancamentos, LIMITE_PADRAO
+)
+from app.exportacao import exportar, FORMATOS as FORMATOS_EXPORTACAO
+from app.serie import gerar_serie
+from app.configuracao import obter_configuracao, atualizar_configuracao
+from app.lancamento_rapido import (
+    montar_lancamento, gravar_lancamento, gravar_lote, ler_caixa_id, esquecer_caixa_aberto, MAX_LOTE
+)
+from app.eventos import publicar, transmitir, aceitando_conexoes
+from app.versoes import etag_livro, etag_caixa_aberto, cliente_tem, nao_modificado, com_etag
+from app.resumo_diario import (
+    resumir_periodo, vendas_por_dia, datas_com_movimento as datas_com_movimento_desde
+)
+import os
+import tempfile
+import threading
 from datetime import datetime, timedelta
 from sqlalchemy import func, and_, or_
 
@@ -36,6 +59,13 @@ def gerente():
     """Painel do gerente/dono - acesso mobile"""
     return render_template('gerente.html')
 
+@main_bp.route('/sw.js')
+def service_worker():
+    """Service worker (static/js/sw.js) servido na raiz para controlar todas as páginas"""
+    resposta = send_from_directory(current_app.static_folder, 'js/sw.js', max_age=0)
+    resposta.headers['Cache-Control'] = 'no-cache'
+    return resposta
+
 @main_bp.route('/time-demo')
 def time_demo():
     """Página de demonstração da sincronização de horário"""
@@ -46,44 +76,56 @@ def time_demo():
 @api_bp.route('/configuracao', methods=['GET'])
 def get_configuracao():
     """Obter configurações do sistema"""
-    config = Configuracao.get_config()
-    return jsonify({
+    config = obter_configuracao()
+    etag = f'config-{config.versao}'
+    if cliente_tem(etag):
+        return nao_modificado(etag)
+    
+    return com_etag(jsonify({
         'nome_loja': config.nome_loja,
         'responsavel': config.responsavel,
-        'formas_pagamento': config.formas_pagamento.split(',')
-    })
+        'formas_pagamento': list(config.formas_pagamento)
+    }), etag)
 
 @api_bp.route('/configuracao', methods=['PUT'])
 def update_configuracao():
-    """Atualizar configurações"""
+    """Atualizar configurações (os outros workers recarregam pela versão)"""
     data = request.json
-    config = Configuracao.get_config()
-    
-    if 'nome_loja' in data:
-        config.nome_loja = data['nome_loja']
-    if 'responsavel' in data:
-        config.responsavel = data['responsavel']
-    if 'formas_pagamento' in data:
-        config.formas_pagamento = ','.join(data['formas_pagamento'])
     
-    db.session.commit()
+    atualizar_configuracao(
+        nome_loja=data.get('nome_loja'),
+        responsavel=data.get('responsavel'),
+        formas_pagamento=data.get('formas_pagamento')
+    )
     return jsonify({'success': True, 'message': 'Configurações atualizadas'})
 
 # ===== API - HORA SINCRONIZADA =====
 
 @api_bp.route('/time/current', methods=['GET'])
 def get_current_time():
-    """Obter hora atual sincronizada de Brasília"""
+    """
+    Hora sincronizada de Brasília, com as marcas de recebimento e envio
+    (ms Unix) para o cliente estimar o atraso da rede como no NTP
+    """
     time_sync = get_time_sync()
-    current_time = time_sync.get_current_time()
+    recebido = time_sync.agora_epoch()
     
-    return jsonify({
+    amostra = time_sync.amostra
+    current_time = datetime.fromtimestamp(recebido, time_sync.timezone).replace(tzinfo=None)
+    
+    resposta = jsonify({
         'success': True,
         'datetime': current_time.isoformat(),
-        'timestamp': int(current_time.timestamp()),
+        'timestamp': int(recebido),
         'formatted': current_time.strftime('%d/%m/%Y %H:%M:%S'),
-        'timezone': 'America/Sao_Paulo'
+        'timezone': 'America/Sao_Paulo',
+        'synchronized': amostra is not None,
+        'error_ms': round(amostra.erro_seconds * 1000, 3) if amostra else None,
+        'server_receive_ms': recebido * 1000,
+        'server_transmit_ms': time_sync.agora_epoch() * 1000
     })
+    resposta.headers['Cache-Control'] = 'no-store'
+    return resposta
 
 @api_bp.route('/time/status', methods=['GET'])
 def get_time_status():
@@ -100,7 +142,7 @@ def get_time_status():
 def force_time_sync():
     """Forçar sincronização com a API externa"""
     time_sync = get_time_sync()
-    success = time_sync.sync_time()
+    success = time_sync.solicitar_sincronizacao(esperar=10)
     
     if success:
         status = time_sync.get_sync_status()
@@ -120,15 +162,19 @@ def force_time_sync():
 @api_bp.route('/caixa/status', methods=['GET'])
 def caixa_status():
     """Verificar se há caixa aberto"""
+    etag = etag_caixa_aberto()
+    if cliente_tem(etag):
+        return nao_modificado(etag)
+    
     caixa = Caixa.query.filter_by(status='aberto').first()
     
     if caixa:
-        return jsonify({
+        return com_etag(jsonify({
             'aberto': True,
             'caixa': caixa.to_dict()
-        })
+        }), etag)
     
-    return jsonify({'aberto': False})
+    return com_etag(jsonify({'aberto': False}), etag)
 
 @api_bp.route('/caixa/abrir', methods=['POST'])
 def abrir_caixa():
@@ -142,12 +188,15 @@ def abrir_caixa():
     
     caixa = Caixa(
         operador=data.get('operador', ''),
-        troco_inicial=float(data.get('troco_inicial', 0)),
+        troco_inicial=para_centavos(data.get('troco_inicial', 0)),
         status='aberto'
     )
     
     db.session.add(caixa)
+    db.session.flush()
+    publicar('caixa_aberto', caixa.id, {'operador': caixa.operador})
     db.session.commit()
+    esquecer_caixa_aberto()
     
     return jsonify({
         'success': True,
@@ -167,22 +216,32 @@ def fechar_caixa():
     
     caixa.data_fechamento = datetime.now()
     caixa.status = 'fechado'
+    caixa.versao = Caixa.versao + 1
     
     # Calcular total de vendas para notificação
     totais = caixa.calcular_totais()
     total_vendas = totais['total_entradas']
     
     if 'valor_contado' in data:
-        valor_contado = float(data['valor_contado'])
+        valor_contado = para_centavos(data['valor_contado'])
         caixa.valor_contado = valor_contado
         # A diferença deve ser calculada em relação ao saldo em dinheiro, não ao saldo total
+        # (centavos inteiros: diferença zero significa caixa conferido)
         saldo_dinheiro = caixa.calcular_saldo_dinheiro()
         caixa.diferenca = valor_contado - saldo_dinheiro
     
     if 'observacao' in data:
         caixa.observacao = data['observacao']
     
+    publicar('caixa_fechado', caixa.id, {'total_vendas': para_reais(total_vendas)})
     db.session.commit()
+    esquecer_caixa_aberto()
+    
+    # Relatório e cupom já ficam prontos para a primeira impressão
+    threading.Thread(
+        target=_aquecer_pdfs_caixa, args=(current_app._get_current_object(), caixa.id),
+        daemon=True, name='pdf-caixa'
+    ).start()
     
     return jsonify({
         'success': True,
@@ -193,6 +252,10 @@ def fechar_caixa():
 @api_bp.route('/caixa/painel', methods=['GET'])
 def painel_caixa():
     """Obter dados do painel do caixa atual"""
+    etag = etag_caixa_aberto()
+    if cliente_tem(etag):
+        return nao_modificado(etag)
+    
     caixa = Caixa.query.filter_by(status='aberto').first()
     
     if not caixa:
@@ -200,35 +263,17 @@ def painel_caixa():
     
     totais = caixa.calcular_totais()
     
-    # Resumo por forma de pagamento
-    vendas = Lancamento.query.filter_by(
-        caixa_id=caixa.id,
-        tipo='entrada',
-        categoria='venda'
-    ).filter(Lancamento.estorno == None).all()
-    
-    resumo_pagamentos = {}
-    for venda in vendas:
-        forma = venda.forma_pagamento or 'Não informado'
-        resumo_pagamentos[forma] = resumo_pagamentos.get(forma, 0) + venda.valor
+    # Resumos por forma de pagamento e por categoria (totais acumulados)
+    resumo_pagamentos = caixa.resumo_acumulado('forma')
+    resumo_categorias = caixa.resumo_acumulado('categoria')
     
-    # Resumo por categoria
-    lancamentos = Lancamento.query.filter_by(caixa_id=caixa.id).all()
-    
-    resumo_categorias = {}
-    for lanc in lancamentos:
-        if lanc.estorno:
-            continue
-        cat = lanc.categoria
-        resumo_categorias[cat] = resumo_categorias.get(cat, 0) + lanc.valor
-    
-    return jsonify({
+    return com_etag(jsonify({
         'success': True,
         'caixa': caixa.to_dict(),
-        'totais': totais,
-        'resumo_pagamentos': resumo_pagamentos,
-        'resumo_categorias': resumo_categorias
-    })
+        'totais': reais(totais),
+        'resumo_pagamentos': reais(resumo_pagamentos),
+        'resumo_categorias': reais(resumo_categorias)
+    }), etag)
 
 @api_bp.route('/caixa/resumo-fechamento', methods=['GET'])
 def resumo_fechamento():
@@ -238,116 +283,47 @@ def resumo_fechamento():
     if not caixa:
         return jsonify({'success': False, 'message': 'Não há caixa aberto'}), 400
     
-    lancamentos = Lancamento.query.filter_by(caixa_id=caixa.id).all()
-    
-    # Separar por forma de pagamento
-    vendas_dinheiro = 0
-    vendas_pix = 0
-    vendas_cartao_credito = 0
-    vendas_cartao_debito = 0
-    vendas_outras = 0
-    total_troco_dado = 0
-    
-    total_sangrias = 0
-    total_suprimentos = 0
-    total_outros_entrada = 0
-    total_outros_saida = 0
-    total_estornos_dinheiro = 0
-    
-    for lanc in lancamentos:
-        if lanc.estorno:
-            continue
-        if lanc.categoria == 'venda':
-            forma = (lanc.forma_pagamento or '').lower()
-            if 'dinheiro' in forma:
-                vendas_dinheiro += lanc.valor
-                # Somar troco dado (sai do caixa físico)
-                if lanc.troco and lanc.troco > 0:
-                    total_troco_dado += lanc.troco
-            elif 'pix' in forma:
-                vendas_pix += lanc.valor
-            elif 'crédito' in forma or 'credito' in forma:
-                vendas_cartao_credito += lanc.valor
-            elif 'débito' in forma or 'debito' in forma:
-                vendas_cartao_debito += lanc.valor
-            else:
-                vendas_outras += lanc.valor
-        elif lanc.categoria == 'sangria':
-            total_sangrias += lanc.valor
-        elif lanc.categoria == 'suprimento':
-            total_suprimentos += lanc.valor
-        elif lanc.categoria == 'outros':
-            if lanc.tipo == 'entrada':
-                total_outros_entrada += lanc.valor
-            else:
-                total_outros_saida += lanc.valor
-        elif lanc.categoria == 'estorno':
-            forma = (lanc.forma_pagamento or '').lower()
-            if 'dinheiro' in forma:
-                total_estornos_dinheiro += lanc.valor
-    
-    # Total de vendas
-    total_vendas = vendas_dinheiro + vendas_pix + vendas_cartao_credito + vendas_cartao_debito + vendas_outras
+    resumo = resumir(Lancamento.caixa_id == caixa.id)
     
     # Usar o método do modelo para calcular dinheiro esperado
     dinheiro_esperado = caixa.calcular_saldo_dinheiro()
     
     return jsonify({
         'success': True,
-        'troco_inicial': caixa.troco_inicial,
-        'vendas': {
-            'dinheiro': vendas_dinheiro,
-            'pix': vendas_pix,
-            'cartao_credito': vendas_cartao_credito,
-            'cartao_debito': vendas_cartao_debito,
-            'outras': vendas_outras,
-            'total': total_vendas
-        },
-        'movimentacoes': {
-            'sangrias': total_sangrias,
-            'suprimentos': total_suprimentos,
-            'troco_dado': total_troco_dado,
-            'outros_entrada': total_outros_entrada,
-            'outros_saida': total_outros_saida
-        },
-        'dinheiro_esperado': dinheiro_esperado
+        'troco_inicial': para_reais(caixa.troco_inicial),
+        'vendas': reais(resumo['vendas']),
+        'movimentacoes': reais({
+            'sangrias': resumo['movimentacoes']['sangrias'],
+            'suprimentos': resumo['movimentacoes']['suprimentos'],
+            'troco_dado': resumo['movimentacoes']['troco_dado'],
+            'outros_entrada': resumo['movimentacoes']['outros_entrada'],
+            'outros_saida': resumo['movimentacoes']['outros_saida']
+        }),
+        'dinheiro_esperado': para_reais(dinheiro_esperado)
     })
 
 # ===== API - LANÇAMENTOS =====
 
 @api_bp.route('/lancamento', methods=['POST'])
 def criar_lancamento():
-    """Criar novo lançamento"""
-    caixa = Caixa.query.filter_by(status='aberto').first()
-    
-    if not caixa:
-        return jsonify({'success': False, 'message': 'Não há caixa aberto'}), 400
-    
+    """Criar novo lançamento (caminho rápido, ver app/lancamento_rapido.py)"""
     data = request.json
     
     # Validações
     if 'tipo' not in data or 'categoria' not in data or 'valor' not in data:
         return jsonify({'success': False, 'message': 'Dados incompletos'}), 400
     
-    valor = float(data['valor'])
-    
-    lancamento = Lancamento(
-        caixa_id=caixa.id,
-        tipo=data['tipo'],
-        categoria=data['categoria'],
-        valor=valor,
-        forma_pagamento=data.get('forma_pagamento'),
-        descricao=data.get('descricao')
-    )
+    try:
+        caixa_id = ler_caixa_id(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     
-    # Calcular troco para vendas em dinheiro
-    if data['categoria'] == 'venda' and 'valor_recebido' in data:
-        valor_recebido = float(data['valor_recebido'])
-        lancamento.valor_recebido = valor_recebido
-        lancamento.troco = valor_recebido - valor
+    lancamento = gravar_lancamento(montar_lancamento(data), caixa_id)
     
-    db.session.add(lancamento)
-    db.session.commit()
+    if not lancamento:
+        if caixa_id is not None:
+            return jsonify({'success': False, 'message': 'Caixa já foi fechado, recarregue a página'}), 400
+        return jsonify({'success': False, 'message': 'Não há caixa aberto'}), 400
     
     return jsonify({
         'success': True,
@@ -355,6 +331,36 @@ def criar_lancamento():
         'lancamento': lancamento.to_dict()
     })
 
+@api_bp.route('/lancamentos/lote', methods=['POST'])
+def criar_lancamentos_lote():
+    """
+    Lançamentos registrados sem conexão, enviados de uma vez:
+    {"lancamentos": [{"chave": "...", "caixa_id"?, "tipo", "categoria", "valor", "data_hora" ou "idade_ms"?, ...}]}.
+    A chave (gerada no cliente) torna o reenvio seguro: nada é gravado duas vezes.
+    Item com caixa_id de um caixa que não é mais o aberto volta como erro.
+    """
+    data = request.json or {}
+    itens = data.get('lancamentos')
+    
+    if not isinstance(itens, list) or not itens:
+        return jsonify({'success': False, 'message': 'Nenhum lançamento enviado'}), 400
+    if len(itens) > MAX_LOTE:
+        return jsonify({'success': False, 'message': f'Máximo de {MAX_LOTE} lançamentos por lote'}), 400
+    
+    resultados = gravar_lote(itens)
+    
+    contagem = {'criado': 0, 'duplicado': 0, 'erro': 0}
+    for resultado in resultados:
+        contagem[resultado['status']] += 1
+    
+    return jsonify({
+        'success': True,
+        'resultados': resultados,
+        'criados': contagem['criado'],
+        'duplicados': contagem['duplicado'],
+        'erros': contagem['erro']
+    })
+
 @api_bp.route('/lancamento/<int:id>', methods=['DELETE'])
 def deletar_lancamento(id):
     """Deletar um lançamento"""
@@ -367,65 +373,125 @@ def deletar_lancamento(id):
     if lancamento.caixa.status != 'aberto':
         return jsonify({'success': False, 'message': 'Não é possível deletar lançamento de caixa fechado'}), 400
     
+    # Lançamentos estornados já não contam nos totais, só como linha do dia
+    lancamento.caixa.registrar_lancamento(lancamento, sinal=-1, ativo=not lancamento.estorno)
+    
+    publicar('lancamento_removido', lancamento.caixa_id, {
+        'lancamento_id': lancamento.id,
+        'categoria': lancamento.categoria,
+        'valor': para_reais(lancamento.valor)
+    })
     db.session.delete(lancamento)
     db.session.commit()
     
     return jsonify({'success': True, 'message': 'Lançamento deletado com sucesso'})
 
+# ===== API - EVENTOS =====
+
+@api_bp.route('/eventos', methods=['GET'])
+def stream_eventos():
+    """
+    Server-Sent Events com as alterações do livro (ver app/eventos.py).
+    Continua a partir do cabeçalho Last-Event-ID (ou ?desde=) na reconexão.
+    """
+    if not aceitando_conexoes():
+        # O navegador não reconecta em erro HTTP; a página volta ao polling
+        return jsonify({'success': False, 'message': 'Limite de conexões de eventos atingido'}), 503
+    
+    ultimo_id = request.headers.get('Last-Event-ID') or request.args.get('desde')
+    ultimo_id = int(ultimo_id) if ultimo_id and ultimo_id.isdigit() else None
+    
+    return Response(
+        stream_with_context(transmitir(ultimo_id)),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # nginx não deve segurar as mensagens
+        }
+    )
+
 # ===== API - HISTÓRICO =====
 
 @api_bp.route('/lancamentos', methods=['GET'])
 def listar_lancamentos():
-    """Listar lançamentos com filtros"""
-    # Parâmetros de filtro
-    data_inicio = request.args.get('data_inicio')
-    data_fim = request.args.get('data_fim')
-    tipo = request.args.get('tipo')
-    categoria = request.args.get('categoria')
-    caixa_id = request.args.get('caixa_id')
-    
-    query = Lancamento.query
-    
-    if caixa_id:
-        query = query.filter_by(caixa_id=int(caixa_id))
-    
-    if data_inicio:
-        data_inicio_dt = datetime.fromisoformat(data_inicio)
-        query = query.filter(Lancamento.data_hora >= data_inicio_dt)
-    
-    if data_fim:
-        data_fim_dt = datetime.fromisoformat(data_fim)
-        query = query.filter(Lancamento.data_hora <= data_fim_dt)
-    
-    if tipo:
-        query = query.filter_by(tipo=tipo)
-    
-    if categoria:
-        query = query.filter_by(categoria=categoria)
-    
-    lancamentos = query.order_by(Lancamento.data_hora.desc()).all()
+    """
+    Listar lançamentos com filtros, do mais recente para o mais antigo.
+
+    Paginado por cursor: limite (máx. 500) e cursor (proximo_cursor da página
+    anterior). fields=campo1,campo2 limita as colunas retornadas e contar=1
+    inclui a quantidade e os totais de todos os lançamentos do filtro.
+    """
+    try:
+        filtros = filtros_lancamentos(request.args)
+        campos = campos_solicitados(request.args.get('fields'))
+        lancamentos, proximo_cursor = pagina_lancamentos(
+            campos, filtros,
+            limite=request.args.get('limite', LIMITE_PADRAO, type=int),
+            cursor=request.args.get('cursor')
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     
-    return jsonify({
+    resposta = {
         'success': True,
-        'lancamentos': [l.to_dict() for l in lancamentos]
-    })
+        'lancamentos': lancamentos,
+        'proximo_cursor': proximo_cursor
+    }
+    if request.args.get('contar') in ('1', 'true'):
+        resposta['total'] = contar_lancamentos(filtros)
+    
+    return jsonify(resposta)
+
+CAIXAS_POR_PAGINA = 50
+CAIXAS_POR_PAGINA_MAX = 200
+
 
 @api_bp.route('/caixas', methods=['GET'])
 def listar_caixas():
-    """Listar todos os caixas"""
+    """
+    Listar caixas, paginado (pagina, por_pagina) e com filtro opcional de
+    status e de data de abertura (data_inicio/data_fim no formato YYYY-MM-DD).
+    Os totais vêm das colunas acumuladas do próprio caixa, sem consultar lançamentos.
+    """
     status = request.args.get('status')
+    data_inicio = request.args.get('data_inicio')
+    data_fim = request.args.get('data_fim')
+    pagina = request.args.get('pagina', 1, type=int)
+    por_pagina = request.args.get('por_pagina', CAIXAS_POR_PAGINA, type=int)
+    
+    etag = etag_livro()
+    if cliente_tem(etag):
+        return nao_modificado(etag)
     
     query = Caixa.query
     
     if status:
         query = query.filter_by(status=status)
     
-    caixas = query.order_by(Caixa.data_abertura.desc()).all()
+    try:
+        if data_inicio:
+            inicio = datetime.fromisoformat(data_inicio[:10])
+            query = query.filter(Caixa.data_abertura >= inicio)
+        if data_fim:
+            fim = datetime.fromisoformat(data_fim[:10]) + timedelta(days=1)
+            query = query.filter(Caixa.data_abertura < fim)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Data inválida'}), 400
+    
+    paginacao = query.order_by(Caixa.data_abertura.desc(), Caixa.id.desc()).paginate(
+        page=pagina, per_page=por_pagina, max_per_page=CAIXAS_POR_PAGINA_MAX, error_out=False
+    )
     
-    return jsonify({
+    return com_etag(jsonify({
         'success': True,
-        'caixas': [c.to_dict() for c in caixas]
-    })
+        'caixas': [c.to_dict() for c in paginacao.items],
+        'paginacao': {
+            'pagina': paginacao.page,
+            'por_pagina': paginacao.per_page,
+            'total': paginacao.total,
+            'paginas': paginacao.pages
+        }
+    }), etag)
 
 @api_bp.route('/caixa/<int:id>', methods=['GET'])
 def detalhes_caixa(id):
@@ -457,67 +523,13 @@ def relatorio_resumo():
     data_inicio_dt = datetime.fromisoformat(data_inicio)
     data_fim_dt = datetime.fromisoformat(data_fim)
     
-    # Total de entradas e saídas
-    total_entradas = db.session.query(func.sum(Lancamento.valor)).filter(
-        and_(
-            Lancamento.tipo == 'entrada',
-            Lancamento.data_hora >= data_inicio_dt,
-            Lancamento.data_hora <= data_fim_dt
-        )
-    ).scalar() or 0
-    
-    total_saidas = db.session.query(func.sum(Lancamento.valor)).filter(
-        and_(
-            Lancamento.tipo == 'saida',
-            Lancamento.data_hora >= data_inicio_dt,
-            Lancamento.data_hora <= data_fim_dt
-        )
-    ).scalar() or 0
-    
-    # Resumo por categoria
-    categorias = db.session.query(
-        Lancamento.categoria,
-        Lancamento.tipo,
-        func.sum(Lancamento.valor).label('total')
-    ).filter(
-        and_(
-            Lancamento.data_hora >= data_inicio_dt,
-            Lancamento.data_hora <= data_fim_dt
-        )
-    ).group_by(Lancamento.categoria, Lancamento.tipo).all()
-    
-    # Resumo por forma de pagamento (apenas vendas)
-    pagamentos = db.session.query(
-        Lancamento.forma_pagamento,
-        func.sum(Lancamento.valor).label('total')
-    ).filter(
-        and_(
-            Lancamento.categoria == 'venda',
-            Lancamento.estorno == None,
-            Lancamento.data_hora >= data_inicio_dt,
-            Lancamento.data_hora <= data_fim_dt
-        )
-    ).group_by(Lancamento.forma_pagamento).all()
-    
     return jsonify({
         'success': True,
         'periodo': {
             'inicio': data_inicio,
             'fim': data_fim
         },
-        'totais': {
-            'entradas': float(total_entradas),
-            'saidas': float(total_saidas),
-            'saldo': float(total_entradas - total_saidas)
-        },
-        'categorias': [
-            {'categoria': c.categoria, 'tipo': c.tipo, 'total': float(c.total)}
-            for c in categorias
-        ],
-        'pagamentos': [
-            {'forma': p.forma_pagamento or 'Não informado', 'total': float(p.total)}
-            for p in pagamentos
-        ]
+        **resumo_periodo(data_inicio_dt, data_fim_dt)
     })
 
 
@@ -537,82 +549,40 @@ def resumo_hoje():
     else:
         dia_requisitado = hoje
 
+    # O dia entra na ETag: sem ?data= a resposta muda à meia-noite
+    etag = etag_livro(dia_requisitado.isoformat())
+    if cliente_tem(etag):
+        return nao_modificado(etag)
+
     inicio_dia = datetime.combine(dia_requisitado, datetime.min.time())
     fim_dia = datetime.combine(dia_requisitado, datetime.max.time())
 
-    caixas_dia = Caixa.query.filter(
+    qtd_caixas, troco_inicial_total = db.session.query(
+        func.count(Caixa.id),
+        func.coalesce(func.sum(Caixa.troco_inicial), 0)
+    ).filter(
         Caixa.data_abertura >= inicio_dia,
         Caixa.data_abertura <= fim_dia
-    ).all()
+    ).one()
 
-    lancamentos = Lancamento.query.filter(
-        Lancamento.data_hora >= inicio_dia,
-        Lancamento.data_hora <= fim_dia
-    ).all()
-
-    vendas_dinheiro = 0
-    vendas_pix = 0
-    vendas_cartao_credito = 0
-    vendas_cartao_debito = 0
-    vendas_outras = 0
-    total_sangrias = 0
-    total_suprimentos = 0
-    total_troco_dado = 0
-    total_outros_entrada = 0
-    total_outros_saida = 0
-    total_estornos_dinheiro = 0
-
-    for lanc in lancamentos:
-        if lanc.estorno:
-            continue
-        if lanc.categoria == 'venda':
-            forma = (lanc.forma_pagamento or '').lower()
-            if 'dinheiro' in forma:
-                vendas_dinheiro += lanc.valor
-                if lanc.troco and lanc.troco > 0:
-                    total_troco_dado += lanc.troco
-            elif 'pix' in forma:
-                vendas_pix += lanc.valor
-            elif 'crédito' in forma or 'credito' in forma:
-                vendas_cartao_credito += lanc.valor
-            elif 'débito' in forma or 'debito' in forma:
-                vendas_cartao_debito += lanc.valor
-            else:
-                vendas_outras += lanc.valor
-        elif lanc.categoria == 'sangria':
-            total_sangrias += lanc.valor
-        elif lanc.categoria == 'suprimento':
-            total_suprimentos += lanc.valor
-        elif lanc.categoria == 'estorno':
-            forma = (lanc.forma_pagamento or '').lower()
-            if 'dinheiro' in forma:
-                total_estornos_dinheiro += lanc.valor
-        elif lanc.categoria == 'outros':
-            if lanc.tipo == 'entrada':
-                total_outros_entrada += lanc.valor
-            else:
-                total_outros_saida += lanc.valor
-
-    total_vendas = (
-        vendas_dinheiro + vendas_pix + vendas_cartao_credito +
-        vendas_cartao_debito + vendas_outras
-    )
+    resumo = resumir_periodo(dia_requisitado, dia_requisitado)
+    vendas = resumo['vendas']
+    mov = resumo['movimentacoes']
 
-    troco_inicial_total = sum((c.troco_inicial or 0) for c in caixas_dia)
     dinheiro_esperado = (
         troco_inicial_total
-        + vendas_dinheiro
-        - total_troco_dado
-        - total_sangrias
-        + total_suprimentos
-        + total_outros_entrada
-        - total_outros_saida
-        - total_estornos_dinheiro
+        + vendas['dinheiro']
+        - mov['troco_dado']
+        - mov['sangrias']
+        + mov['suprimentos']
+        + mov['outros_entrada']
+        - mov['outros_saida']
+        - mov['estornos_dinheiro']
     )
 
     caixa_atual = Caixa.query.filter_by(status='aberto').first()
 
-    return jsonify({
+    return com_etag(jsonify({
         'success': True,
         'data': dia_requisitado.isoformat(),
         'periodo': {
@@ -621,24 +591,24 @@ def resumo_hoje():
         },
         'caixa_aberto': caixa_atual is not None,
         'caixa_atual': caixa_atual.to_dict() if caixa_atual else None,
-        'total_vendas': total_vendas,
-        'saldo_final_dinheiro': dinheiro_esperado,
-        'vendas': {
-            'dinheiro': vendas_dinheiro,
-            'pix': vendas_pix,
-            'cartao_credito': vendas_cartao_credito,
-            'cartao_debito': vendas_cartao_debito
-        },
-        'movimentacoes': {
-            'sangrias': total_sangrias,
-            'suprimentos': total_suprimentos,
-            'troco_dado': total_troco_dado,
-            'outros_entrada': total_outros_entrada,
-            'outros_saida': total_outros_saida
-        },
-        'qtd_caixas': len(caixas_dia),
-        'qtd_lancamentos': len(lancamentos)
-    })
+        'total_vendas': para_reais(vendas['total']),
+        'saldo_final_dinheiro': para_reais(dinheiro_esperado),
+        'vendas': reais({
+            'dinheiro': vendas['dinheiro'],
+            'pix': vendas['pix'],
+            'cartao_credito': vendas['cartao_credito'],
+            'cartao_debito': vendas['cartao_debito']
+        }),
+        'movimentacoes': reais({
+            'sangrias': mov['sangrias'],
+            'suprimentos': mov['suprimentos'],
+            'troco_dado': mov['troco_dado'],
+            'outros_entrada': mov['outros_entrada'],
+            'outros_saida': mov['outros_saida']
+        }),
+        'qtd_caixas': qtd_caixas,
+        'qtd_lancamentos': resumo['quantidades']['lancamentos']
+    }), etag)
 
 
 @api_bp.route('/gerente/ultimas-movimentacoes', methods=['GET'])
@@ -660,18 +630,10 @@ def ultimas_movimentacoes():
 def datas_com_movimento():
     """Retorna lista de datas que possuem movimentações (últimos 30 dias)"""
     try:
-        from datetime import timedelta
-        data_limite = datetime.now() - timedelta(days=30)
-        
-        # Buscar datas únicas com lançamentos
-        datas = db.session.query(
-            func.date(Lancamento.data_hora).label('data')
-        ).filter(
-            Lancamento.data_hora >= data_limite
-        ).distinct().all()
+        data_limite = datetime.now().date() - timedelta(days=30)
         
-        # Converter para lista de strings ISO
-        datas_formatadas = [d.data for d in datas if d.data]
+        # Dias com movimento vêm do resumo diário (chave primária por data)
+        datas_formatadas = [data.isoformat() for data in datas_com_movimento_desde(data_limite)]
         
         return jsonify({
             'success': True,
@@ -726,6 +688,16 @@ def estornar_venda():
 
     db.session.add(estorno_lancamento)
     db.session.add(estorno_registro)
+
+    # A venda deixa de contar e o lançamento de estorno passa a contar
+    caixa.registrar_lancamento(lancamento, sinal=-1, linha=False)
+    caixa.registrar_lancamento(estorno_lancamento)
+    db.session.flush()
+    publicar('estorno', caixa.id, {
+        'lancamento_id': lancamento.id,
+        'estorno_lancamento_id': estorno_lancamento.id,
+        'valor': para_reais(lancamento.valor)
+    })
     db.session.commit()
 
     return jsonify({
@@ -752,7 +724,7 @@ def sangrias_hoje():
     return jsonify({
         'success': True,
         'sangrias': [s.to_dict() for s in sangrias],
-        'total': sum(s.valor for s in sangrias)
+        'total': para_reais(sum(s.valor for s in sangrias))
     })
 
 
@@ -762,192 +734,260 @@ def resumo_semana():
     hoje = datetime.now().date()
     inicio_semana = hoje - timedelta(days=6)
     
+    vendas = vendas_por_dia(inicio_semana, hoje)
+    
     dias = []
+    total_semana = 0
     for i in range(7):
         dia = inicio_semana + timedelta(days=i)
-        inicio_dia = datetime.combine(dia, datetime.min.time())
-        fim_dia = datetime.combine(dia, datetime.max.time())
-        
-        total_vendas = db.session.query(func.sum(Lancamento.valor)).filter(
-            and_(
-                Lancamento.categoria == 'venda',
-                Lancamento.estorno == None,
-                Lancamento.data_hora >= inicio_dia,
-                Lancamento.data_hora <= fim_dia
-            )
-        ).scalar() or 0
+        total_vendas, _ = vendas.get(dia, (0, 0))
+        total_semana += total_vendas
         
         dias.append({
             'data': dia.isoformat(),
             'dia_semana': dia.strftime('%a'),
-            'total': float(total_vendas)
+            'total': para_reais(total_vendas)
         })
     
     return jsonify({
         'success': True,
         'dias': dias,
-        'total_semana': sum(d['total'] for d in dias)
+        'total_semana': para_reais(total_semana)
     })
 
 
+@api_bp.route('/gerente/serie', methods=['GET'])
+def serie_gerente():
+    """
+    Série de vendas e movimentações para os gráficos do painel.
+    Parâmetros: inicio e fim (YYYY-MM-DD, padrão últimos 7 dias) e
+    bucket (hour, day, week ou month; padrão day).
+    """
+    hoje = datetime.now().date()
+    bucket = request.args.get('bucket', 'day')
+    
+    try:
+        data_fim = datetime.fromisoformat(request.args['fim']).date() if request.args.get('fim') else hoje
+        data_inicio = (
+            datetime.fromisoformat(request.args['inicio']).date() if request.args.get('inicio')
+            else data_fim - timedelta(days=6)
+        )
+        pontos, total_vendas = gerar_serie(data_inicio, data_fim, bucket)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    return jsonify({
+        'success': True,
+        'inicio': data_inicio.isoformat(),
+        'fim': data_fim.isoformat(),
+        'bucket': bucket,
+        'pontos': pontos,
+        'total_vendas': para_reais(total_vendas)
+    })
+
 
 # ===== API - RELATÓRIOS PDF =====
 
-@api_bp.route('/relatorio/caixa/<int:id>/pdf', methods=['GET'])
-def relatorio_caixa_pdf(id):
-    """Gerar PDF de um caixa específico"""
+def _pdf_em_cache(tipo, caixa, nome_loja, etag):
+    """Caminho do PDF do caixa fechado no cache, gerando se preciso (None se não gravou)"""
+    arquivo = cache_pdf.caminho(tipo, caixa.id, etag)
+    if cache_pdf.buscar(arquivo):
+        return arquivo, None
+    
+    conteudo = gerar_pdf_caixa(tipo, caixa, nome_loja).getvalue()
+    try:
+        cache_pdf.guardar(arquivo, conteudo)
+    except OSError as e:
+        print(f"⚠️  Erro ao guardar PDF do caixa {caixa.id}: {e}")
+        return None, conteudo
+    return arquivo, None
+
+
+def _aquecer_pdfs_caixa(app, caixa_id):
+    """Gera e guarda o relatório e o cupom do caixa recém-fechado"""
+    with app.app_context():
+        try:
+            caixa = db.session.get(Caixa, caixa_id)
+            nome_loja = obter_configuracao().nome_loja
+            for tipo in cache_pdf.TIPOS:
+                etag = cache_pdf.chave(tipo, caixa.id, caixa.versao, nome_loja)
+                _pdf_em_cache(tipo, caixa, nome_loja, etag)
+        except Exception as e:
+            print(f"⚠️  Erro ao gerar PDFs do caixa {caixa_id}: {e}")
+        finally:
+            db.session.remove()
+
+
+def _resposta_pdf_caixa(id, tipo, disposicao, prefixo):
+    """
+    PDF de um caixa. Caixa fechado sai do cache em disco com ETag
+    (304 se o cliente já tem); caixa aberto é gerado a cada pedido.
+    """
     caixa = Caixa.query.get(id)
     
     if not caixa:
         return jsonify({'success': False, 'message': 'Caixa não encontrado'}), 404
     
-    lancamentos = Lancamento.query.filter_by(caixa_id=id).order_by(Lancamento.data_hora).all()
-    
-    config = Configuracao.get_config()
-    
-    pdf_buffer = gerar_relatorio_caixa_pdf(
-        caixa.to_dict(),
-        [l.to_dict() for l in lancamentos],
-        config.nome_loja
-    )
+    config = obter_configuracao()
+    filename = f"{prefixo}_{id}_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
     
-    filename = f"relatorio_caixa_{id}_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
+    if caixa.status == 'fechado':
+        etag = cache_pdf.chave(tipo, caixa.id, caixa.versao, config.nome_loja)
+        if cliente_tem(etag):
+            return nao_modificado(etag)
+        
+        arquivo, conteudo = _pdf_em_cache(tipo, caixa, config.nome_loja, etag)
+        if arquivo:
+            return com_etag(send_file(
+                arquivo,
+                mimetype='application/pdf',
+                as_attachment=disposicao == 'attachment',
+                download_name=filename,
+                conditional=False
+            ), etag)
+        return com_etag(Response(
+            conteudo,
+            mimetype='application/pdf',
+            headers={'Content-Disposition': f'{disposicao}; filename={filename}'}
+        ), etag)
     
     return Response(
-        pdf_buffer.getvalue(),
+        gerar_pdf_caixa(tipo, caixa, config.nome_loja).getvalue(),
         mimetype='application/pdf',
         headers={
-            'Content-Disposition': f'attachment; filename={filename}',
+            'Content-Disposition': f'{disposicao}; filename={filename}',
             'Content-Type': 'application/pdf'
         }
     )
 
 
+@api_bp.route('/relatorio/caixa/<int:id>/pdf', methods=['GET'])
+def relatorio_caixa_pdf(id):
+    """Gerar PDF de um caixa específico"""
+    return _resposta_pdf_caixa(id, 'caixa', 'attachment', 'relatorio_caixa')
+
+
 @api_bp.route('/relatorio/caixa/<int:id>/cupom', methods=['GET'])
 def cupom_termico_caixa(id):
-    """Gerar cupom térmico para impressora 80mm (Elgin I9 e similares)"""
-    caixa = Caixa.query.get(id)
+    """
+    Gerar cupom térmico para impressora 80mm (Elgin I9 e similares).
+    Em PDF por padrão; format=escpos (comandos da impressora) ou
+    format=text (texto de 48 colunas) saem direto, sem PDF.
+    """
+    formato = request.args.get('format') or request.args.get('formato') or 'pdf'
     
-    if not caixa:
-        return jsonify({'success': False, 'message': 'Caixa não encontrado'}), 404
+    if formato == 'pdf':
+        return _resposta_pdf_caixa(id, 'cupom', 'inline', 'cupom_caixa')
     
-    lancamentos = Lancamento.query.filter_by(caixa_id=id).order_by(Lancamento.data_hora).all()
+    if formato not in FORMATOS_CUPOM:
+        return jsonify({'success': False, 'message': f"Formato inválido (use pdf, {', '.join(FORMATOS_CUPOM)})"}), 400
     
-    config = Configuracao.get_config()
+    caixa = db.session.get(Caixa, id)
     
-    pdf_buffer = gerar_cupom_termico_caixa(
-        caixa.to_dict(),
-        [l.to_dict() for l in lancamentos],
-        config.nome_loja
-    )
+    if not caixa:
+        return jsonify({'success': False, 'message': 'Caixa não encontrado'}), 404
     
-    filename = f"cupom_caixa_{id}_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
+    conteudo = gerar_cupom_caixa(formato, caixa, obter_configuracao().nome_loja)
+    filename = f"cupom_caixa_{id}_{datetime.now().strftime('%Y%m%d_%H%M')}"
     
+    if formato == 'escpos':
+        return Response(
+            conteudo,
+            mimetype='application/octet-stream',
+            headers={'Content-Disposition': f'attachment; filename={filename}.bin'}
+        )
     return Response(
-        pdf_buffer.getvalue(),
-        mimetype='application/pdf',
-        headers={
-            'Content-Disposition': f'inline; filename={filename}',
-            'Content-Type': 'application/pdf'
-        }
+        conteudo,
+        mimetype='text/plain',
+        headers={'Content-Disposition': f'inline; filename={filename}.txt'}
     )
 
 
-@api_bp.route('/relatorio/periodo/pdf', methods=['GET'])
-def relatorio_periodo_pdf():
-    """Gerar PDF de relatório por período"""
-    data_inicio = request.args.get('data_inicio')
-    data_fim = request.args.get('data_fim')
+@api_bp.route('/relatorio/caixa/<int:id>/cupom/imprimir', methods=['POST'])
+def imprimir_cupom_caixa(id):
+    """
+    Envia o cupom em ESC/POS direto para a impressora em rede
+    (IMPRESSORA_HOST, porta IMPRESSORA_PORTA). 503 se não houver impressora
+    configurada; 502 se ela não responder.
+    """
+    if not IMPRESSORA_HOST:
+        return jsonify({'success': False, 'message': 'Impressora em rede não configurada'}), 503
     
-    if not data_inicio or not data_fim:
-        return jsonify({'success': False, 'message': 'Período não informado'}), 400
+    caixa = db.session.get(Caixa, id)
     
-    data_inicio_dt = datetime.fromisoformat(data_inicio)
-    data_fim_dt = datetime.fromisoformat(data_fim)
+    if not caixa:
+        return jsonify({'success': False, 'message': 'Caixa não encontrado'}), 404
     
-    # Buscar dados do relatório
-    total_entradas = db.session.query(func.sum(Lancamento.valor)).filter(
-        and_(
-            Lancamento.tipo == 'entrada',
-            Lancamento.data_hora >= data_inicio_dt,
-            Lancamento.data_hora <= data_fim_dt
-        )
-    ).scalar() or 0
+    conteudo = gerar_cupom_caixa('escpos', caixa, obter_configuracao().nome_loja)
     
-    total_saidas = db.session.query(func.sum(Lancamento.valor)).filter(
-        and_(
-            Lancamento.tipo == 'saida',
-            Lancamento.data_hora >= data_inicio_dt,
-            Lancamento.data_hora <= data_fim_dt
-        )
-    ).scalar() or 0
+    try:
+        imprimir(conteudo)
+    except OSError as e:
+        print(f"⚠️  Erro ao imprimir cupom do caixa {id}: {e}")
+        return jsonify({'success': False, 'message': 'Impressora não respondeu'}), 502
     
-    categorias = db.session.query(
-        Lancamento.categoria,
-        Lancamento.tipo,
-        func.sum(Lancamento.valor).label('total')
-    ).filter(
-        and_(
-            Lancamento.data_hora >= data_inicio_dt,
-            Lancamento.data_hora <= data_fim_dt
-        )
-    ).group_by(Lancamento.categoria, Lancamento.tipo).all()
+    return jsonify({'success': True, 'message': 'Cupom enviado para a impressora', 'bytes': len(conteudo)})
+
+
+@api_bp.route('/exportar/<tabela>', methods=['GET'])
+def exportar_dados(tabela):
+    """
+    Exporta lançamentos ou caixas em streaming (formato=ndjson|csv, gzip=1).
+    Aceita os mesmos filtros de /api/lancamentos (ou de /api/caixas) e fields=.
+    """
+    formato = request.args.get('formato', 'ndjson')
+    gzip = request.args.get('gzip') in ('1', 'true')
     
-    pagamentos = db.session.query(
-        Lancamento.forma_pagamento,
-        func.sum(Lancamento.valor).label('total')
-    ).filter(
-        and_(
-            Lancamento.categoria == 'venda',
-            Lancamento.estorno == None,
-            Lancamento.data_hora >= data_inicio_dt,
-            Lancamento.data_hora <= data_fim_dt
-        )
-    ).group_by(Lancamento.forma_pagamento).all()
+    try:
+        conteudo = exportar(tabela, request.args, formato=formato, gzip=gzip)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     
-    # Buscar todos os lançamentos do período
-    lancamentos = Lancamento.query.filter(
-        and_(
-            Lancamento.data_hora >= data_inicio_dt,
-            Lancamento.data_hora <= data_fim_dt
-        )
-    ).order_by(Lancamento.data_hora).all()
+    nome_arquivo = f"{tabela}_{datetime.now().strftime('%Y%m%d_%H%M')}.{formato}"
+    mimetype = FORMATOS_EXPORTACAO[formato]
+    if gzip:
+        nome_arquivo += '.gz'
+        mimetype = 'application/gzip'
     
-    dados_relatorio = {
-        'periodo': {
-            'inicio': data_inicio,
-            'fim': data_fim
-        },
-        'totais': {
-            'entradas': float(total_entradas),
-            'saidas': float(total_saidas),
-            'saldo': float(total_entradas - total_saidas)
-        },
-        'categorias': [
-            {'categoria': c.categoria, 'tipo': c.tipo, 'total': float(c.total)}
-            for c in categorias
-        ],
-        'pagamentos': [
-            {'forma': p.forma_pagamento or 'Não informado', 'total': float(p.total)}
-            for p in pagamentos
-        ],
-        'lancamentos': [l.to_dict() for l in lancamentos]
-    }
+    return Response(
+        stream_with_context(conteudo),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={nome_arquivo}'}
+    )
+
+@api_bp.route('/relatorio/periodo/pdf', methods=['GET'])
+def relatorio_periodo_pdf():
+    """Gerar PDF de relatório por período (detalhe=completo|diario|resumo)"""
+    data_inicio = request.args.get('data_inicio')
+    data_fim = request.args.get('data_fim')
     
-    config = Configuracao.get_config()
+    if not data_inicio or not data_fim:
+        return jsonify({'success': False, 'message': 'Período não informado'}), 400
     
-    pdf_buffer = gerar_relatorio_periodo_pdf(dados_relatorio, config.nome_loja)
+    try:
+        dados_relatorio = dados_periodo(data_inicio, data_fim, request.args.get('detalhe', 'completo'))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Data inválida'}), 400
     
+    config = obter_configuracao()
     filename = f"relatorio_{data_inicio}_{data_fim}.pdf"
     
-    return Response(
-        pdf_buffer.getvalue(),
+    # O PDF vai para um arquivo temporário (apagado ao fechar) e é enviado dele
+    arquivo = tempfile.TemporaryFile()
+    try:
+        gerar_relatorio_periodo_pdf(dados_relatorio, config.nome_loja, destino=arquivo)
+    except Exception:
+        arquivo.close()
+        raise
+    
+    resposta = send_file(
+        arquivo,
         mimetype='application/pdf',
-        headers={
-            'Content-Disposition': f'attachment; filename={filename}',
-            'Content-Type': 'application/pdf'
-        }
+        as_attachment=True,
+        download_name=filename
     )
+    resposta.content_length = os.fstat(arquivo.fileno()).st_size
+    return resposta
 
 
 @api_bp.route('/relatorio/resumo-diario/pdf', methods=['GET'])
@@ -955,63 +995,9 @@ def resumo_diario_pdf():
     """Gerar PDF do resumo diário"""
     data_str = request.args.get('data', datetime.now().strftime('%Y-%m-%d'))
     
-    try:
-        data = datetime.strptime(data_str, '%Y-%m-%d').date()
-    except:
-        data = datetime.now().date()
+    data_resumo = dados_resumo_diario(data_str)
     
-    inicio_dia = datetime.combine(data, datetime.min.time())
-    fim_dia = datetime.combine(data, datetime.max.time())
-    
-    lancamentos = Lancamento.query.filter(
-        Lancamento.data_hora >= inicio_dia,
-        Lancamento.data_hora <= fim_dia
-    ).order_by(Lancamento.data_hora).all()
-    
-    vendas_dinheiro = 0
-    vendas_pix = 0
-    vendas_cartao_credito = 0
-    vendas_cartao_debito = 0
-    total_sangrias = 0
-    total_suprimentos = 0
-    
-    for lanc in lancamentos:
-        if lanc.estorno:
-            continue
-        if lanc.categoria == 'venda':
-            forma = (lanc.forma_pagamento or '').lower()
-            if 'dinheiro' in forma:
-                vendas_dinheiro += lanc.valor
-            elif 'pix' in forma:
-                vendas_pix += lanc.valor
-            elif 'crédito' in forma or 'credito' in forma:
-                vendas_cartao_credito += lanc.valor
-            elif 'débito' in forma or 'debito' in forma:
-                vendas_cartao_debito += lanc.valor
-        elif lanc.categoria == 'sangria':
-            total_sangrias += lanc.valor
-        elif lanc.categoria == 'suprimento':
-            total_suprimentos += lanc.valor
-    
-    total_vendas = vendas_dinheiro + vendas_pix + vendas_cartao_credito + vendas_cartao_debito
-    
-    data_resumo = {
-        'data': data_str,
-        'total_vendas': total_vendas,
-        'vendas': {
-            'dinheiro': vendas_dinheiro,
-            'pix': vendas_pix,
-            'cartao_credito': vendas_cartao_credito,
-            'cartao_debito': vendas_cartao_debito
-        },
-        'movimentacoes': {
-            'sangrias': total_sangrias,
-            'suprimentos': total_suprimentos
-        },
-        'lancamentos': [l.to_dict() for l in lancamentos]
-    }
-    
-    config = Configuracao.get_config()
+    config = obter_configuracao()
     
     pdf_buffer = gerar_resumo_diario_pdf(data_resumo, config.nome_loja)
     
@@ -1025,3 +1011,78 @@ def resumo_diario_pdf():
             'Content-Type': 'application/pdf'
         }
     )
+
+
+# ===== API - FILA DE RELATÓRIOS =====
+
+def _pedido_dict(pedido):
+    dados = pedido.to_dict()
+    dados['url'] = f'/api/relatorio/fila/{pedido.id}'
+    if pedido.status == 'pendente':
+        dados['posicao'] = posicao(pedido)
+    if pedido.status == 'pronto':
+        dados['url_arquivo'] = f'/api/relatorio/fila/{pedido.id}/arquivo'
+    return dados
+
+
+@api_bp.route('/relatorio/fila', methods=['POST'])
+def pedir_relatorio():
+    """
+    Pede um PDF à fila de relatórios (gerado fora dos workers do servidor).
+    Body: tipo (periodo, resumo_diario, caixa, cupom) e os parâmetros do tipo.
+    Responde 202 com o pedido; 503 se a fila estiver parada ou cheia.
+    """
+    data = request.json or {}
+    
+    if not fila_ativa():
+        return jsonify({'success': False, 'message': 'Fila de relatórios parada'}), 503
+    
+    try:
+        parametros = validar_parametros(data.get('tipo'), data)
+        pedido = enfileirar(data['tipo'], parametros)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except FilaCheia as e:
+        return jsonify({'success': False, 'message': str(e)}), 503
+    
+    resposta = jsonify({'success': True, 'pedido': _pedido_dict(pedido)})
+    return resposta, 202, {'Location': f'/api/relatorio/fila/{pedido.id}'}
+
+
+@api_bp.route('/relatorio/fila/<int:id>', methods=['GET'])
+def status_pedido_relatorio(id):
+    """Situação de um pedido da fila (pendente, processando, pronto, erro)"""
+    pedido = db.session.get(RelatorioPedido, id)
+    
+    if not pedido:
+        return jsonify({'success': False, 'message': 'Pedido não encontrado ou expirado'}), 404
+    
+    resposta = jsonify({'success': True, 'pedido': _pedido_dict(pedido)})
+    resposta.headers['Cache-Control'] = 'no-store'
+    return resposta
+
+
+@api_bp.route('/relatorio/fila/<int:id>/arquivo', methods=['GET'])
+def arquivo_pedido_relatorio(id):
+    """PDF de um pedido pronto"""
+    pedido = db.session.get(RelatorioPedido, id)
+    
+    if not pedido:
+        return jsonify({'success': False, 'message': 'Pedido não encontrado ou expirado'}), 404
+    
+    if pedido.status != 'pronto':
+        return jsonify({
+            'success': False,
+            'message': 'Relatório ainda não está pronto' if pedido.status != 'erro' else pedido.erro,
+            'pedido': _pedido_dict(pedido)
+        }), 409
+    
+    try:
+        return send_file(
+            caminho_arquivo(pedido.id),
+            mimetype='application/pdf',
+            as_attachment=pedido.tipo != 'cupom',
+            download_name=pedido.nome_arquivo
+        )
+    except FileNotFoundError:
+        return jsonify({'success': False, 'message': 'Arquivo do relatório não encontrado'}), 410
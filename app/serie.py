@@ -0,0 +1,159 @@
+"""
+Séries temporais do painel do gerente (/api/gerente/serie)
+
+Buckets de dia, semana e mês somam as linhas do resumo diário (uma consulta
+agrupada por data); buckets de hora agrupam os lançamentos do período por
+hora numa única consulta. O número de buckets é limitado para que nenhum
+pedido vire uma varredura sem fim.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from app.models import db, Lancamento, ResumoDiario
+from app.agregacao import CLASSES_VENDA, classificar_forma, consultar_grupos
+from app.resumo_diario import COLUNAS
+from app.dinheiro import para_reais
+
+BUCKETS = ('hour', 'day', 'week', 'month')
+MAX_BUCKETS = 400
+
+
+def _inicio_bucket(momento, bucket):
+    """Início do bucket que contém momento (date para dia/semana/mês, datetime para hora)"""
+    if bucket == 'hour':
+        return momento.replace(minute=0, second=0, microsecond=0)
+    if bucket == 'week':
+        return momento - timedelta(days=momento.weekday())  # semana começa na segunda
+    if bucket == 'month':
+        return momento.replace(day=1)
+    return momento
+
+
+def _proximo_bucket(inicio, bucket):
+    if bucket == 'hour':
+        return inicio + timedelta(hours=1)
+    if bucket == 'week':
+        return inicio + timedelta(days=7)
+    if bucket == 'month':
+        return (inicio.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return inicio + timedelta(days=1)
+
+
+def listar_buckets(data_inicio, data_fim, bucket):
+    """Inícios de todos os buckets do período (data_inicio e data_fim inclusive)"""
+    if bucket == 'hour':
+        atual = datetime.combine(data_inicio, datetime.min.time())
+        fim = datetime.combine(data_fim, datetime.max.time())
+    else:
+        atual = _inicio_bucket(data_inicio, bucket)
+        fim = data_fim
+
+    buckets = []
+    while atual <= fim:
+        buckets.append(atual)
+        if len(buckets) > MAX_BUCKETS:
+            raise ValueError(f"Período grande demais para o bucket '{bucket}' (máx. {MAX_BUCKETS} pontos)")
+        atual = _proximo_bucket(atual, bucket)
+    return buckets
+
+
+def _somas_por_dia(data_inicio, data_fim):
+    colunas = [func.sum(getattr(ResumoDiario, coluna)).label(coluna) for coluna in COLUNAS]
+    linhas = db.session.query(ResumoDiario.data, *colunas).filter(
+        ResumoDiario.data >= data_inicio,
+        ResumoDiario.data <= data_fim
+    ).group_by(ResumoDiario.data).all()
+
+    for linha in linhas:
+        yield linha.data, {coluna: int(getattr(linha, coluna) or 0) for coluna in COLUNAS}
+
+
+def _hora(coluna):
+    """Expressão que trunca a data/hora na hora cheia, por dialeto"""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return func.date_trunc('hour', coluna)
+    return func.strftime('%Y-%m-%d %H:00:00', coluna)
+
+
+def _somas_por_hora(data_inicio, data_fim):
+    """Mesmas colunas do resumo diário, calculadas dos lançamentos por hora"""
+    grupos = consultar_grupos(
+        Lancamento.data_hora >= datetime.combine(data_inicio, datetime.min.time()),
+        Lancamento.data_hora <= datetime.combine(data_fim, datetime.max.time()),
+        por=_hora(Lancamento.data_hora)
+    )
+
+    for grupo in grupos:
+        hora = grupo.grupo
+        if isinstance(hora, str):
+            hora = datetime.fromisoformat(hora)
+        classe = classificar_forma(grupo.forma_pagamento)
+
+        valores = dict.fromkeys(COLUNAS, 0)
+        valores[f'vendas_{classe}'] = grupo.vendas
+        valores['qtd_vendas'] = grupo.qtd_vendas
+        valores['sangrias'] = grupo.sangrias
+        valores['qtd_sangrias'] = grupo.qtd_sangrias
+        valores['suprimentos'] = grupo.suprimentos
+        valores['qtd_suprimentos'] = grupo.qtd_suprimentos
+        valores['outros_entrada'] = grupo.outros_entrada
+        valores['outros_saida'] = grupo.outros_saida
+        valores['estornos'] = grupo.estornos
+        valores['qtd_estornos'] = grupo.qtd_estornos
+        valores['qtd_lancamentos'] = grupo.qtd_lancamentos
+        if classe == 'dinheiro':
+            valores['troco_dado'] = grupo.troco
+            valores['estornos_dinheiro'] = grupo.estornos
+        yield hora, valores
+
+
+def _ponto(inicio, valores):
+    vendas = {classe: valores[f'vendas_{classe}'] for classe in CLASSES_VENDA}
+    total = sum(vendas.values())
+    qtd_vendas = valores['qtd_vendas']
+
+    return {
+        'inicio': inicio.isoformat(),
+        'total_vendas': para_reais(total),
+        'vendas': {classe: para_reais(valor) for classe, valor in vendas.items()},
+        'qtd_vendas': qtd_vendas,
+        'ticket_medio': para_reais(round(total / qtd_vendas)) if qtd_vendas else 0,
+        'movimentacoes': {
+            coluna: para_reais(valores[coluna])
+            for coluna in ('sangrias', 'suprimentos', 'troco_dado', 'outros_entrada',
+                           'outros_saida', 'estornos')
+        },
+        'qtd_lancamentos': valores['qtd_lancamentos'],
+    }
+
+
+def gerar_serie(data_inicio, data_fim, bucket='day'):
+    """
+    Série de data_inicio a data_fim (inclusive) agrupada por bucket, com
+    todos os buckets presentes (zerados quando não houve movimento).
+    Levanta ValueError para bucket desconhecido ou período grande demais.
+
+    Returns:
+        (lista de pontos, total de vendas do período em centavos)
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"Bucket inválido: {bucket} (use {', '.join(BUCKETS)})")
+    if data_fim < data_inicio:
+        raise ValueError('Data final anterior à inicial')
+
+    buckets = listar_buckets(data_inicio, data_fim, bucket)
+    acumulado = {inicio: dict.fromkeys(COLUNAS, 0) for inicio in buckets}
+
+    if bucket == 'hour':
+        somas = _somas_por_hora(data_inicio, data_fim)
+    else:
+        somas = _somas_por_dia(data_inicio, data_fim)
+
+    for momento, valores in somas:
+        destino = acumulado[_inicio_bucket(momento, bucket)]
+        for coluna, valor in valores.items():
+            destino[coluna] += valor
+
+    total = sum(
+        valores[f'vendas_{classe}'] for valores in acumulado.values() for classe in CLASSES_VENDA
+    )
+    return [_ponto(inicio, acumulado[inicio]) for inicio in buckets], total
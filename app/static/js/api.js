@@ -5,13 +5,32 @@
 
 var API_BASE = '/api';
 
+// Ultima resposta (ETag + JSON) de cada leitura versionada; o servidor
+// responde 304 sem corpo quando nada mudou desde entao
+var respostasVersionadas = {};
+
+function buscarVersionado(url) {
+    var anterior = respostasVersionadas[url];
+    var opcoes = anterior ? { headers: { 'If-None-Match': anterior.etag } } : {};
+
+    return fetch(url, opcoes).then(function(res) {
+        if (res.status === 304 && anterior) {
+            return anterior.dados;
+        }
+        return res.json().then(function(dados) {
+            var etag = res.headers.get('ETag');
+            if (etag && res.ok) {
+                respostasVersionadas[url] = { etag: etag, dados: dados };
+            }
+            return dados;
+        });
+    });
+}
+
 var API = {
     // Configuracao
     getConfiguracao: function() {
-        return fetch(API_BASE + '/configuracao')
-            .then(function(res) {
-                return res.json();
-            });
+        return buscarVersionado(API_BASE + '/configuracao');
     },
     
     updateConfiguracao: function(data) {
@@ -26,10 +45,7 @@ var API = {
     
     // Caixa
     caixaStatus: function() {
-        return fetch(API_BASE + '/caixa/status')
-            .then(function(res) {
-                return res.json();
-            });
+        return buscarVersionado(API_BASE + '/caixa/status');
     },
     
     abrirCaixa: function(data) {
@@ -53,10 +69,7 @@ var API = {
     },
     
     painelCaixa: function() {
-        return fetch(API_BASE + '/caixa/painel')
-            .then(function(res) {
-                return res.json();
-            });
+        return buscarVersionado(API_BASE + '/caixa/painel');
     },
     
     resumoFechamento: function() {
@@ -77,6 +90,17 @@ var API = {
         });
     },
     
+    // Lancamentos feitos sem conexao: [{chave, tipo, categoria, valor, data_hora, ...}]
+    enviarLote: function(lancamentos) {
+        return fetch(API_BASE + '/lancamentos/lote', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ lancamentos: lancamentos })
+        }).then(function(res) {
+            return res.json();
+        });
+    },
+    
     deletarLancamento: function(id) {
         return fetch(API_BASE + '/lancamento/' + id, {
             method: 'DELETE'
@@ -98,10 +122,7 @@ var API = {
     listarCaixas: function(filtros) {
         filtros = filtros || {};
         var params = new URLSearchParams(filtros);
-        return fetch(API_BASE + '/caixas?' + params.toString())
-            .then(function(res) {
-                return res.json();
-            });
+        return buscarVersionado(API_BASE + '/caixas?' + params.toString());
     },
     
     detalhesCaixa: function(id) {
@@ -118,5 +139,38 @@ var API = {
             .then(function(res) {
                 return res.json();
             });
+    },
+    
+    // Fila de relatorios em PDF (status 503: fila parada ou cheia)
+    pedirRelatorio: function(data) {
+        return fetch(API_BASE + '/relatorio/fila', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(data)
+        }).then(function(res) {
+            return res.json().then(function(dados) {
+                dados.status = res.status;
+                return dados;
+            });
+        });
+    },
+    
+    pedidoRelatorio: function(id) {
+        return fetch(API_BASE + '/relatorio/fila/' + id)
+            .then(function(res) {
+                return res.json();
+            });
+    },
+    
+    // Cupom direto na impressora em rede (status 503: nenhuma configurada)
+    imprimirCupom: function(caixaId) {
+        return fetch(API_BASE + '/relatorio/caixa/' + caixaId + '/cupom/imprimir', {
+            method: 'POST'
+        }).then(function(res) {
+            return res.json().then(function(dados) {
+                dados.status = res.status;
+                return dados;
+            });
+        });
     }
 };
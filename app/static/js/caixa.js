@@ -738,6 +738,7 @@ function confirmarVenda() {
     }
     
     var dados = {
+        caixa_id: caixaAtual ? caixaAtual.id : null,
         tipo: 'entrada',
         categoria: 'venda',
         forma_pagamento: formaSelecionada,
@@ -831,6 +832,7 @@ function confirmarSangria() {
     }
     
     var dados = {
+        caixa_id: caixaAtual ? caixaAtual.id : null,
         tipo: 'saida',
         categoria: 'sangria',
         valor: valor,
@@ -903,6 +905,7 @@ function confirmarSuprimento() {
     }
     
     var dados = {
+        caixa_id: caixaAtual ? caixaAtual.id : null,
         tipo: 'entrada',
         categoria: 'suprimento',
         valor: valor,
@@ -993,6 +996,7 @@ function confirmarOutros() {
     }
     
     var dados = {
+        caixa_id: caixaAtual ? caixaAtual.id : null,
         tipo: tipoOutros,
         categoria: 'outros',
         valor: valor,
@@ -1244,11 +1248,14 @@ function atualizarPrevisaoFechamento(elemento) {
 function carregarUltimosLancamentos() {
     if (!caixaAtual) return Promise.resolve();
     
-    return API.listarLancamentos({ caixa_id: caixaAtual.id })
+    return API.listarLancamentos({
+        caixa_id: caixaAtual.id,
+        limite: 8, // Ultimos 8
+        fields: 'tipo,categoria,forma_pagamento,descricao,valor'
+    })
         .then(function(resultado) {
             if (resultado.success) {
-                var lancamentos = resultado.lancamentos.slice(0, 8); // Ultimos 8
-                renderizarLancamentos(lancamentos);
+                renderizarLancamentos(resultado.lancamentos);
             }
         })
         .catch(function(error) {
@@ -0,0 +1,112 @@
+/**
+ * Eventos do servidor (Server-Sent Events) - ES5 Compativel
+ *
+ * Uma unica conexao por pagina em /api/eventos, compartilhada por todos os
+ * assinantes. Sem EventSource (ou com o servidor recusando a conexao), volta
+ * ao polling no intervalo informado. Abas em segundo plano fecham a conexao
+ * e atualizam uma vez ao voltar.
+ */
+
+var Eventos = (function() {
+    var ESPERA_AGRUPAR = 300;  // varios eventos seguidos -> uma atualizacao
+
+    var assinantes = [];
+    var fonte = null;
+    var tiposRegistrados = {};
+    var emPolling = false;
+
+    function notificar(assinante) {
+        if (assinante.timer) return;
+        assinante.timer = setTimeout(function() {
+            assinante.timer = null;
+            assinante.callback();
+        }, ESPERA_AGRUPAR);
+    }
+
+    function registrarTipo(tipo) {
+        if (!fonte || tiposRegistrados[tipo]) return;
+        tiposRegistrados[tipo] = true;
+        fonte.addEventListener(tipo, function() {
+            for (var i = 0; i < assinantes.length; i++) {
+                if (assinantes[i].tipos.indexOf(tipo) !== -1) {
+                    notificar(assinantes[i]);
+                }
+            }
+        });
+    }
+
+    function iniciarPolling() {
+        if (emPolling) return;
+        emPolling = true;
+        for (var i = 0; i < assinantes.length; i++) {
+            agendarPolling(assinantes[i]);
+        }
+    }
+
+    function agendarPolling(assinante) {
+        if (assinante.intervaloId || !assinante.intervalo) return;
+        assinante.intervaloId = setInterval(assinante.callback, assinante.intervalo);
+    }
+
+    function conectar() {
+        if (fonte || emPolling) return;
+        if (typeof window.EventSource === 'undefined') {
+            iniciarPolling();
+            return;
+        }
+
+        fonte = new EventSource('/api/eventos');
+        tiposRegistrados = {};
+        fonte.onerror = function() {
+            // CLOSED: o servidor respondeu com erro e o navegador desistiu
+            if (fonte && fonte.readyState === 2) {
+                fonte = null;
+                iniciarPolling();
+            }
+        };
+        for (var i = 0; i < assinantes.length; i++) {
+            for (var j = 0; j < assinantes[i].tipos.length; j++) {
+                registrarTipo(assinantes[i].tipos[j]);
+            }
+        }
+    }
+
+    function desconectar() {
+        if (fonte) {
+            fonte.close();
+            fonte = null;
+        }
+    }
+
+    document.addEventListener('visibilitychange', function() {
+        if (emPolling) return;
+        if (document.hidden) {
+            desconectar();
+        } else if (assinantes.length) {
+            conectar();
+            for (var i = 0; i < assinantes.length; i++) {
+                notificar(assinantes[i]);
+            }
+        }
+    });
+
+    return {
+        /**
+         * Chama callback quando chegar algum evento dos tipos informados.
+         * intervalo (ms): polling de reserva quando nao ha conexao de eventos.
+         */
+        assinar: function(tipos, callback, intervalo) {
+            var assinante = { tipos: tipos, callback: callback, intervalo: intervalo, timer: null, intervaloId: null };
+            assinantes.push(assinante);
+
+            if (emPolling) {
+                agendarPolling(assinante);
+            } else if (!document.hidden) {
+                conectar();
+                for (var i = 0; i < tipos.length; i++) {
+                    registrarTipo(tipos[i]);
+                }
+            }
+        }
+    };
+})();
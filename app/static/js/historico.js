@@ -55,6 +55,9 @@ function mostrarTabHistorico(tab) {
     }
 }
 
+// Colunas usadas na tabela e no CSV de lancamentos
+var CAMPOS_HISTORICO = 'data_hora,tipo,categoria,forma_pagamento,descricao,valor';
+
 // Filtros de Lancamentos
 function aplicarFiltroLancamentos() {
     var periodoEl = document.getElementById('filtroLancPeriodo');
@@ -97,9 +100,16 @@ function aplicarFiltroLancamentos() {
     if (tipo) filtros.tipo = tipo;
     if (categoria) filtros.categoria = categoria;
     
+    filtros.fields = CAMPOS_HISTORICO;
+    window.filtrosLancamentos = filtros;
+    
+    // Primeira pagina traz tambem a quantidade e os totais do periodo inteiro
+    filtros.contar = 1;
     API.listarLancamentos(filtros)
         .then(function(resultado) {
             if (resultado.success) {
+                window.totaisLancamentos = resultado.total;
+                window.proximoCursorLancamentos = resultado.proximo_cursor;
                 renderizarResultadosLancamentos(resultado.lancamentos);
             } else {
                 mostrarErro('Erro ao buscar lancamentos');
@@ -111,6 +121,31 @@ function aplicarFiltroLancamentos() {
         });
 }
 
+// Busca a proxima pagina (cursor) e acrescenta na tabela
+function carregarMaisLancamentos() {
+    if (!window.proximoCursorLancamentos || !window.filtrosLancamentos) return;
+    
+    var filtros = {};
+    for (var chave in window.filtrosLancamentos) {
+        if (chave !== 'contar') filtros[chave] = window.filtrosLancamentos[chave];
+    }
+    filtros.cursor = window.proximoCursorLancamentos;
+    
+    API.listarLancamentos(filtros)
+        .then(function(resultado) {
+            if (resultado.success) {
+                window.proximoCursorLancamentos = resultado.proximo_cursor;
+                renderizarResultadosLancamentos(window.lancamentosAtual.concat(resultado.lancamentos));
+            } else {
+                mostrarErro('Erro ao buscar lancamentos');
+            }
+        })
+        .catch(function(error) {
+            console.error('Erro ao buscar lancamentos:', error);
+            mostrarErro('Erro ao buscar lancamentos');
+        });
+}
+
 function renderizarResultadosLancamentos(lancamentos) {
     var container = document.getElementById('resultadosLancamentos');
     if (!container) return;
@@ -120,17 +155,9 @@ function renderizarResultadosLancamentos(lancamentos) {
         return;
     }
     
-    var totalEntradas = 0;
-    var totalSaidas = 0;
-    
-    for (var i = 0; i < lancamentos.length; i++) {
-        var l = lancamentos[i];
-        if (l.tipo === 'entrada') {
-            totalEntradas += l.valor;
-        } else {
-            totalSaidas += l.valor;
-        }
-    }
+    var totais = window.totaisLancamentos || { quantidade: lancamentos.length, entradas: 0, saidas: 0 };
+    var totalEntradas = totais.entradas;
+    var totalSaidas = totais.saidas;
     
     var linhasHtml = '';
     for (var j = 0; j < lancamentos.length; j++) {
@@ -152,7 +179,7 @@ function renderizarResultadosLancamentos(lancamentos) {
     var html = '<div class="painel-resumo mb-2">' +
         '<div class="resumo-item">' +
             '<div class="resumo-label">Total de Lancamentos</div>' +
-            '<div class="resumo-valor">' + lancamentos.length + '</div>' +
+            '<div class="resumo-valor">' + totais.quantidade + '</div>' +
         '</div>' +
         '<div class="resumo-item">' +
             '<div class="resumo-label">Total Entradas</div>' +
@@ -183,6 +210,13 @@ function renderizarResultadosLancamentos(lancamentos) {
         '</table>' +
     '</div>';
     
+    if (window.proximoCursorLancamentos) {
+        html += '<div class="form-actions">' +
+            '<span>Exibindo ' + lancamentos.length + ' de ' + totais.quantidade + '</span>' +
+            '<button onclick="carregarMaisLancamentos()" class="btn btn-secondary">Carregar mais</button>' +
+        '</div>';
+    }
+    
     container.innerHTML = html;
     window.lancamentosAtual = lancamentos;
 }
@@ -193,6 +227,17 @@ function exportarLancamentosCSV() {
         return;
     }
     
+    // Resultado maior que as paginas carregadas: o servidor gera o CSV completo
+    if (window.proximoCursorLancamentos && window.filtrosLancamentos) {
+        var filtros = {};
+        for (var chave in window.filtrosLancamentos) {
+            if (chave !== 'contar') filtros[chave] = window.filtrosLancamentos[chave];
+        }
+        filtros.formato = 'csv';
+        window.location.href = '/api/exportar/lancamentos?' + new URLSearchParams(filtros).toString();
+        return;
+    }
+    
     var colunas = [
         { campo: 'data_hora', titulo: 'Data/Hora', formato: 'dataHora' },
         { campo: 'tipo', titulo: 'Tipo' },
@@ -206,18 +251,22 @@ function exportarLancamentosCSV() {
     exportarCSV(window.lancamentosAtual, colunas, nomeArquivo);
 }
 
-// Listar Caixas
-function listarCaixas() {
+// Listar Caixas (paginado no servidor)
+function listarCaixas(pagina) {
     var statusEl = document.getElementById('filtroCaixaStatus');
+    var dataInicioEl = document.getElementById('filtroCaixaDataInicio');
+    var dataFimEl = document.getElementById('filtroCaixaDataFim');
     var status = statusEl ? statusEl.value : '';
     
-    var filtros = {};
+    var filtros = { pagina: pagina || 1 };
     if (status) filtros.status = status;
+    if (dataInicioEl && dataInicioEl.value) filtros.data_inicio = dataInicioEl.value;
+    if (dataFimEl && dataFimEl.value) filtros.data_fim = dataFimEl.value;
     
     API.listarCaixas(filtros)
         .then(function(resultado) {
             if (resultado.success) {
-                renderizarResultadosCaixas(resultado.caixas);
+                renderizarResultadosCaixas(resultado.caixas, resultado.paginacao);
             } else {
                 mostrarErro('Erro ao buscar caixas');
             }
@@ -228,7 +277,22 @@ function listarCaixas() {
         });
 }
 
-function renderizarResultadosCaixas(caixas) {
+function renderizarPaginacaoCaixas(paginacao) {
+    if (!paginacao || paginacao.paginas <= 1) return '';
+    
+    var pagina = paginacao.pagina;
+    var html = '<div class="form-actions">';
+    if (pagina > 1) {
+        html += '<button onclick="listarCaixas(' + (pagina - 1) + ')" class="btn btn-secondary">&laquo; Anterior</button>';
+    }
+    html += '<span>Pagina ' + pagina + ' de ' + paginacao.paginas + ' (' + paginacao.total + ' caixas)</span>';
+    if (pagina < paginacao.paginas) {
+        html += '<button onclick="listarCaixas(' + (pagina + 1) + ')" class="btn btn-secondary">Proxima &raquo;</button>';
+    }
+    return html + '</div>';
+}
+
+function renderizarResultadosCaixas(caixas, paginacao) {
     var container = document.getElementById('resultadosCaixas');
     if (!container) return;
     
@@ -272,7 +336,8 @@ function renderizarResultadosCaixas(caixas) {
             '</thead>' +
             '<tbody>' + linhasHtml + '</tbody>' +
         '</table>' +
-    '</div>';
+    '</div>' +
+    renderizarPaginacaoCaixas(paginacao);
     
     container.innerHTML = html;
     window.caixasAtual = caixas;
@@ -503,8 +568,68 @@ function exportarRelatorioPDF() {
         return;
     }
     
-    // Abrir PDF em nova aba
-    window.open('/api/relatorio/periodo/pdf?data_inicio=' + dataInicio + 'T00:00:00&data_fim=' + dataFim + 'T23:59:59', '_blank');
+    var inicio = dataInicio + 'T00:00:00';
+    var fim = dataFim + 'T23:59:59';
+    
+    // Abrir PDF em nova aba, gerado pela fila de relatorios
+    abrirRelatorioPelaFila(
+        { tipo: 'periodo', data_inicio: inicio, data_fim: fim },
+        '/api/relatorio/periodo/pdf?data_inicio=' + inicio + '&data_fim=' + fim
+    );
+}
+
+// Pede o PDF a fila (gerado fora do servidor que atende o caixa) e abre
+// quando ficar pronto. A aba e aberta ja no clique, porque os navegadores
+// bloqueiam janelas abertas depois de uma espera. Com a fila parada ou
+// cheia, abre o endereco que gera o PDF direto.
+function abrirRelatorioPelaFila(pedido, urlDireta) {
+    var janela = window.open('', '_blank');
+    if (janela) {
+        janela.document.write('<p style="font-family: sans-serif;">Gerando relatório...</p>');
+    }
+    
+    function abrir(url) {
+        if (janela && !janela.closed) {
+            janela.location.href = url;
+        } else {
+            window.open(url, '_blank');
+        }
+    }
+    
+    function falhar(mensagem) {
+        if (janela) janela.close();
+        mostrarErro(mensagem);
+    }
+    
+    function acompanhar(id) {
+        setTimeout(function() {
+            API.pedidoRelatorio(id).then(function(res) {
+                if (!res.success) {
+                    falhar(res.message || 'Erro ao gerar relatório');
+                } else if (res.pedido.status === 'pronto') {
+                    abrir(res.pedido.url_arquivo);
+                } else if (res.pedido.status === 'erro') {
+                    falhar('Erro ao gerar relatório: ' + res.pedido.erro);
+                } else {
+                    acompanhar(id);
+                }
+            }).catch(function() {
+                acompanhar(id);
+            });
+        }, 1500);
+    }
+    
+    API.pedirRelatorio(pedido).then(function(res) {
+        if (res.success) {
+            acompanhar(res.pedido.id);
+        } else if (res.status === 503) {
+            abrir(urlDireta);
+        } else {
+            falhar(res.message || 'Erro ao pedir relatório');
+        }
+    }).catch(function() {
+        abrir(urlDireta);
+    });
 }
 
 function exportarCaixaPDF(caixaId) {
@@ -512,9 +637,39 @@ function exportarCaixaPDF(caixaId) {
 }
 
 function imprimirCupomTermico(caixaId) {
-    // Abre o cupom termmico em nova aba para impressao
+    // Com impressora em rede configurada no servidor, o cupom vai direto
+    // para ela em ESC/POS. Sem ela (ou se nao responder), abre o cupom
+    // termmico em PDF em nova aba para impressao
     // Otimizado para impressora termica 80mm (Elgin I9)
-    window.open('/api/relatorio/caixa/' + caixaId + '/cupom', '_blank');
+    // A aba e aberta ja no clique (como em abrirRelatorioPelaFila): depois
+    // da resposta do servidor, os navegadores bloqueiam a janela
+    var urlPdf = '/api/relatorio/caixa/' + caixaId + '/cupom';
+    var janela = window.open('', '_blank');
+    if (janela) {
+        janela.document.write('<p style="font-family: sans-serif;">Imprimindo cupom...</p>');
+    }
+    
+    function abrirPdf() {
+        if (janela && !janela.closed) {
+            janela.location.href = urlPdf;
+        } else {
+            window.open(urlPdf, '_blank');
+        }
+    }
+    
+    API.imprimirCupom(caixaId).then(function(res) {
+        if (res.success) {
+            if (janela) janela.close();
+            mostrarSucesso(res.message);
+            return;
+        }
+        if (res.status !== 503) {
+            mostrarErro(res.message || 'Erro ao imprimir cupom');
+        }
+        abrirPdf();
+    }).catch(function() {
+        abrirPdf();
+    });
 }
 
 function exportarResumoDiarioPDF(data) {
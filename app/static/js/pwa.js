@@ -0,0 +1,43 @@
+/**
+ * Registro do service worker (/sw.js) e avisos da fila de lancamentos
+ * feitos sem conexao - ES5 Compativel
+ */
+
+(function() {
+    if (!('serviceWorker' in navigator)) return;
+
+    function avisar(mensagem, tipo) {
+        if (typeof mostrarNotificacao === 'function') {
+            mostrarNotificacao(mensagem, tipo);
+        } else if (typeof mostrarToast === 'function') {
+            mostrarToast(mensagem, tipo === 'erro' ? 'error' : 'success');
+        } else {
+            console.log(mensagem);
+        }
+    }
+
+    window.addEventListener('load', function() {
+        navigator.serviceWorker.register('/sw.js').catch(function(error) {
+            console.error('Erro ao registrar service worker:', error);
+        });
+    });
+
+    // Conexao de volta: envia o que ficou na fila sem esperar outra acao
+    window.addEventListener('online', function() {
+        if (navigator.serviceWorker.controller) {
+            navigator.serviceWorker.controller.postMessage('esvaziar-fila');
+        }
+    });
+
+    navigator.serviceWorker.addEventListener('message', function(event) {
+        var dados = event.data || {};
+        if (dados.tipo !== 'fila') return;
+
+        if (dados.mensagem) {
+            var pendentes = dados.pendentes ? ' (' + dados.pendentes + ' pendente(s))' : '';
+            avisar(dados.mensagem + pendentes, 'erro');
+        } else if (dados.enviados) {
+            avisar(dados.enviados + ' lançamento(s) feito(s) sem conexão enviado(s)', 'sucesso');
+        }
+    });
+})();
@@ -0,0 +1,338 @@
+/**
+ * Service worker do PDV (servido em /sw.js para controlar todas as paginas)
+ *
+ * - Paginas e arquivos estaticos: resposta do cache na hora e atualizacao em
+ *   segundo plano (stale-while-revalidate); o caixa abre mesmo com rede lenta.
+ * - Leituras da API: rede primeiro; sem conexao, a ultima copia guardada.
+ * - POST /api/lancamento: vai para uma fila no IndexedDB, com o caixa em que
+ *   foi feito. A fila e enviada em ordem por POST /api/lancamentos/lote, com
+ *   uma chave por lancamento (reenvio nao duplica). Com o servidor ao
+ *   alcance, o caixa recebe a resposta dele (inclusive a recusa, se o caixa
+ *   ja foi fechado); sem conexao, responde na hora como pendente. As outras
+ *   chamadas a API esperam a fila ser enviada, para o servidor ver as
+ *   operacoes na ordem em que foram feitas.
+ */
+
+const VERSAO = 'v1';
+const CACHE_APP = 'pdv-app-' + VERSAO;
+const CACHE_API = 'pdv-api-' + VERSAO;
+
+const APP_SHELL = [
+    '/',
+    '/historico',
+    '/configuracoes',
+    '/gerente',
+    '/static/css/style.css',
+    '/static/js/utils.js',
+    '/static/js/api.js',
+    '/static/js/eventos.js',
+    '/static/js/pwa.js',
+    '/static/js/time-sync.js',
+    '/static/js/caixa.js',
+    '/static/js/historico.js',
+    '/static/js/configuracoes.js',
+    '/static/manifest.json',
+    '/static/img/icon-192.png',
+    '/static/img/icon-512.png',
+];
+
+// Leituras da API guardadas para uso sem conexao
+const API_EM_CACHE = ['/api/caixa/', '/api/caixas', '/api/lancamentos', '/api/configuracao', '/api/gerente/'];
+
+// Vao direto para a rede: eventos (SSE), hora do servidor, arquivos gerados
+const API_DIRETA = ['/api/eventos', '/api/time/', '/api/exportar/', '/api/relatorio/'];
+
+const LOTE_MAXIMO = 500;
+// Tempo que o caixa espera a resposta do servidor antes de ver "pendente"
+const ESPERA_ENVIO = 3000;
+// Itens com mais tempo que isso na fila ficaram esperando a conexao
+const ATRASO_AVISO = 5000;
+
+
+// ===== CICLO DE VIDA =====
+
+self.addEventListener('install', (event) => {
+    event.waitUntil(
+        caches.open(CACHE_APP)
+            .then((cache) => cache.addAll(APP_SHELL))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', (event) => {
+    event.waitUntil(
+        caches.keys()
+            .then((nomes) => Promise.all(
+                nomes.filter((nome) => nome !== CACHE_APP && nome !== CACHE_API)
+                    .map((nome) => caches.delete(nome))
+            ))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', (event) => {
+    const requisicao = event.request;
+    const url = new URL(requisicao.url);
+    if (url.origin !== self.location.origin) return;
+
+    if (url.pathname.startsWith('/api/')) {
+        if (API_DIRETA.some((prefixo) => url.pathname.startsWith(prefixo))) return;
+
+        if (url.pathname === '/api/lancamento' && requisicao.method === 'POST') {
+            event.respondWith(enfileirarLancamento(requisicao, event));
+        } else {
+            event.respondWith(chamarApi(requisicao, url));
+        }
+        return;
+    }
+
+    if (requisicao.method === 'GET') {
+        event.respondWith(staleWhileRevalidate(requisicao, event));
+    }
+});
+
+// Pagina avisando que a conexao voltou
+self.addEventListener('message', (event) => {
+    if (event.data === 'esvaziar-fila') {
+        event.waitUntil(esvaziarFila().catch(() => {}));
+    }
+});
+
+// Background Sync, onde o navegador suporta
+self.addEventListener('sync', (event) => {
+    if (event.tag === 'fila-lancamentos') {
+        event.waitUntil(esvaziarFila());
+    }
+});
+
+
+// ===== ESTRATEGIAS =====
+
+function respostaJson(dados, status) {
+    return new Response(JSON.stringify(dados), {
+        status: status || 200,
+        headers: { 'Content-Type': 'application/json' }
+    });
+}
+
+async function staleWhileRevalidate(requisicao, event) {
+    const cache = await caches.open(CACHE_APP);
+    const guardada = await cache.match(requisicao);
+
+    const atualizar = fetch(requisicao).then((resposta) => {
+        if (resposta.ok) {
+            cache.put(requisicao, resposta.clone());
+        }
+        return resposta;
+    });
+
+    if (guardada) {
+        event.waitUntil(atualizar.catch(() => {}));
+        return guardada;
+    }
+    return atualizar;
+}
+
+async function chamarApi(requisicao, url) {
+    // Lancamentos na fila chegam ao servidor antes desta chamada
+    await esvaziarFila().catch(() => {});
+
+    const guardar = requisicao.method === 'GET'
+        && API_EM_CACHE.some((prefixo) => url.pathname.startsWith(prefixo));
+
+    try {
+        const resposta = await fetch(requisicao);
+        if (guardar && resposta.status === 200) {
+            const copia = resposta.clone();
+            caches.open(CACHE_API).then((cache) => cache.put(requisicao, copia));
+        }
+        return resposta;
+    } catch (erro) {
+        if (guardar) {
+            const guardada = await caches.match(requisicao, { cacheName: CACHE_API });
+            if (guardada) return guardada;
+        }
+        return respostaJson({ success: false, offline: true, message: 'Sem conexão com o servidor' }, 503);
+    }
+}
+
+
+// ===== FILA DE LANCAMENTOS (IndexedDB) =====
+
+const BANCO = 'pdv-offline';
+const FILA = 'lancamentos';
+
+function abrirBanco() {
+    return new Promise((resolver, rejeitar) => {
+        const pedido = indexedDB.open(BANCO, 1);
+        pedido.onupgradeneeded = () => {
+            pedido.result.createObjectStore(FILA, { keyPath: 'id', autoIncrement: true });
+        };
+        pedido.onsuccess = () => resolver(pedido.result);
+        pedido.onerror = () => rejeitar(pedido.error);
+    });
+}
+
+async function naFila(modo, operacao) {
+    const banco = await abrirBanco();
+    return new Promise((resolver, rejeitar) => {
+        const transacao = banco.transaction(FILA, modo);
+        const pedido = operacao(transacao.objectStore(FILA));
+        transacao.oncomplete = () => {
+            banco.close();
+            resolver(pedido ? pedido.result : undefined);
+        };
+        transacao.onerror = () => {
+            banco.close();
+            rejeitar(transacao.error);
+        };
+    });
+}
+
+function novaChave() {
+    if (self.crypto && self.crypto.randomUUID) {
+        return self.crypto.randomUUID();
+    }
+    return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2);
+}
+
+async function avisarPaginas(mensagem) {
+    const paginas = await self.clients.matchAll({ type: 'window' });
+    paginas.forEach((pagina) => pagina.postMessage(mensagem));
+}
+
+// Lancamentos cujo resultado vai na resposta ao caixa (sem aviso separado)
+const aguardando = new Set();
+
+function esperar(ms) {
+    return new Promise((resolver) => setTimeout(() => resolver(null), ms));
+}
+
+async function enfileirarLancamento(requisicao, event) {
+    let dados;
+    try {
+        dados = await requisicao.clone().json();
+    } catch (erro) {
+        return fetch(requisicao);
+    }
+    // Incompleto ou sem caixa aberto na tela: o servidor responde na hora
+    // (mensagem de validacao ou "Nao ha caixa aberto")
+    if (!dados || !dados.tipo || !dados.categoria || dados.valor === undefined || !dados.caixa_id) {
+        return chamarApi(requisicao, new URL(requisicao.url));
+    }
+
+    const item = { chave: novaChave(), dados: dados, registrado_em: Date.now() };
+    await naFila('readwrite', (fila) => fila.add(item));
+
+    aguardando.add(item.chave);
+    const envio = enviarItem(item.chave);
+    event.waitUntil(
+        envio.catch(() => {
+            if (self.registration.sync) {
+                return self.registration.sync.register('fila-lancamentos').catch(() => {});
+            }
+        })
+    );
+
+    let resultado = null;
+    try {
+        resultado = await Promise.race([envio, esperar(ESPERA_ENVIO)]);
+    } catch (erro) {
+        // Sem conexao: fica na fila
+    } finally {
+        aguardando.delete(item.chave);
+    }
+
+    if (resultado && resultado.status === 'erro') {
+        return respostaJson({ success: false, message: resultado.mensagem }, 400);
+    }
+
+    return respostaJson({
+        success: true,
+        pendente: !resultado,
+        message: 'Lançamento registrado',
+        lancamento: Object.assign({
+            id: resultado ? resultado.id : null,
+            chave: item.chave,
+            data_hora: new Date().toISOString()
+        }, dados)
+    });
+}
+
+// Resultado do servidor para um item da fila (null se ainda nao enviado)
+async function enviarItem(chave) {
+    // Um envio ja em andamento pode ter lido a fila antes deste item
+    for (let tentativa = 0; tentativa < 2; tentativa++) {
+        const resultados = await esvaziarFila();
+        if (resultados[chave]) return resultados[chave];
+    }
+    return null;
+}
+
+// Um envio por vez; quem chama durante o envio espera o mesmo
+let envioAtual = null;
+
+function esvaziarFila() {
+    if (!envioAtual) {
+        envioAtual = enviarFila().finally(() => {
+            envioAtual = null;
+        });
+    }
+    return envioAtual;
+}
+
+// Envia a fila em lotes; retorna o resultado do servidor por chave
+async function enviarFila() {
+    const resultados = {};
+    let atrasados = 0;
+
+    for (;;) {
+        const itens = await naFila('readonly', (fila) => fila.getAll(undefined, LOTE_MAXIMO));
+        if (!itens.length) break;
+
+        const agora = Date.now();
+        const resposta = await fetch('/api/lancamentos/lote', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                lancamentos: itens.map((item) => Object.assign({}, item.dados, {
+                    // caixa_id vem nos dados: o servidor recusa se esse caixa ja foi fechado
+                    chave: item.chave,
+                    idade_ms: agora - item.registrado_em
+                }))
+            })
+        });
+        const resultado = await resposta.json();
+
+        if (!resposta.ok || !resultado.success) {
+            // Lote recusado inteiro (ex.: erro no servidor). Os itens ficam na fila.
+            await avisarPaginas({ tipo: 'fila', pendentes: itens.length, mensagem: resultado.message });
+            throw new Error(resultado.message);
+        }
+
+        // Criados, duplicados (ja gravados antes) e recusados saem da fila:
+        // recusado (invalido ou de caixa ja fechado) nao e reenviado
+        await naFila('readwrite', (fila) => {
+            itens.forEach((item) => fila.delete(item.id));
+        });
+        resultado.resultados.forEach((r) => {
+            resultados[r.chave] = r;
+        });
+        atrasados += itens.filter((item) => agora - item.registrado_em > ATRASO_AVISO
+            && (resultados[item.chave] || {}).status !== 'erro').length;
+
+        // Quem ainda espera a resposta recebe o erro nela
+        const erros = resultado.resultados.filter((r) => r.status === 'erro' && !aguardando.has(r.chave));
+        if (erros.length) {
+            await avisarPaginas({
+                tipo: 'fila',
+                mensagem: erros.length + ' lançamento(s) recusado(s): ' + erros[0].mensagem
+            });
+        }
+    }
+
+    if (atrasados) {
+        await avisarPaginas({ tipo: 'fila', enviados: atrasados, pendentes: 0 });
+    }
+    return resultados;
+}
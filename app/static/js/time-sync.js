@@ -1,60 +1,125 @@
 /**
  * Gerenciador de Hora Sincronizada
  * Mantém a hora atualizada com o servidor (que sincroniza com API externa)
+ *
+ * Cada sincronização faz algumas trocas com /api/time/current no estilo do
+ * NTP (envio e chegada medidos aqui, recebimento e envio informados pelo
+ * servidor) e fica com a de menor atraso. A hora é extrapolada localmente a
+ * partir de performance.now(), que não muda se o relógio do aparelho for
+ * ajustado; por isso basta sincronizar a cada 30 minutos. Se performance.now()
+ * e Date.now() se afastarem (aparelho suspenso, relógio ajustado), sincroniza
+ * de novo.
  */
 
+// performance.now() em navegadores antigos: cai para Date.now()
+const relogioLocal = (window.performance && typeof performance.now === 'function')
+    ? () => performance.now()
+    : () => Date.now();
+
 class TimeSync {
     constructor() {
-        this.serverTimeOffset = 0; // Diferença entre hora do servidor e cliente
+        this.serverTimeOffset = 0; // Hora do servidor (ms Unix) - relogioLocal()
+        this.delay = null;         // Atraso de rede da melhor amostra (ms)
         this.lastSync = null;
-        this.syncInterval = 5 * 60 * 1000; // Sincronizar a cada 5 minutos
-        this.isInitialized = false;
+        this.syncInterval = 30 * 60 * 1000; // Sincronizar a cada 30 minutos
+        this.retryInterval = 60 * 1000;     // Nova tentativa após falha
+        this.samples = 4;                   // Trocas por sincronização
+        this.onSync = null;                 // callback(info) opcional
+        this.timer = null;
+        this.initPromise = null;
+        this.syncing = null;
+        this.base = null;  // Date.now() - relogioLocal() na sincronização
     }
 
     /**
      * Inicializa o sincronizador
      */
-    async init() {
-        if (this.isInitialized) return;
-        
-        await this.sync();
-        this.isInitialized = true;
-        
-        // Sincronizar periodicamente
-        setInterval(() => this.sync(), this.syncInterval);
-        
-        console.log('✓ TimeSync inicializado');
+    init() {
+        if (!this.initPromise) {
+            this.initPromise = this.sync().then(() => {
+                // Aba que volta do segundo plano com a hora vencida sincroniza de novo
+                document.addEventListener('visibilitychange', () => {
+                    if (!document.hidden && this.isStale()) this.sync();
+                });
+                console.log('✓ TimeSync inicializado');
+            });
+        }
+        return this.initPromise;
+    }
+
+    isStale() {
+        return !this.lastSync || Date.now() - this.lastSync.getTime() > this.syncInterval;
+    }
+
+    schedule(ms) {
+        clearTimeout(this.timer);
+        this.timer = setTimeout(() => this.sync(), ms);
     }
 
     /**
-     * Sincroniza com o servidor
+     * Uma troca com o servidor: t0/t3 locais, t1/t2 do servidor
      */
-    async sync() {
-        try {
-            const clientTimeBefore = Date.now();
-            
-            const response = await fetch(API_BASE + '/time/current');
-            
-            const clientTimeAfter = Date.now();
-            
-            if (response.ok) {
-                const data = await response.json();
-                const serverTime = new Date(data.datetime).getTime();
-                
-                // Calcula tempo médio do cliente (compensa latência)
-                const clientTimeAvg = (clientTimeBefore + clientTimeAfter) / 2;
-                
-                // Calcula offset
-                this.serverTimeOffset = serverTime - clientTimeAvg;
-                this.lastSync = new Date();
-                
-                console.log(`✓ Hora sincronizada. Offset: ${(this.serverTimeOffset / 1000).toFixed(2)}s`);
-                return true;
+    async sample() {
+        const t0 = relogioLocal();
+        const response = await fetch(API_BASE + '/time/current', { cache: 'no-store' });
+        const t3 = relogioLocal();
+        if (!response.ok) throw new Error('HTTP ' + response.status);
+
+        const data = await response.json();
+        const t1 = data.server_receive_ms;
+        const t2 = data.server_transmit_ms;
+        if (typeof t1 !== 'number' || typeof t2 !== 'number') {
+            // Servidor antigo: hora no meio da requisição
+            const serverTime = new Date(data.datetime).getTime();
+            return { offset: serverTime - (t0 + t3) / 2, delay: t3 - t0 };
+        }
+        return {
+            offset: ((t1 - t0) + (t2 - t3)) / 2,
+            delay: Math.max((t3 - t0) - (t2 - t1), 0)
+        };
+    }
+
+    /**
+     * Sincroniza com o servidor (chamadas simultâneas esperam a mesma)
+     */
+    sync() {
+        if (!this.syncing) {
+            this.syncing = this.runSync().finally(() => {
+                this.syncing = null;
+            });
+        }
+        return this.syncing;
+    }
+
+    async runSync() {
+        let best = null;
+        for (let i = 0; i < this.samples; i++) {
+            try {
+                const amostra = await this.sample();
+                if (!best || amostra.delay < best.delay) best = amostra;
+            } catch (error) {
+                console.error('❌ Erro ao sincronizar hora:', error);
+                break;
             }
-        } catch (error) {
-            console.error('❌ Erro ao sincronizar hora:', error);
         }
-        return false;
+
+        if (!best) {
+            // Sem conexão: tenta de novo no timer, não a cada leitura da hora
+            this.base = Date.now() - relogioLocal();
+            this.schedule(this.retryInterval);
+            return false;
+        }
+
+        this.serverTimeOffset = best.offset;
+        this.delay = best.delay;
+        this.base = Date.now() - relogioLocal();
+        this.lastSync = new Date();
+        this.schedule(this.syncInterval);
+
+        const info = { offset: this.now().getTime() - Date.now(), delay: best.delay };
+        console.log(`✓ Hora sincronizada. Offset: ${(info.offset / 1000).toFixed(2)}s ±${(info.delay / 2).toFixed(0)}ms`);
+        if (this.onSync) this.onSync(info);
+        return true;
     }
 
     /**
@@ -63,13 +128,13 @@ class TimeSync {
     now() {
         if (!this.lastSync) {
             // Se nunca sincronizou, usa hora do cliente
-            console.warn('⚠️  Hora não sincronizada, usando hora local');
             return new Date();
         }
-        
-        const clientTime = Date.now();
-        const syncedTime = clientTime + this.serverTimeOffset;
-        return new Date(syncedTime);
+        const local = relogioLocal();
+        if (!this.syncing && Math.abs(Date.now() - local - this.base) > 2000) {
+            this.sync();
+        }
+        return new Date(local + this.serverTimeOffset);
     }
 
     /**
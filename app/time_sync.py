@@ -1,171 +1,461 @@
 """
 Módulo para obter hora sincronizada de Brasília via internet
-Usa a World Time API como fonte confiável
+Usa a World Time API (HTTP) e servidores NTP (SNTP/UDP) como fontes
+
+A sincronização roda numa thread em segundo plano (uma por processo) e
+nunca numa requisição. Cada sincronização consulta todas as fontes ao mesmo
+tempo e usa as primeiras respostas válidas: termina em torno de um tempo de
+ida e volta (RTT) da fonte mais rápida, e não em N x timeout.
+
+Cada medição é convertida, como no NTP, em um deslocamento (theta) entre a
+hora UTC e time.monotonic(), com o atraso da rede como margem de erro
+(metade do RTT). Entre as medições que concordam com a mediana, fica a de
+menor atraso. A hora atual é time.monotonic() + theta, então ajustes no
+relógio do servidor não afetam o resultado. A leitura não usa lock: o
+estado é uma tupla trocada inteira a cada sincronização.
+
+Entre os workers, só um (o que consegue o flock de TIME_SYNC_DIR/lider.lock)
+consulta as fontes; ele grava cada amostra em TIME_SYNC_DIR/hora.json e os
+demais leem o arquivo. Como time.monotonic() é o mesmo relógio para todos os
+processos da máquina, o theta vale para qualquer worker. Se o líder
+terminar, o kernel solta o flock e outro worker assume.
 """
+import json
+import os
+import socket
+import struct
+import statistics
+import tempfile
+import threading
+import time
 import requests
-from datetime import datetime, timedelta
-from threading import Lock
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from threading import Condition, Lock, Thread
+from urllib.parse import urlparse
 import pytz
 
+try:
+    import fcntl
+except ImportError:  # Windows: cada processo sincroniza sozinho
+    fcntl = None
+
+# theta: hora UTC (epoch) - time.monotonic(); atraso: RTT descontado o
+# processamento na fonte; instante: time.monotonic() da medição
+Medicao = namedtuple('Medicao', 'fonte theta atraso instante')
+
+# Resultado de uma sincronização; erro_seconds é a margem (metade do atraso)
+Amostra = namedtuple('Amostra', 'theta instante offset_seconds erro_seconds fonte medicoes')
+
+APIS_PADRAO = [
+    'http://worldtimeapi.org/api/timezone/America/Sao_Paulo',
+    'http://worldtimeapi.org/api/timezone/America/Fortaleza',  # Mesmo fuso
+    'http://worldtimeapi.org/api/timezone/America/Bahia',  # Mesmo fuso
+    'ntp://a.ntp.br',  # NTP.br
+    'ntp://b.ntp.br',
+]
+
+# Segundos entre 1900 (época do NTP) e 1970 (época Unix)
+NTP_EPOCA = 2208988800
+NTP_PORTA = 123
+
+# Medições mais distantes que isso da mediana são descartadas
+TOLERANCIA = 1.0
+# Espera mínima pelas demais fontes depois da primeira resposta
+JANELA = 0.5
+
+DIRETORIO = os.environ.get('TIME_SYNC_DIR') or os.path.join(tempfile.gettempdir(), 'simplescaixa-hora')
+# Intervalo em que os workers que não são o líder releem a amostra
+INTERVALO_LEITURA = 30
+
+
+def _id_boot():
+    """Identifica o boot da máquina (time.monotonic() recomeça a cada boot)"""
+    try:
+        with open('/proc/sys/kernel/random/boot_id') as arquivo:
+            return arquivo.read().strip()
+    except OSError:
+        return None
+
+BOOT = _id_boot()
+
+
+def _ntp_para_epoch(inteiro, fracao):
+    return inteiro - NTP_EPOCA + fracao / 2**32
+
+
+def consultar_sntp(host, porta=NTP_PORTA, timeout=5):
+    """
+    Consulta SNTP (RFC 4330) com as quatro marcas de tempo do NTP.
+    Retorna (theta, atraso) em relação a time.monotonic().
+    """
+    envio_epoch = time.time()
+    pacote = bytearray(48)
+    pacote[0] = 0x23  # LI 0, versão 4, modo 3 (cliente)
+    inteiro = int(envio_epoch) + NTP_EPOCA
+    struct.pack_into('!II', pacote, 40, inteiro, int((envio_epoch % 1) * 2**32))
+
+    endereco = socket.getaddrinfo(host, porta, type=socket.SOCK_DGRAM)[0]
+    with socket.socket(endereco[0], socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        t1 = time.monotonic()
+        sock.sendto(bytes(pacote), endereco[4])
+        while True:
+            resposta, _ = sock.recvfrom(512)
+            t4 = time.monotonic()
+            # Resposta a outro pedido (origem diferente do que enviamos): ignora
+            if len(resposta) >= 48 and resposta[24:32] == bytes(pacote[40:48]):
+                break
+
+    li, modo, estrato = resposta[0] >> 6, resposta[0] & 0x7, resposta[1]
+    if li == 3 or modo not in (4, 5) or not 1 <= estrato <= 15:
+        raise ValueError(f'resposta NTP inválida (li={li}, modo={modo}, estrato={estrato})')
+
+    t2 = _ntp_para_epoch(*struct.unpack_from('!II', resposta, 32))
+    t3 = _ntp_para_epoch(*struct.unpack_from('!II', resposta, 40))
+    theta = ((t2 - t1) + (t3 - t4)) / 2
+    atraso = max((t4 - t1) - (t3 - t2), 0.0)
+    return theta, atraso
+
+
 class BrasiliaTimeSync:
     """
     Gerenciador de horário sincronizado de Brasília
     """
-    def __init__(self):
-        self.cached_time = None
-        self.cached_at = None
-        self.offset_seconds = 0
-        self.cache_duration = 300  # 5 minutos
-        self.lock = Lock()
+    def __init__(self, apis=None, cache_duration=300, timeout=5, amostras=3, diretorio=None):
+        self.amostra = None
+        self.cache_duration = cache_duration  # intervalo entre sincronizações
+        self.retry_interval = 15  # primeira nova tentativa após falha (dobra até cache_duration)
+        self.timeout = timeout
+        self.amostras = amostras  # respostas usadas por sincronização
+        self.lock = Lock()  # uma sincronização por vez
         self.timezone = pytz.timezone('America/Sao_Paulo')
-        
-        # APIs alternativas (fallback)
-        self.apis = [
-            'http://worldtimeapi.org/api/timezone/America/Sao_Paulo',
-            'http://worldtimeapi.org/api/timezone/America/Fortaleza',  # Mesmo fuso
-            'http://worldtimeapi.org/api/timezone/America/Bahia',  # Mesmo fuso
-        ]
-    
-    def get_time_from_api(self):
+
+        # Fontes http(s):// (JSON com 'datetime') ou ntp://host[:porta];
+        # TIME_SYNC_URLS (separadas por vírgula) troca as fontes padrão
+        urls = os.environ.get('TIME_SYNC_URLS')
+        self.apis = apis or ([url.strip() for url in urls.split(',') if url.strip()] if urls else APIS_PADRAO)
+        # hora.json e lider.lock, compartilhados pelos workers
+        self.diretorio = diretorio or DIRETORIO
+
+        self._sinal = Condition()
+        self._pedido = False
+        self._tentativas = 0
+        self._ultimo_resultado = False
+        self._thread = None
+        self._executor = None
+        self._local = threading.local()
+        self._pid = None
+        self._lider = False
+        self._trava = None
+
+    # ===== FONTES =====
+
+    def _sessao(self):
+        """Session HTTP por thread do executor (reaproveita a conexão entre sincronizações)"""
+        sessao = getattr(self._local, 'sessao', None)
+        if sessao is None:
+            sessao = self._local.sessao = requests.Session()
+        return sessao
+
+    def _medir_http(self, url):
+        t1 = time.monotonic()
+        response = self._sessao().get(url, timeout=self.timeout)
+        t4 = time.monotonic()
+        response.raise_for_status()
+
+        # Formato: 2026-01-28T21:30:45.123456-03:00
+        datetime_str = response.json().get('datetime')
+        if not datetime_str:
+            raise ValueError("resposta sem 'datetime'")
+        api_time = datetime.fromisoformat(datetime_str.replace('Z', '+00:00'))
+        if api_time.tzinfo is None:
+            api_time = self.timezone.localize(api_time)
+
+        # Sem as marcas de recebimento/envio da fonte: a hora vale para o meio da requisição
+        return api_time.timestamp() - (t1 + t4) / 2, t4 - t1
+
+    def medir(self, fonte):
+        """Uma medição da fonte (HTTP ou SNTP)"""
+        url = urlparse(fonte)
+        if url.scheme == 'ntp':
+            theta, atraso = consultar_sntp(url.hostname, url.port or NTP_PORTA, self.timeout)
+        else:
+            theta, atraso = self._medir_http(fonte)
+        return Medicao(fonte, theta, atraso, time.monotonic())
+
+    def coletar_medicoes(self):
         """
-        Busca a hora atual da API externa
+        Consulta todas as fontes em paralelo e retorna as primeiras
+        respostas válidas (até self.amostras). Depois da primeira, espera
+        as outras por no máximo max(JANELA, 2 x atraso dela).
         """
-        for api_url in self.apis:
-            try:
-                response = requests.get(api_url, timeout=5)
-                if response.status_code == 200:
-                    data = response.json()
-                    # Formato: 2026-01-28T21:30:45.123456-03:00
-                    datetime_str = data.get('datetime')
-                    if datetime_str:
-                        # Parse ISO format com timezone
-                        api_time = datetime.fromisoformat(datetime_str.replace('Z', '+00:00'))
-                        return api_time
-            except Exception as e:
-                print(f"⚠️  Erro ao buscar hora da API {api_url}: {e}")
-                continue
-        
-        return None
-    
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=len(self.apis), thread_name_prefix='time-sync-fonte')
+
+        pendentes = {self._executor.submit(self.medir, fonte): fonte for fonte in self.apis}
+        aguardando = set(pendentes)
+        medicoes = []
+        limite = time.monotonic() + self.timeout + 1
+        while aguardando and len(medicoes) < self.amostras:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            prontos, aguardando = wait(aguardando, timeout=restante, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                try:
+                    medicao = futuro.result()
+                except Exception as e:
+                    print(f"⚠️  Erro ao buscar hora de {pendentes[futuro]}: {e}")
+                    continue
+                if not medicoes:
+                    # Depois da primeira resposta, as outras têm pouco tempo para chegar
+                    limite = min(limite, time.monotonic() + max(JANELA, 2 * medicao.atraso))
+                medicoes.append(medicao)
+
+        for futuro in aguardando:
+            futuro.cancel()
+        return medicoes[:self.amostras]
+
+    @staticmethod
+    def escolher(medicoes):
+        """Descarta as medições longe da mediana e fica com a de menor atraso"""
+        mediana = statistics.median(m.theta for m in medicoes)
+        concordantes = [m for m in medicoes if abs(m.theta - mediana) <= TOLERANCIA + m.atraso / 2]
+        return min(concordantes or medicoes, key=lambda m: m.atraso)
+
     def sync_time(self):
         """
-        Sincroniza com a API e calcula o offset em relação ao servidor
+        Sincroniza com as fontes e guarda a amostra (chamado pela thread de
+        sincronização)
         """
         with self.lock:
             try:
-                # Marca o tempo do servidor antes da requisição
-                server_time_before = datetime.now()
-                
-                # Busca hora da API
-                api_time = self.get_time_from_api()
-                
-                if api_time:
-                    # Marca o tempo do servidor depois da requisição
-                    server_time_after = datetime.now()
-                    
-                    # Calcula o tempo médio do servidor (compensando latência)
-                    server_time_avg = server_time_before + (server_time_after - server_time_before) / 2
-                    
-                    # Remove timezone info para comparação
-                    if api_time.tzinfo:
-                        api_time_naive = api_time.replace(tzinfo=None)
-                    else:
-                        api_time_naive = api_time
-                    
-                    # Calcula o offset (diferença entre API e servidor)
-                    self.offset_seconds = (api_time_naive - server_time_avg).total_seconds()
-                    
-                    # Atualiza cache
-                    self.cached_time = api_time_naive
-                    self.cached_at = server_time_avg
-                    
-                    print(f"✓ Hora sincronizada com API. Offset: {self.offset_seconds:.2f}s")
-                    return True
-                else:
-                    print("⚠️  Não foi possível sincronizar com nenhuma API")
+                medicoes = self.coletar_medicoes()
+                if not medicoes:
+                    print("⚠️  Não foi possível sincronizar com nenhuma fonte")
                     return False
-                    
+
+                escolhida = self.escolher(medicoes)
+                # Diferença entre a hora medida e o relógio do servidor
+                offset = (time.monotonic() + escolhida.theta) - time.time()
+                self.amostra = Amostra(
+                    escolhida.theta, escolhida.instante, offset,
+                    escolhida.atraso / 2, escolhida.fonte, len(medicoes)
+                )
+                self._publicar(self.amostra)
+                print(f"✓ Hora sincronizada ({escolhida.fonte}). Offset: {offset:.3f}s ±{escolhida.atraso / 2:.3f}s")
+                return True
+
             except Exception as e:
                 print(f"❌ Erro ao sincronizar hora: {e}")
                 return False
-    
+
+    # ===== AMOSTRA COMPARTILHADA ENTRE OS WORKERS =====
+
+    def _publicar(self, amostra):
+        """Grava a amostra para os outros workers (troca atômica do arquivo)"""
+        try:
+            os.makedirs(self.diretorio, exist_ok=True)
+            fd, temporario = tempfile.mkstemp(dir=self.diretorio, suffix='.tmp')
+            with os.fdopen(fd, 'w') as arquivo:
+                json.dump(dict(amostra._asdict(), boot=BOOT), arquivo)
+            os.replace(temporario, os.path.join(self.diretorio, 'hora.json'))
+        except OSError as e:
+            print(f"⚠️  Não foi possível compartilhar a hora sincronizada: {e}")
+
+    def carregar_compartilhada(self):
+        """Lê a amostra do líder; True se havia uma válida para esta máquina"""
+        try:
+            with open(os.path.join(self.diretorio, 'hora.json')) as arquivo:
+                dados = json.load(arquivo)
+        except (OSError, ValueError):
+            return False
+
+        if dados.pop('boot', None) != BOOT or dados.get('instante', 0) > time.monotonic():
+            return False  # De antes do último boot
+        try:
+            amostra = Amostra(**dados)
+        except TypeError:
+            return False  # Formato de outra versão
+
+        atual = self.amostra
+        if atual is None or amostra.instante > atual.instante:
+            self.amostra = amostra
+        return True
+
+    def _tentar_lideranca(self):
+        """True se este processo ficou com o flock de líder (ou se não há flock)"""
+        if fcntl is None:
+            return True
+        try:
+            os.makedirs(self.diretorio, exist_ok=True)
+            trava = open(os.path.join(self.diretorio, 'lider.lock'), 'a')
+        except OSError as e:
+            print(f"⚠️  Hora sem coordenação entre workers ({e}); sincronizando neste processo")
+            return True
+        try:
+            fcntl.flock(trava, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            trava.close()
+            return False
+        self._trava = trava  # Fica aberto enquanto o processo viver
+        return True
+
+    # ===== THREAD DE SINCRONIZAÇÃO =====
+
+    def iniciar(self):
+        """
+        Inicia a thread de sincronização (uma vez por processo). Antes, lê a
+        amostra compartilhada: um worker novo já começa com a hora ajustada.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._sinal:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                # Processo novo (fork): a liderança do pai não vale aqui
+                self._pid = os.getpid()
+                self._lider = False
+                self._trava = None
+            self.carregar_compartilhada()
+            self._thread = Thread(target=self._sincronizar_sempre, daemon=True, name='time-sync')
+            self._thread.start()
+
+    def _idade(self):
+        amostra = self.amostra
+        return None if amostra is None else time.monotonic() - amostra.instante
+
+    def _sincronizar_sempre(self):
+        espera_falha = self.retry_interval
+        forcar = False
+        while True:
+            if not self._lider:
+                self._lider = self._tentar_lideranca()
+
+            idade = self._idade()
+            if self._lider and not forcar and idade is not None and idade < self.cache_duration:
+                # Amostra recente de um líder anterior: só sincroniza quando vencer
+                sucesso, espera = True, self.cache_duration - idade
+            elif self._lider or forcar:
+                sucesso = self.sync_time()
+                if sucesso:
+                    espera = self.cache_duration
+                    espera_falha = self.retry_interval
+                else:
+                    espera = espera_falha
+                    espera_falha = min(espera_falha * 2, self.cache_duration)
+            else:
+                sucesso = self.carregar_compartilhada()
+                espera = INTERVALO_LEITURA
+
+            with self._sinal:
+                self._tentativas += 1
+                self._ultimo_resultado = sucesso
+                self._sinal.notify_all()
+
+                self._sinal.wait_for(lambda: self._pedido, timeout=espera)
+                forcar = self._pedido
+                self._pedido = False
+
+    def solicitar_sincronizacao(self, esperar=0):
+        """
+        Pede uma sincronização à thread. Com esperar (segundos), aguarda o
+        resultado até esse limite e retorna True se ela teve sucesso.
+        """
+        self.iniciar()
+        with self._sinal:
+            alvo = self._tentativas + 1
+            self._pedido = True
+            self._sinal.notify_all()
+            if not esperar:
+                return None
+            if not self._sinal.wait_for(lambda: self._tentativas >= alvo, timeout=esperar):
+                return False
+            return self._ultimo_resultado
+
+    # ===== LEITURA =====
+
     def get_current_time(self, force_sync=False):
         """
         Retorna a hora atual de Brasília sincronizada
-        
+
         Args:
-            force_sync: Força nova sincronização com a API
-            
+            force_sync: Pede nova sincronização em segundo plano (não espera)
+
         Returns:
             datetime: Hora atual de Brasília
         """
-        with self.lock:
-            now = datetime.now()
-            
-            # Verifica se precisa sincronizar
-            needs_sync = (
-                force_sync or
-                self.cached_at is None or
-                (now - self.cached_at).total_seconds() > self.cache_duration
-            )
-            
-            if needs_sync:
-                # Tenta sincronizar em background (não bloqueia se falhar)
-                self.sync_time()
-            
-            # Se tem cache válido, usa o offset calculado
-            if self.cached_at is not None:
-                adjusted_time = now + timedelta(seconds=self.offset_seconds)
-                return adjusted_time
-            
-            # Fallback: retorna hora do servidor
-            return now
-    
+        if force_sync:
+            self.solicitar_sincronizacao()
+
+        amostra = self.amostra
+        if amostra is None:
+            # Fallback: hora do servidor até a primeira sincronização
+            return datetime.now()
+        return datetime.fromtimestamp(time.monotonic() + amostra.theta, self.timezone).replace(tzinfo=None)
+
+    def agora_epoch(self):
+        """Hora sincronizada em segundos Unix (UTC); hora do servidor antes da primeira sincronização"""
+        amostra = self.amostra
+        if amostra is None:
+            return time.time()
+        return time.monotonic() + amostra.theta
+
     def get_current_time_iso(self, force_sync=False):
         """
         Retorna a hora atual em formato ISO string
         """
         return self.get_current_time(force_sync).isoformat()
-    
+
     def get_sync_status(self):
         """
         Retorna informações sobre o status da sincronização
         """
-        with self.lock:
-            if self.cached_at is None:
-                return {
-                    'synchronized': False,
-                    'message': 'Nunca sincronizado',
-                    'using_server_time': True
-                }
-            
-            now = datetime.now()
-            age_seconds = (now - self.cached_at).total_seconds()
-            is_fresh = age_seconds < self.cache_duration
-            
+        amostra = self.amostra
+        if amostra is None:
             return {
-                'synchronized': True,
-                'last_sync': self.cached_at.isoformat(),
-                'age_seconds': age_seconds,
-                'is_fresh': is_fresh,
-                'offset_seconds': self.offset_seconds,
-                'using_server_time': not is_fresh,
-                'message': f'Sincronizado há {age_seconds:.0f}s (offset: {self.offset_seconds:.2f}s)'
+                'synchronized': False,
+                'message': 'Nunca sincronizado',
+                'using_server_time': True
             }
 
+        age_seconds = time.monotonic() - amostra.instante
+        # A thread renova a cada cache_duration; mais que o dobro indica falhas seguidas
+        is_fresh = age_seconds < 2 * self.cache_duration
+        last_sync = datetime.fromtimestamp(amostra.instante + amostra.theta, self.timezone)
+
+        return {
+            'synchronized': True,
+            'last_sync': last_sync.replace(tzinfo=None).isoformat(),
+            'age_seconds': age_seconds,
+            'is_fresh': is_fresh,
+            'offset_seconds': amostra.offset_seconds,
+            'error_seconds': amostra.erro_seconds,
+            'source': amostra.fonte,
+            'samples': amostra.medicoes,
+            'using_server_time': False,
+            'message': f'Sincronizado há {age_seconds:.0f}s (offset: {amostra.offset_seconds:.2f}s ±{amostra.erro_seconds:.3f}s)'
+        }
+
 
 # Instância global singleton
 _time_sync = None
+_time_sync_lock = Lock()
 
 def get_time_sync():
     """
-    Retorna a instância singleton do sincronizador
+    Retorna a instância singleton do sincronizador (a thread de sincronização
+    começa no primeiro uso, já no processo do worker)
     """
     global _time_sync
     if _time_sync is None:
-        _time_sync = BrasiliaTimeSync()
-        # Sincroniza na primeira vez
-        _time_sync.sync_time()
+        with _time_sync_lock:
+            if _time_sync is None:
+                _time_sync = BrasiliaTimeSync()
+    _time_sync.iniciar()
     return _time_sync
 
 
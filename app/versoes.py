@@ -0,0 +1,66 @@
+"""
+ETag das leituras a partir das versões do livro
+
+Cada leitura monta a ETag com uma consulta curta (versão do livro, versão
+do caixa aberto ou da configuração) e responde 304 a quem mandar a mesma
+em If-None-Match, antes de qualquer agregação.
+
+Não existe contador global: toda alteração do livro passa pelo UPDATE dos
+totais de um caixa, que incrementa caixa.versao com a linha do próprio
+caixa travada, ou cria um caixa. A versão do livro é derivada da
+quantidade de caixas e da soma das versões, então caixas diferentes
+gravam sem disputar a mesma linha.
+"""
+import hashlib
+from flask import request, make_response
+from sqlalchemy import select, func
+from app.models import db, Caixa
+
+
+def _etag(*partes):
+    return '-'.join(str(parte) for parte in partes)
+
+
+def versao_livro():
+    """Muda a cada alteração confirmada em qualquer caixa (a soma das versões só cresce)"""
+    quantidade, soma = db.session.execute(
+        select(func.count(Caixa.id), func.coalesce(func.sum(Caixa.versao), 0))
+    ).one()
+    return f'{quantidade}.{soma}'
+
+
+def etag_livro(*partes):
+    """ETag que muda a cada alteração do livro; inclua os parâmetros que mudam a resposta"""
+    parametros = hashlib.sha1(request.query_string).hexdigest()[:12]
+    return _etag('livro', versao_livro(), parametros, *partes)
+
+
+def etag_caixa_aberto():
+    """ETag do caixa aberto (id e versão), pelo índice parcial de status"""
+    linha = db.session.execute(
+        select(Caixa.id, Caixa.versao).where(Caixa.status == 'aberto').limit(1)
+    ).first()
+    if linha is None:
+        return 'sem-caixa'
+    return _etag('caixa', linha.id, linha.versao)
+
+
+def cliente_tem(etag):
+    """True se o cliente mandou esta ETag em If-None-Match"""
+    return request.if_none_match.contains_weak(etag)
+
+
+def nao_modificado(etag):
+    """Resposta 304 (sem corpo) para a ETag"""
+    resposta = make_response('', 304)
+    resposta.set_etag(etag)
+    return resposta
+
+
+def com_etag(resposta, etag):
+    """Marca a resposta com a ETag; o navegador sempre revalida antes de usar"""
+    resposta = make_response(resposta)
+    if resposta.status_code == 200:
+        resposta.set_etag(etag)
+        resposta.headers['Cache-Control'] = 'no-cache'
+    return resposta
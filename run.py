@@ -7,6 +7,11 @@ import os
 app = create_app()
 
 if __name__ == '__main__':
+    # Em desenvolvimento o próprio servidor aplica as migrações
+    from app.migrations import aplicar_migracoes
+    with app.app_context():
+        aplicar_migracoes()
+    
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV') == 'development'
     app.run(host='0.0.0.0', port=port, debug=debug)
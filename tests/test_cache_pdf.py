@@ -0,0 +1,123 @@
+"""
+PDFs de caixas fechados: gerados no fechamento, servidos do disco enquanto
+a versão do caixa não muda e removidos do cache pelo acesso mais antigo.
+"""
+import os
+import threading
+
+import pytest
+
+from app import create_app, cache_pdf, routes
+from app.migrations import aplicar_migracoes
+from app.models import db, Caixa
+from app.lancamento_rapido import esquecer_caixa_aberto
+
+
+@pytest.fixture
+def diretorio(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_pdf, 'DIRETORIO', str(tmp_path / 'pdf'))
+    return tmp_path / 'pdf'
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch, diretorio):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'cache.db'}")
+    app = create_app()
+    with app.app_context():
+        aplicar_migracoes(echo=lambda mensagem: None)
+    esquecer_caixa_aberto()
+    return app
+
+
+@pytest.fixture
+def geracoes(monkeypatch):
+    """Quantas vezes cada tipo de PDF foi gerado (e não lido do cache)"""
+    contagem = {'caixa': 0, 'cupom': 0}
+    original = routes.gerar_pdf_caixa
+
+    def contar(tipo, caixa, nome_loja, destino=None):
+        contagem[tipo] += 1
+        return original(tipo, caixa, nome_loja, destino=destino)
+
+    monkeypatch.setattr(routes, 'gerar_pdf_caixa', contar)
+    return contagem
+
+
+def _caixa_fechado(cliente):
+    cliente.post('/api/caixa/abrir', json={'operador': 'Teste', 'troco_inicial': 0})
+    caixa_id = cliente.get('/api/caixa/status').get_json()['caixa']['id']
+    cliente.post('/api/lancamento', json={
+        'tipo': 'entrada', 'categoria': 'venda', 'valor': 10, 'forma_pagamento': 'PIX'
+    })
+    assert cliente.post('/api/caixa/fechar', json={'valor_contado': 0}).status_code == 200
+    for thread in threading.enumerate():
+        if thread.name == 'pdf-caixa':
+            thread.join()
+    return caixa_id
+
+
+def _pdfs(diretorio):
+    return sorted(nome for nome in os.listdir(diretorio) if nome.endswith('.pdf'))
+
+
+def test_fechamento_gera_e_impressoes_leem_do_disco(app, diretorio, geracoes):
+    cliente = app.test_client()
+    caixa_id = _caixa_fechado(cliente)
+    assert geracoes == {'caixa': 1, 'cupom': 1}
+    assert len(_pdfs(diretorio)) == 2
+
+    for url in (f'/api/relatorio/caixa/{caixa_id}/pdf', f'/api/relatorio/caixa/{caixa_id}/cupom'):
+        resposta = cliente.get(url)
+        assert resposta.status_code == 200
+        assert resposta.data.startswith(b'%PDF')
+        etag = resposta.headers['ETag']
+
+        assert cliente.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    assert geracoes == {'caixa': 1, 'cupom': 1}
+
+
+def test_nova_versao_do_caixa_gera_outro_pdf(app, diretorio, geracoes):
+    cliente = app.test_client()
+    caixa_id = _caixa_fechado(cliente)
+    url = f'/api/relatorio/caixa/{caixa_id}/pdf'
+    etag = cliente.get(url).headers['ETag']
+
+    # Estorno ou exclusão depois do fechamento incrementam a versão
+    with app.app_context():
+        Caixa.query.update({Caixa.versao: Caixa.versao + 1})
+        db.session.commit()
+
+    resposta = cliente.get(url, headers={'If-None-Match': etag})
+    assert resposta.status_code == 200
+    assert resposta.headers['ETag'] != etag
+    assert geracoes['caixa'] == 2
+    assert len(_pdfs(diretorio)) == 3
+
+
+def test_caixa_aberto_nao_usa_cache(app, diretorio, geracoes):
+    cliente = app.test_client()
+    cliente.post('/api/caixa/abrir', json={'operador': 'Teste', 'troco_inicial': 0})
+    caixa_id = cliente.get('/api/caixa/status').get_json()['caixa']['id']
+
+    for _ in range(2):
+        resposta = cliente.get(f'/api/relatorio/caixa/{caixa_id}/pdf')
+        assert resposta.status_code == 200
+        assert 'ETag' not in resposta.headers
+
+    assert geracoes['caixa'] == 2
+    assert not diretorio.exists() or not _pdfs(diretorio)
+
+
+def test_limite_remove_os_acessados_ha_mais_tempo(diretorio):
+    arquivos = [cache_pdf.caminho('caixa', caixa_id, 'x') for caixa_id in (1, 2, 3)]
+    for idade, arquivo in zip((300, 200, 100), arquivos):
+        cache_pdf.guardar(arquivo, b'%PDF' + b'0' * 96)
+        os.utime(arquivo, (0, os.path.getmtime(arquivo) - idade))
+
+    # Ler o mais antigo o torna o mais recente
+    assert cache_pdf.buscar(arquivos[0])
+    cache_pdf.limpar(limite=250)
+
+    assert [os.path.exists(arquivo) for arquivo in arquivos] == [True, False, True]
+    assert not cache_pdf.buscar(arquivos[1])
@@ -0,0 +1,86 @@
+"""
+Quantidade de consultas SQL por endpoint não pode crescer com o número
+de lançamentos (estornos e demais relações vêm na mesma consulta).
+"""
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from app.migrations import aplicar_migracoes
+from app.models import db
+
+TAMANHOS = (5, 60)
+
+ENDPOINTS = (
+    '/api/lancamentos?limite=500',
+    '/api/caixa/{caixa_id}',
+    '/api/gerente/ultimas-movimentacoes?limite=500',
+    '/api/relatorio/caixa/{caixa_id}/pdf',
+    '/api/relatorio/periodo/pdf?data_inicio=2000-01-01&data_fim=2100-12-31',
+)
+
+
+def _montar(diretorio, monkeypatch, quantidade):
+    """App num SQLite novo com um caixa aberto e `quantidade` lançamentos (parte estornada)"""
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{diretorio / f'n1_{quantidade}.db'}")
+    app = create_app()
+    with app.app_context():
+        aplicar_migracoes()
+
+    cliente = app.test_client()
+    resposta = cliente.post('/api/caixa/abrir', json={'operador': 'Teste', 'troco_inicial': 50})
+    assert resposta.status_code == 200, resposta.get_json()
+
+    for i in range(quantidade):
+        categoria, tipo = (('sangria', 'saida') if i % 5 == 4 else ('venda', 'entrada'))
+        resposta = cliente.post('/api/lancamento', json={
+            'tipo': tipo, 'categoria': categoria, 'valor': 10 + i,
+            'forma_pagamento': 'Dinheiro' if i % 2 else 'Pix', 'descricao': f'Item {i}'
+        })
+        lancamento = resposta.get_json()['lancamento']
+        if categoria == 'venda' and i % 3 == 0:
+            resposta = cliente.post('/api/gerente/estornar-venda', json={
+                'lancamento_id': lancamento['id'], 'motivo': 'teste'
+            })
+            assert resposta.status_code == 200, resposta.get_json()
+
+    return app, cliente, lancamento['caixa_id']
+
+
+def _contar_consultas(app, cliente, url):
+    with app.app_context():
+        engine = db.engine
+    consultas = []
+
+    def contar(conn, cursor, statement, *args):
+        consultas.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', contar)
+    try:
+        resposta = cliente.get(url)
+    finally:
+        event.remove(engine, 'before_cursor_execute', contar)
+    assert resposta.status_code == 200, url
+    return len(consultas)
+
+
+@pytest.fixture(scope='module')
+def consultas_por_tamanho(tmp_path_factory):
+    resultado = {}
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        for quantidade in TAMANHOS:
+            app, cliente, caixa_id = _montar(tmp_path_factory.mktemp('n1'), monkeypatch, quantidade)
+            contagem = {}
+            for modelo in ENDPOINTS:
+                url = modelo.format(caixa_id=caixa_id)
+                cliente.get(url)  # configuração e caches do processo já carregados
+                contagem[modelo] = _contar_consultas(app, cliente, url)
+            resultado[quantidade] = contagem
+    return resultado
+
+
+@pytest.mark.parametrize('endpoint', ENDPOINTS)
+def test_consultas_nao_crescem_com_os_lancamentos(consultas_por_tamanho, endpoint):
+    pequeno, grande = (consultas_por_tamanho[q][endpoint] for q in TAMANHOS)
+    assert grande == pequeno, f'{endpoint}: {pequeno} consultas com {TAMANHOS[0]}, {grande} com {TAMANHOS[1]}'
+    assert grande <= 10, f'{endpoint}: {grande} consultas'
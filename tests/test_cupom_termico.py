@@ -0,0 +1,164 @@
+"""
+Cupom térmico: PDF, texto de 48 colunas e ESC/POS saem das mesmas linhas
+(linhas_cupom), em centavos, e o ESC/POS vai por TCP para a impressora.
+"""
+import socket
+import time
+from threading import Thread
+
+import pytest
+
+from app import create_app, cupom_termico, pdf_generator, routes
+from app.cupom_termico import linhas_cupom, gerar_cupom_texto, gerar_cupom_escpos, imprimir
+from app.migrations import aplicar_migracoes
+from app.lancamento_rapido import esquecer_caixa_aberto
+
+CAIXA = {
+    'id': 7, 'operador': 'Ana', 'status': 'fechado',
+    'data_abertura': '2026-01-01T08:00:00', 'data_fechamento': '2026-01-01T18:00:00',
+    'troco_inicial': 100, 'total_entradas': 30.3, 'total_saidas': 0.1, 'saldo_atual': 130.2,
+    'valor_contado': 130.2, 'diferenca': 0.0,
+}
+LANCAMENTOS = [
+    {'tipo': 'entrada', 'categoria': 'venda', 'forma_pagamento': 'Dinheiro', 'valor': 0.1,
+     'data_hora': '2026-01-01T09:00:00', 'descricao': 'Pão de queijo'},
+    {'tipo': 'entrada', 'categoria': 'venda', 'forma_pagamento': 'Dinheiro', 'valor': 0.2,
+     'data_hora': '2026-01-01T09:05:00'},
+    {'tipo': 'entrada', 'categoria': 'suprimento', 'valor': 30, 'data_hora': '2026-01-01T10:00:00'},
+    {'tipo': 'saida', 'categoria': 'sangria', 'valor': 0.1, 'data_hora': '2026-01-01T11:00:00',
+     'descricao': 'Descrição bem comprida da sangria do fim da manhã'},
+]
+
+
+@pytest.fixture
+def impressora():
+    """Impressora em rede de teste: guarda os bytes de cada conexão"""
+    servidor = socket.socket()
+    servidor.bind(('127.0.0.1', 0))
+    servidor.listen(1)
+    recebidos = []
+
+    def aceitar():
+        while True:
+            try:
+                conexao, _ = servidor.accept()
+            except OSError:
+                return
+            dados = bytearray()
+            with conexao:
+                while parte := conexao.recv(4096):
+                    dados += parte
+            recebidos.append(bytes(dados))
+
+    thread = Thread(target=aceitar, daemon=True)
+    thread.start()
+    yield servidor.getsockname()[1], recebidos
+    servidor.close()
+
+
+def _esperar(condicao):
+    fim = time.monotonic() + 5
+    while not condicao():
+        assert time.monotonic() < fim
+        time.sleep(0.01)
+
+
+def test_texto_em_48_colunas_e_centavos():
+    texto = gerar_cupom_texto(CAIXA, LANCAMENTOS, 'Loja Teste')
+
+    assert max(len(linha) for linha in texto.splitlines()) <= 48
+    assert 'Diferença: CONFERIDO' in texto
+    assert 'SALDO EM DINHEIRO' in texto
+    # 0,10 + 0,20 somados em centavos, sem resto de float
+    assert any(linha.startswith('TOTAL VENDAS') and linha.endswith('R$ 0,30') for linha in texto.splitlines())
+    assert 'TOTAL SANGRIAS: R$ 0,10' in texto
+    assert '09:00 Dinheiro' in texto and '  Pão de queijo' in texto
+    assert '11:00 Descrição bem comprida...' in texto
+
+
+def test_escpos_com_acentos_e_corte():
+    conteudo = gerar_cupom_escpos(CAIXA, LANCAMENTOS, 'Loja Teste')
+
+    assert conteudo.startswith(cupom_termico.INICIAR + cupom_termico.PAGINA_CP860)
+    assert conteudo.endswith(cupom_termico.AVANCAR_E_CORTAR)
+    assert 'Pão de queijo'.encode('cp860') in conteudo
+
+
+def test_pdf_usa_as_mesmas_linhas(monkeypatch):
+    chamadas = []
+
+    def contar(*args):
+        chamadas.append(args)
+        return linhas_cupom(*args)
+
+    monkeypatch.setattr(pdf_generator, 'linhas_cupom', contar)
+
+    pdf = pdf_generator.gerar_cupom_termico_caixa(CAIXA, LANCAMENTOS, 'Loja & Cia').getvalue()
+
+    assert pdf.startswith(b'%PDF')
+    assert chamadas == [(CAIXA, LANCAMENTOS, 'Loja & Cia', None)]
+
+
+def test_imprimir_envia_por_tcp(impressora):
+    porta, recebidos = impressora
+    conteudo = gerar_cupom_escpos(CAIXA, LANCAMENTOS, 'Loja Teste')
+
+    imprimir(conteudo, '127.0.0.1', porta)
+
+    _esperar(lambda: recebidos)
+    assert recebidos == [conteudo]
+
+
+@pytest.fixture
+def cliente(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'cupom.db'}")
+    app = create_app()
+    with app.app_context():
+        aplicar_migracoes(echo=lambda mensagem: None)
+    esquecer_caixa_aberto()
+    cliente = app.test_client()
+    cliente.post('/api/caixa/abrir', json={'operador': 'Teste', 'troco_inicial': 0})
+    cliente.post('/api/lancamento', json={
+        'tipo': 'entrada', 'categoria': 'venda', 'valor': 12.5, 'forma_pagamento': 'PIX'
+    })
+    return cliente
+
+
+def _caixa_id(cliente):
+    return cliente.get('/api/caixa/status').get_json()['caixa']['id']
+
+
+def test_rota_texto_e_escpos(cliente):
+    caixa_id = _caixa_id(cliente)
+
+    texto = cliente.get(f'/api/relatorio/caixa/{caixa_id}/cupom?format=text')
+    assert texto.status_code == 200 and texto.mimetype == 'text/plain'
+    assert 'R$ 12,50' in texto.get_data(as_text=True)
+
+    escpos = cliente.get(f'/api/relatorio/caixa/{caixa_id}/cupom?formato=escpos')
+    assert escpos.data.endswith(cupom_termico.AVANCAR_E_CORTAR)
+
+    assert cliente.get(f'/api/relatorio/caixa/{caixa_id}/cupom?format=xml').status_code == 400
+
+
+def test_rota_imprimir(cliente, impressora, monkeypatch):
+    porta, recebidos = impressora
+    caixa_id = _caixa_id(cliente)
+    url = f'/api/relatorio/caixa/{caixa_id}/cupom/imprimir'
+
+    assert cliente.post(url).status_code == 503
+
+    monkeypatch.setattr(routes, 'IMPRESSORA_HOST', '127.0.0.1')
+    monkeypatch.setattr(cupom_termico, 'IMPRESSORA_HOST', '127.0.0.1')
+    monkeypatch.setattr(cupom_termico, 'IMPRESSORA_PORTA', porta)
+    resposta = cliente.post(url)
+    assert resposta.status_code == 200
+    _esperar(lambda: recebidos)
+    assert resposta.get_json()['bytes'] == len(recebidos[0])
+    assert recebidos[0].startswith(cupom_termico.INICIAR)
+
+    # Impressora fora do ar
+    with socket.socket() as fechado:
+        fechado.bind(('127.0.0.1', 0))
+        monkeypatch.setattr(cupom_termico, 'IMPRESSORA_PORTA', fechado.getsockname()[1])
+    assert cliente.post(url).status_code == 502
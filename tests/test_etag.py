@@ -0,0 +1,85 @@
+"""
+Leituras consultadas em intervalo respondem 304 enquanto o livro não muda
+e uma ETag nova depois de qualquer gravação.
+"""
+import pytest
+
+from app import create_app
+from app.migrations import aplicar_migracoes
+
+LEITURAS = (
+    '/api/caixa/status',
+    '/api/caixa/painel',
+    '/api/gerente/resumo-hoje',
+    '/api/caixas',
+)
+
+
+@pytest.fixture
+def cliente(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'etag.db'}")
+    app = create_app()
+    with app.app_context():
+        aplicar_migracoes(echo=lambda mensagem: None)
+    cliente = app.test_client()
+    resposta = cliente.post('/api/caixa/abrir', json={'operador': 'Teste', 'troco_inicial': 10})
+    assert resposta.status_code == 200, resposta.get_json()
+    return cliente
+
+
+def _etag(cliente, url):
+    resposta = cliente.get(url)
+    assert resposta.status_code == 200, url
+    assert resposta.headers['ETag'], url
+    return resposta.headers['ETag']
+
+
+def _venda(cliente, valor=10):
+    resposta = cliente.post('/api/lancamento', json={
+        'tipo': 'entrada', 'categoria': 'venda', 'valor': valor, 'forma_pagamento': 'PIX'
+    })
+    assert resposta.status_code == 200, resposta.get_json()
+    return resposta.get_json()['lancamento']['id']
+
+
+@pytest.mark.parametrize('url', LEITURAS)
+def test_mesma_etag_responde_304(cliente, url):
+    etag = _etag(cliente, url)
+
+    resposta = cliente.get(url, headers={'If-None-Match': etag})
+
+    assert resposta.status_code == 304
+    assert resposta.data == b''
+    assert resposta.headers['ETag'] == etag
+
+
+@pytest.mark.parametrize('url', LEITURAS)
+def test_gravacoes_geram_etag_nova(cliente, url):
+    vistas = [_etag(cliente, url)]
+
+    id = _venda(cliente)
+    vistas.append(_etag(cliente, url))
+
+    cliente.post('/api/gerente/estornar-venda', json={'lancamento_id': id, 'motivo': 'teste'})
+    vistas.append(_etag(cliente, url))
+
+    cliente.delete(f'/api/lancamento/{_venda(cliente, 5)}')
+    vistas.append(_etag(cliente, url))
+
+    assert len(set(vistas)) == len(vistas)
+    assert cliente.get(url, headers={'If-None-Match': vistas[0]}).status_code == 200
+
+
+def test_parametros_fazem_parte_da_etag(cliente):
+    etag = _etag(cliente, '/api/caixas?pagina=1')
+
+    assert cliente.get('/api/caixas?pagina=2', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_configuracao_muda_etag(cliente):
+    etag = _etag(cliente, '/api/configuracao')
+    assert cliente.get('/api/configuracao', headers={'If-None-Match': etag}).status_code == 304
+
+    cliente.put('/api/configuracao', json={'nome_loja': 'Outra Loja'})
+
+    assert cliente.get('/api/configuracao', headers={'If-None-Match': etag}).status_code == 200
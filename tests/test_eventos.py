@@ -0,0 +1,81 @@
+"""
+Ids de evento confirmados fora de ordem (dois caixas gravando ao mesmo
+tempo no PostgreSQL) ainda chegam ao painel conectado.
+"""
+import json
+
+import pytest
+
+from app import create_app
+from app import eventos
+from app.migrations import aplicar_migracoes
+from app.models import db, Evento
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'eventos.db'}")
+    monkeypatch.setattr(eventos, 'DIRETORIO', str(tmp_path / 'sockets'))
+    app = create_app()
+    with app.app_context():
+        aplicar_migracoes(echo=lambda mensagem: None)
+    return app
+
+
+def _gravar(*ids):
+    for id in ids:
+        db.session.add(Evento(id=id, tipo='lancamento', caixa_id=1, dados='{}'))
+    db.session.commit()
+
+
+def _proximos(fluxo):
+    """Mensagens do fluxo até o 'resumo' que fecha o lote"""
+    mensagens = []
+    for mensagem in fluxo:
+        mensagens.append(mensagem)
+        if mensagem.startswith('event: resumo'):
+            return mensagens
+
+
+def _ids(mensagens):
+    """Ids (da tabela evento) dos lançamentos recebidos"""
+    ids = []
+    for mensagem in mensagens:
+        campos = dict(linha.split(': ', 1) for linha in mensagem.strip().splitlines())
+        if campos.get('event') == 'lancamento':
+            ids.append(json.loads(campos['data'])['id'])
+    return ids
+
+
+def test_id_confirmado_depois_de_um_maior_e_entregue(app):
+    with app.test_request_context():
+        fluxo = eventos.transmitir(ultimo_id=0)
+        assert next(fluxo).startswith('retry:')
+        assert next(fluxo).startswith('id: 0\nevent: conectado')
+
+        # O evento 2 ainda não foi confirmado quando o 1 e o 3 são lidos
+        _gravar(1, 3)
+        assert _ids(_proximos(fluxo)) == [1, 3]
+
+        _gravar(2)
+        eventos._acordar()
+        mensagens = _proximos(fluxo)
+        assert _ids(mensagens) == [2]
+        # O cursor da conexão continua no maior id já lido
+        assert mensagens[0].startswith('id: 3\n')
+
+
+def test_lacuna_expira(app, monkeypatch):
+    monkeypatch.setattr(eventos, 'JANELA_LACUNA', -1)
+    with app.test_request_context():
+        fluxo = eventos.transmitir(ultimo_id=0)
+        next(fluxo), next(fluxo)
+
+        _gravar(1, 3)
+        assert _ids(_proximos(fluxo)) == [1, 3]
+
+        # Id de transação desfeita: some da lista e não é mais procurado
+        _gravar(4)
+        eventos._acordar()
+        _gravar(2)
+        assert _ids(_proximos(fluxo)) == [4]
@@ -0,0 +1,128 @@
+"""
+Fila de relatórios: cada pedido é reservado por um só processo, o filho
+que passa do limite de memória termina o pedido com erro e, ao desligar,
+os pedidos em geração voltam para a fila.
+"""
+import os
+import signal
+import time
+import multiprocessing
+
+import pytest
+
+from app import create_app, fila_relatorios, relatorios
+from app.migrations import aplicar_migracoes
+from app.models import db, RelatorioPedido
+from app.fila_relatorios import enfileirar, reservar, posicao
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'fila.db'}")
+    monkeypatch.setattr(fila_relatorios, 'DIRETORIO', str(tmp_path / 'relatorios'))
+    os.makedirs(fila_relatorios.DIRETORIO)
+    app = create_app()
+    with app.app_context():
+        aplicar_migracoes(echo=lambda mensagem: None)
+    return app
+
+
+@pytest.fixture
+def gerar(monkeypatch):
+    """gerar() de teste: grava um PDF mínimo, dorme ou aloca conforme os parâmetros"""
+    def gerar(tipo, parametros, destino):
+        if parametros.get('dormir'):
+            time.sleep(60)
+        if parametros.get('alocar_mb'):
+            bytearray(parametros['alocar_mb'] * 1024 * 1024)
+        destino.write(b'%PDF-teste')
+        return 'teste.pdf'
+
+    monkeypatch.setattr(relatorios, 'gerar', gerar)
+
+
+def _pedido(app, pedido_id):
+    with app.app_context():
+        return db.session.get(RelatorioPedido, pedido_id).to_dict()
+
+
+def _esperar(condicao, limite=10):
+    fim = time.monotonic() + limite
+    while not condicao():
+        assert time.monotonic() < fim
+        time.sleep(0.05)
+
+
+def _em_processo(app, alvo, *args):
+    """Roda alvo num processo filho (fork), sem levar conexões abertas"""
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    processo = multiprocessing.get_context('fork').Process(target=alvo, args=args)
+    processo.start()
+    return processo
+
+
+def test_reserva_em_ordem_e_uma_vez(app):
+    with app.app_context():
+        primeiro = enfileirar('periodo', {}).id
+        segundo = enfileirar('periodo', {}).id
+        assert posicao(db.session.get(RelatorioPedido, segundo)) == 1
+
+        assert reservar() == primeiro
+        assert reservar() == segundo
+        assert reservar() is None
+
+        status = db.session.query(RelatorioPedido.status).all()
+        assert [s for s, in status] == ['processando', 'processando']
+
+
+def test_fila_cheia(app, monkeypatch):
+    monkeypatch.setattr(fila_relatorios, 'MAX_PENDENTES', 1)
+    with app.app_context():
+        enfileirar('periodo', {})
+        with pytest.raises(fila_relatorios.FilaCheia):
+            enfileirar('periodo', {})
+
+
+@pytest.mark.skipif(fila_relatorios.resource is None, reason='sem rlimit')
+def test_limite_de_memoria_termina_com_erro(app, gerar, monkeypatch):
+    # Limite pouco acima do que o processo já usa
+    with open('/proc/self/status') as status:
+        usado = next(int(linha.split()[1]) for linha in status if linha.startswith('VmSize'))
+    monkeypatch.setattr(fila_relatorios, 'MEMORIA_MAXIMA_MB', usado // 1024 + 64)
+
+    with app.app_context():
+        pedido_id = enfileirar('periodo', {'alocar_mb': 512}).id
+        assert reservar() == pedido_id
+
+    processo = _em_processo(app, fila_relatorios._executar, app, pedido_id)
+    processo.join(30)
+
+    assert processo.exitcode == 0
+    pedido = _pedido(app, pedido_id)
+    assert pedido['status'] == 'erro'
+    assert 'limite de' in pedido['erro'] and 'MB' in pedido['erro']
+    assert os.listdir(fila_relatorios.DIRETORIO) == []
+
+
+def test_sigterm_devolve_pedidos_em_geracao(app, gerar, monkeypatch):
+    monkeypatch.setattr(fila_relatorios, 'INTERVALO', 0.05)
+    with app.app_context():
+        pronto = enfileirar('periodo', {}).id
+        demorado = enfileirar('periodo', {'dormir': True}).id
+
+    trabalhador = _em_processo(app, fila_relatorios.trabalhar, app, 2, lambda mensagem: None)
+    _esperar(lambda: _pedido(app, pronto)['status'] == 'pronto')
+    _esperar(lambda: _pedido(app, demorado)['status'] == 'processando')
+    assert fila_relatorios.fila_ativa()
+
+    os.kill(trabalhador.pid, signal.SIGTERM)
+    trabalhador.join(10)
+
+    assert trabalhador.exitcode == 0
+    pedido = _pedido(app, demorado)
+    assert pedido['status'] == 'pendente' and pedido['iniciado_em'] is None
+    assert _pedido(app, pronto)['nome_arquivo'] == 'teste.pdf'
+    assert sorted(os.listdir(fila_relatorios.DIRETORIO)) == [f'{pronto}.pdf']
+    assert not fila_relatorios.fila_ativa()
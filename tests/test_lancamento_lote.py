@@ -0,0 +1,149 @@
+"""
+POST /api/lancamentos/lote: a chave gerada no cliente faz o reenvio (ou a
+repetição no mesmo lote) voltar como 'duplicado', sem gravar de novo, e
+cada item só entra no caixa em que foi feito.
+"""
+import pytest
+
+from app import create_app
+from app import lancamento_rapido
+from app.migrations import aplicar_migracoes
+from app.models import Caixa, Lancamento
+from app.lancamento_rapido import esquecer_caixa_aberto
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'lote.db'}")
+    app = create_app()
+    with app.app_context():
+        aplicar_migracoes(echo=lambda mensagem: None)
+    esquecer_caixa_aberto()
+    return app
+
+
+@pytest.fixture
+def cliente(app):
+    cliente = app.test_client()
+    resposta = cliente.post('/api/caixa/abrir', json={'operador': 'Teste', 'troco_inicial': 0})
+    assert resposta.status_code == 200, resposta.get_json()
+    return cliente
+
+
+def _item(chave, valor=10):
+    return {'chave': chave, 'tipo': 'entrada', 'categoria': 'venda', 'valor': valor, 'forma_pagamento': 'PIX'}
+
+
+def _enviar(cliente, *itens):
+    resposta = cliente.post('/api/lancamentos/lote', json={'lancamentos': list(itens)})
+    assert resposta.status_code == 200, resposta.get_json()
+    return resposta.get_json()
+
+
+def _status(dados):
+    return [resultado['status'] for resultado in dados['resultados']]
+
+
+def test_chave_repetida_no_lote_e_no_reenvio(app, cliente):
+    primeiro = _enviar(cliente, _item('a'), _item('b', 5), _item('a'))
+    assert _status(primeiro) == ['criado', 'criado', 'duplicado']
+    assert primeiro['resultados'][2]['id'] == primeiro['resultados'][0]['id']
+
+    reenvio = _enviar(cliente, _item('b', 5), _item('c', 1), _item('a'))
+    assert _status(reenvio) == ['duplicado', 'criado', 'duplicado']
+    assert reenvio['resultados'][0]['id'] == primeiro['resultados'][1]['id']
+    assert reenvio['resultados'][2]['id'] == primeiro['resultados'][0]['id']
+
+    with app.app_context():
+        assert Lancamento.query.count() == 3
+        assert Caixa.query.one().total_entradas == 1600
+
+
+def test_chave_gravada_por_outro_envio_ao_mesmo_tempo(app, cliente, monkeypatch):
+    primeiro = _enviar(cliente, _item('a'), _item('b'))
+
+    # Os dois primeiros SELECTs de chaves não veem as gravações concorrentes
+    original = lancamento_rapido._chaves_gravadas
+    vistas = [{}, {'a': primeiro['resultados'][0]['id']}]
+    monkeypatch.setattr(
+        lancamento_rapido, '_chaves_gravadas',
+        lambda chaves: vistas.pop(0) if vistas else original(chaves)
+    )
+
+    dados = _enviar(cliente, _item('a'), _item('b'), _item('c'))
+    assert _status(dados) == ['duplicado', 'duplicado', 'criado']
+
+    with app.app_context():
+        assert Lancamento.query.count() == 3
+        assert Caixa.query.one().total_entradas == 3000
+
+
+def test_sem_caixa_aberto_erro_por_item(app, cliente):
+    fechado = cliente.get('/api/caixa/status').get_json()['caixa']['id']
+    primeiro = _enviar(cliente, _item('a'))
+    cliente.post('/api/caixa/fechar', json={'valor_contado': 0})
+
+    dados = _enviar(cliente, _item('a'), _item('b'), {'chave': 'c'}, _item('b'), dict(_item('d'), caixa_id=fechado))
+    assert _status(dados) == ['duplicado', 'erro', 'erro', 'erro', 'erro']
+    assert dados['resultados'][0]['id'] == primeiro['resultados'][0]['id']
+    assert dados['resultados'][1]['mensagem'] == 'Não há caixa aberto'
+    assert dados['resultados'][3]['mensagem'] == 'Não há caixa aberto'
+    assert dados['resultados'][4]['mensagem'] == 'Caixa do lançamento já foi fechado'
+    assert (dados['criados'], dados['duplicados'], dados['erros']) == (0, 1, 4)
+
+    with app.app_context():
+        assert Lancamento.query.count() == 1
+
+
+def _caixa_aberto(cliente):
+    return cliente.get('/api/caixa/status').get_json()['caixa']['id']
+
+
+def _trocar_caixa(cliente):
+    cliente.post('/api/caixa/fechar', json={'valor_contado': 0})
+    resposta = cliente.post('/api/caixa/abrir', json={'operador': 'Outro', 'troco_inicial': 0})
+    assert resposta.status_code == 200, resposta.get_json()
+    return _caixa_aberto(cliente)
+
+
+def _total(cliente, caixa_id):
+    return cliente.get(f'/api/caixa/{caixa_id}').get_json()['caixa']['total_entradas']
+
+
+def test_item_do_caixa_aberto_entra(cliente):
+    caixa_id = _caixa_aberto(cliente)
+
+    dados = _enviar(cliente, dict(_item('a'), caixa_id=caixa_id))
+
+    assert _status(dados) == ['criado']
+    assert _total(cliente, caixa_id) == 10
+
+
+def test_item_de_caixa_fechado_volta_como_erro(cliente):
+    antigo = _caixa_aberto(cliente)
+    novo = _trocar_caixa(cliente)
+
+    dados = _enviar(
+        cliente,
+        dict(_item('velha'), caixa_id=antigo),
+        dict(_item('velha'), caixa_id=antigo),
+        dict(_item('nova', 5), caixa_id=novo),
+    )
+
+    assert _status(dados) == ['erro', 'erro', 'criado']
+    assert dados['resultados'][0]['mensagem'] == 'Caixa do lançamento já foi fechado'
+    assert _total(cliente, novo) == 5
+    assert _total(cliente, antigo) == 0
+
+
+def test_lancamento_de_caixa_fechado_e_recusado(cliente):
+    antigo = _caixa_aberto(cliente)
+    _trocar_caixa(cliente)
+
+    resposta = cliente.post('/api/lancamento', json={
+        'caixa_id': antigo, 'tipo': 'entrada', 'categoria': 'venda', 'valor': 10
+    })
+
+    assert resposta.status_code == 400
+    assert not resposta.get_json()['success']
+    assert _total(cliente, antigo) == 0
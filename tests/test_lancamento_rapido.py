@@ -0,0 +1,89 @@
+"""
+O caminho rápido de POST /api/lancamento precisa deixar o banco igual ao
+caminho anterior pelo ORM (busca do caixa + registrar_lancamento).
+"""
+import pytest
+
+from app import create_app
+from app.benchmark import _lancamento_orm
+from app.migrations import aplicar_migracoes
+from app.models import Caixa, CaixaTotal, ResumoDiario
+from app.lancamento_rapido import esquecer_caixa_aberto
+
+LANCAMENTOS = [
+    {'tipo': 'entrada', 'categoria': 'venda', 'forma_pagamento': 'Dinheiro', 'valor': 12.34, 'valor_recebido': 20},
+    {'tipo': 'entrada', 'categoria': 'venda', 'forma_pagamento': 'PIX', 'valor': 0.1},
+    {'tipo': 'entrada', 'categoria': 'venda', 'forma_pagamento': 'PIX', 'valor': 0.2},
+    {'tipo': 'entrada', 'categoria': 'venda', 'forma_pagamento': 'Cartão Débito', 'valor': 1999.99},
+    {'tipo': 'saida', 'categoria': 'sangria', 'valor': 50, 'descricao': 'Banco'},
+    {'tipo': 'entrada', 'categoria': 'suprimento', 'valor': 25.5},
+    {'tipo': 'saida', 'categoria': 'outros', 'forma_pagamento': 'Dinheiro', 'valor': 3.3},
+]
+
+
+def _app(diretorio, monkeypatch, nome):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{diretorio / nome}")
+    app = create_app()
+    with app.app_context():
+        aplicar_migracoes(echo=lambda mensagem: None)
+    esquecer_caixa_aberto()
+    cliente = app.test_client()
+    resposta = cliente.post('/api/caixa/abrir', json={'operador': 'Teste', 'troco_inicial': 100})
+    assert resposta.status_code == 200, resposta.get_json()
+    return app, cliente
+
+
+def _estado(app):
+    """Totais do caixa, totais por forma/categoria e resumo diário"""
+    with app.app_context():
+        caixa = Caixa.query.one()
+        return (
+            caixa.calcular_totais(),
+            caixa.movimento_dinheiro,
+            sorted((t.grupo, t.chave, t.valor) for t in CaixaTotal.query.all()),
+            [
+                {coluna.name: getattr(linha, coluna.name) for coluna in ResumoDiario.__table__.columns}
+                for linha in ResumoDiario.query.all()
+            ],
+        )
+
+
+def _sem_data(lancamento):
+    return {campo: valor for campo, valor in lancamento.items() if campo != 'data_hora'}
+
+
+@pytest.fixture
+def caminhos(tmp_path, monkeypatch):
+    lento, _ = _app(tmp_path, monkeypatch, 'orm.db')
+    with lento.app_context():
+        respostas_lento = [_lancamento_orm(dados) for dados in LANCAMENTOS]
+
+    rapido, cliente = _app(tmp_path, monkeypatch, 'rapido.db')
+    respostas_rapido = []
+    for dados in LANCAMENTOS:
+        resposta = cliente.post('/api/lancamento', json=dados)
+        assert resposta.status_code == 200, resposta.get_json()
+        respostas_rapido.append(resposta.get_json()['lancamento'])
+
+    return lento, rapido, respostas_lento, respostas_rapido
+
+
+def test_mesmos_totais_nos_dois_caminhos(caminhos):
+    lento, rapido, _, _ = caminhos
+    assert _estado(rapido) == _estado(lento)
+
+
+def test_mesmo_lancamento_serializado(caminhos):
+    _, _, respostas_lento, respostas_rapido = caminhos
+    assert [_sem_data(l) for l in respostas_rapido] == [_sem_data(l) for l in respostas_lento]
+
+
+def test_totais_rapidos_iguais_ao_livro(caminhos):
+    _, rapido, _, _ = caminhos
+    with rapido.app_context():
+        caixa = Caixa.query.one()
+        campos, totais = caixa.totais_do_livro()
+        assert {campo: getattr(caixa, campo) for campo in campos} == campos
+        assert {(t.grupo, t.chave): t.valor for t in CaixaTotal.query.all()} == totais
+        assert caixa.total_entradas == 203813
+        assert caixa.movimento_dinheiro == 1234 - 5000 + 2550 - 330
@@ -0,0 +1,119 @@
+"""
+Migração 003: bancos com valores em FLOAT passam para centavos inteiros sem
+perder nem ganhar um centavo, inclusive nos totais acumulados do caixa.
+"""
+import sqlite3
+
+import pytest
+
+from app import create_app
+from app.migrations import aplicar_migracoes
+
+# Esquema anterior à migração 003 (valores monetários em FLOAT)
+ESQUEMA_FLOAT = """
+CREATE TABLE caixa (
+    id INTEGER PRIMARY KEY,
+    data_abertura DATETIME NOT NULL,
+    data_fechamento DATETIME,
+    operador VARCHAR(200),
+    troco_inicial FLOAT NOT NULL,
+    valor_contado FLOAT,
+    diferenca FLOAT,
+    observacao TEXT,
+    status VARCHAR(20) NOT NULL,
+    total_entradas FLOAT NOT NULL DEFAULT 0,
+    total_saidas FLOAT NOT NULL DEFAULT 0,
+    movimento_dinheiro FLOAT NOT NULL DEFAULT 0
+);
+CREATE TABLE caixa_total (
+    caixa_id INTEGER NOT NULL REFERENCES caixa (id),
+    grupo VARCHAR(20) NOT NULL,
+    chave VARCHAR(50) NOT NULL,
+    valor FLOAT NOT NULL,
+    PRIMARY KEY (caixa_id, grupo, chave)
+);
+CREATE TABLE lancamento (
+    id INTEGER PRIMARY KEY,
+    caixa_id INTEGER NOT NULL REFERENCES caixa (id),
+    data_hora DATETIME NOT NULL,
+    tipo VARCHAR(20) NOT NULL,
+    categoria VARCHAR(50) NOT NULL,
+    forma_pagamento VARCHAR(50),
+    valor FLOAT NOT NULL,
+    valor_recebido FLOAT,
+    troco FLOAT,
+    descricao TEXT
+);
+"""
+
+# (tipo, categoria, forma, valor, valor_recebido, troco)
+LANCAMENTOS = [
+    ('entrada', 'venda', 'Dinheiro', 0.1, 1.0, 0.9),
+    ('entrada', 'venda', 'Dinheiro', 0.2, None, None),
+    ('entrada', 'venda', 'PIX', 19.99, None, None),
+    ('entrada', 'venda', 'Cartão Crédito', 1234.56, None, None),
+    ('saida', 'sangria', None, 33.33, None, None),
+    ('entrada', 'suprimento', None, 0.07, None, None),
+]
+
+
+@pytest.fixture
+def banco_float(tmp_path, monkeypatch):
+    caminho = tmp_path / 'float.db'
+    conn = sqlite3.connect(caminho)
+    conn.executescript(ESQUEMA_FLOAT)
+    # Totais acumulados com o erro típico de somas em float
+    conn.execute(
+        "INSERT INTO caixa (id, data_abertura, operador, troco_inicial, status, "
+        "total_entradas, total_saidas, movimento_dinheiro) "
+        "VALUES (1, '2026-01-05 08:00:00', 'Ana', 50.05, 'aberto', 1254.9199999999998, 33.33, -33.029999999999994)"
+    )
+    conn.execute("INSERT INTO caixa_total VALUES (1, 'forma', 'Dinheiro', 0.30000000000000004)")
+    for i, (tipo, categoria, forma, valor, recebido, troco) in enumerate(LANCAMENTOS, 1):
+        conn.execute(
+            'INSERT INTO lancamento (id, caixa_id, data_hora, tipo, categoria, forma_pagamento, '
+            'valor, valor_recebido, troco) VALUES (?, 1, ?, ?, ?, ?, ?, ?, ?)',
+            (i, f'2026-01-05 09:{i:02d}:00', tipo, categoria, forma, valor, recebido, troco)
+        )
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{caminho}')
+    app = create_app()
+    with app.app_context():
+        aplicar_migracoes(echo=lambda mensagem: None)
+    return app, caminho
+
+
+def test_colunas_float_viram_centavos(banco_float):
+    _, caminho = banco_float
+    conn = sqlite3.connect(caminho)
+
+    colunas = {linha[1] for linha in conn.execute('PRAGMA table_info(lancamento)')}
+    assert {'valor_centavos', 'valor_recebido_centavos', 'troco_centavos'} <= colunas
+    assert not {'valor', 'valor_recebido', 'troco'} & colunas
+
+    valores = conn.execute(
+        'SELECT valor_centavos, valor_recebido_centavos, troco_centavos FROM lancamento ORDER BY id'
+    ).fetchall()
+    assert valores == [(10, 100, 90), (20, None, None), (1999, None, None),
+                       (123456, None, None), (3333, None, None), (7, None, None)]
+    assert conn.execute('SELECT troco_inicial_centavos FROM caixa').fetchone() == (5005,)
+
+
+def test_totais_reconstruidos_ao_centavo(banco_float):
+    app, caminho = banco_float
+
+    caixa = app.test_client().get('/api/caixa/1').get_json()['caixa']
+    assert caixa['total_entradas'] == 1254.92
+    assert caixa['total_saidas'] == 33.33
+    assert caixa['saldo_atual'] == 1271.64
+
+    conn = sqlite3.connect(caminho)
+    assert conn.execute(
+        'SELECT total_entradas_centavos, total_saidas_centavos, movimento_dinheiro_centavos FROM caixa'
+    ).fetchone() == (125492, 3333, -3296)
+    formas = dict(conn.execute(
+        "SELECT chave, valor_centavos FROM caixa_total WHERE caixa_id = 1 AND grupo = 'forma'"
+    ).fetchall())
+    assert formas == {'Dinheiro': 30, 'PIX': 1999, 'Cartão Crédito': 123456}
@@ -0,0 +1,96 @@
+"""
+PDF do relatório por período: relação completa até o limite de
+lançamentos, agrupada por dia acima dele e só o resumo em períodos longos.
+"""
+import pytest
+
+from app import create_app, pdf_generator, routes
+from app.migrations import aplicar_migracoes
+from app.lancamento_rapido import esquecer_caixa_aberto
+from app.pdf_generator import modo_periodo
+
+
+@pytest.fixture
+def cliente(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'periodo.db'}")
+    app = create_app()
+    with app.app_context():
+        aplicar_migracoes(echo=lambda mensagem: None)
+    esquecer_caixa_aberto()
+    cliente = app.test_client()
+    cliente.post('/api/caixa/abrir', json={'operador': 'Teste', 'troco_inicial': 0})
+    for valor in (10, 2.5):
+        cliente.post('/api/lancamento', json={
+            'tipo': 'entrada', 'categoria': 'venda', 'valor': valor, 'forma_pagamento': 'PIX'
+        })
+    cliente.post('/api/lancamento', json={'tipo': 'saida', 'categoria': 'despesa', 'valor': 1})
+    return cliente
+
+
+@pytest.fixture
+def gerados(monkeypatch):
+    """Dados passados ao gerador do PDF em cada requisição"""
+    dados = []
+    original = routes.gerar_relatorio_periodo_pdf
+
+    def guardar(dados_relatorio, nome_loja, destino=None):
+        dados.append(dados_relatorio)
+        return original(dados_relatorio, nome_loja, destino=destino)
+
+    monkeypatch.setattr(routes, 'gerar_relatorio_periodo_pdf', guardar)
+    return dados
+
+
+def _pdf(cliente, inicio='2000-01-01', fim='2100-01-01', **parametros):
+    resposta = cliente.get('/api/relatorio/periodo/pdf', query_string=dict(
+        data_inicio=inicio, data_fim=fim, **parametros
+    ))
+    assert resposta.status_code == 200
+    assert resposta.data.startswith(b'%PDF')
+    assert resposta.content_length == len(resposta.data)
+    return resposta
+
+
+def test_modo_dentro_dos_limites():
+    assert modo_periodo('completo', 10, 30) == 'completo'
+    assert modo_periodo('qualquer', 10, 30) == 'completo'
+    assert modo_periodo('completo', pdf_generator.LIMITE_LANCAMENTOS_PERIODO + 1, 30) == 'diario'
+    assert modo_periodo('completo', pdf_generator.LIMITE_LANCAMENTOS_PERIODO + 1, 401) == 'resumo'
+    assert modo_periodo('resumo', 10, 30) == 'resumo'
+
+
+def test_completo(cliente, gerados):
+    _pdf(cliente, fim='2099-12-31')
+
+    dados = gerados[0]
+    assert len(dados['lancamentos']) == 3
+    assert 'por_dia' not in dados and 'qtd_lancamentos' not in dados
+    assert dados['totais'] == {'entradas': 12.5, 'saidas': 1.0, 'saldo': 11.5}
+
+
+def _hoje(cliente):
+    return cliente.get('/api/caixa/status').get_json()['caixa']['data_abertura'][:10]
+
+
+def test_acima_do_limite_agrupa_por_dia(cliente, gerados, monkeypatch):
+    monkeypatch.setattr(pdf_generator, 'LIMITE_LANCAMENTOS_PERIODO', 2)
+    hoje = _hoje(cliente)
+
+    _pdf(cliente, inicio=hoje, fim=f'{hoje}T23:59:59')
+    # Mais de LIMITE_DIAS_PERIODO dias: só o resumo
+    _pdf(cliente)
+
+    assert 'lancamentos' not in gerados[0] and gerados[0]['qtd_lancamentos'] == 3
+    assert gerados[0]['por_dia']['vendas']
+    assert 'por_dia' not in gerados[1] and gerados[1]['qtd_lancamentos'] == 3
+
+
+def test_por_dia_em_centavos(cliente, gerados):
+    hoje = _hoje(cliente)
+    _pdf(cliente, inicio=hoje, fim=f'{hoje}T23:59:59', detalhe='diario')
+
+    dados = gerados[0]
+    [(dia, quantidade, total)] = dados['por_dia']['vendas']
+    assert (dia.isoformat(), quantidade, total) == (hoje, 2, 1250)
+    assert [linha[1:] for linha in dados['por_dia']['despesas']] == [(1, 100)]
+    assert dados['por_dia']['suprimentos'] == []
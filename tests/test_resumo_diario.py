@@ -0,0 +1,86 @@
+"""
+O resumo diário mantido a cada lançamento precisa bater com a reconstrução
+completa a partir do livro (flask resumo-diario reconstruir).
+"""
+from datetime import date
+
+import pytest
+
+from app import create_app
+from app.migrations import aplicar_migracoes
+from app.models import ResumoDiario
+from app.agregacao import resumir
+from app.resumo_diario import reconstruir, resumir_periodo
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'resumo.db'}")
+    app = create_app()
+    with app.app_context():
+        aplicar_migracoes(echo=lambda mensagem: None)
+    return app
+
+
+def _lancar(cliente, tipo, categoria, valor, **extra):
+    resposta = cliente.post('/api/lancamento', json={'tipo': tipo, 'categoria': categoria, 'valor': valor, **extra})
+    assert resposta.status_code == 200, resposta.get_json()
+    return resposta.get_json()['lancamento']['id']
+
+
+def _movimentar(cliente):
+    """Dois caixas no mesmo dia com vendas, troco, sangria, suprimento, estornos e exclusões"""
+    cliente.post('/api/caixa/abrir', json={'operador': 'Ana', 'troco_inicial': 100})
+    _lancar(cliente, 'entrada', 'venda', 12.34, forma_pagamento='Dinheiro', valor_recebido=20)
+    estornada = _lancar(cliente, 'entrada', 'venda', 50, forma_pagamento='Dinheiro')
+    _lancar(cliente, 'entrada', 'venda', 99.99, forma_pagamento='PIX')
+    _lancar(cliente, 'entrada', 'venda', 7.5, forma_pagamento='Cartão Crédito')
+    _lancar(cliente, 'saida', 'sangria', 30)
+    apagado = _lancar(cliente, 'entrada', 'suprimento', 15)
+    _lancar(cliente, 'entrada', 'outros', 4.2)
+    _lancar(cliente, 'saida', 'outros', 1.1)
+
+    resposta = cliente.post('/api/gerente/estornar-venda', json={'lancamento_id': estornada, 'motivo': 'teste'})
+    assert resposta.status_code == 200, resposta.get_json()
+    assert cliente.delete(f'/api/lancamento/{apagado}').status_code == 200
+    cliente.post('/api/caixa/fechar', json={'valor_contado': 0})
+
+    cliente.post('/api/caixa/abrir', json={'operador': 'Bia', 'troco_inicial': 0})
+    _lancar(cliente, 'entrada', 'venda', 3.33, forma_pagamento='Cartão Débito')
+    estornada = _lancar(cliente, 'entrada', 'venda', 8, forma_pagamento='PIX')
+    cliente.post('/api/gerente/estornar-venda', json={'lancamento_id': estornada, 'motivo': 'teste'})
+    _lancar(cliente, 'entrada', 'suprimento', 10)
+
+
+def _linhas():
+    colunas = [coluna.name for coluna in ResumoDiario.__table__.columns]
+    return {
+        (linha.data, linha.caixa_id): {coluna: getattr(linha, coluna) for coluna in colunas}
+        for linha in ResumoDiario.query.all()
+    }
+
+
+def test_resumo_incremental_igual_a_reconstrucao(app):
+    _movimentar(app.test_client())
+
+    with app.app_context():
+        incremental = _linhas()
+        assert len(incremental) == 2
+
+        reconstruir()
+        assert _linhas() == incremental
+
+
+def test_resumo_do_dia_igual_ao_livro(app):
+    _movimentar(app.test_client())
+
+    with app.app_context():
+        hoje = date.today()
+        consolidado = resumir_periodo(hoje, hoje)
+        livro = resumir()
+
+        assert consolidado['vendas'] == livro['vendas']
+        for chave, valor in livro['movimentacoes'].items():
+            assert consolidado['movimentacoes'][chave] == valor, chave
+        for chave, valor in livro['quantidades'].items():
+            assert consolidado['quantidades'][chave] == valor, chave
@@ -0,0 +1,238 @@
+"""
+Sincronização da hora de Brasília contra servidores de hora locais (HTTP e
+SNTP): o offset é aplicado pela thread de sincronização, a leitura nunca
+espera pela rede e só o worker líder consulta as fontes (os demais leem
+hora.json).
+"""
+import json
+import socket
+import struct
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+import pytest
+import pytz
+
+from app import create_app, routes, time_sync
+from app.time_sync import Amostra, BrasiliaTimeSync, NTP_EPOCA
+
+BRASILIA = pytz.timezone('America/Sao_Paulo')
+# Adiantamento do servidor de hora em relação ao relógio local
+ADIANTAMENTO = 90
+
+
+def _brasilia_agora():
+    return datetime.now(BRASILIA).replace(tzinfo=None)
+
+
+class _HoraAdiantada(BaseHTTPRequestHandler):
+    adiantamento = ADIANTAMENTO
+    consultas = 0
+
+    def do_GET(self):
+        type(self).consultas += 1
+        hora = datetime.now(BRASILIA) + timedelta(seconds=self.adiantamento)
+        corpo = json.dumps({'datetime': hora.isoformat()}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Errada(_HoraAdiantada):
+    adiantamento = 900
+
+
+@pytest.fixture
+def diretorio(tmp_path):
+    return tmp_path / 'hora'
+
+
+@pytest.fixture
+def novo(diretorio):
+    """Sincronizador com hora.json e lider.lock próprios do teste"""
+    return lambda apis: BrasiliaTimeSync(apis=apis, timeout=2, diretorio=str(diretorio))
+
+
+def _servir(handler):
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f'http://127.0.0.1:{servidor.server_address[1]}/hora'
+
+
+@pytest.fixture
+def servidor_hora():
+    servidor, url = _servir(_HoraAdiantada)
+    yield url
+    servidor.shutdown()
+    servidor.server_close()
+
+
+@pytest.fixture
+def servidor_errado():
+    servidor, url = _servir(_Errada)
+    yield url
+    servidor.shutdown()
+    servidor.server_close()
+
+
+@pytest.fixture
+def servidor_ntp():
+    """Servidor SNTP (estrato 2) com a mesma hora adiantada"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+
+    def responder():
+        while True:
+            try:
+                pedido, endereco = sock.recvfrom(512)
+            except OSError:
+                return
+            agora = time.time() + ADIANTAMENTO + NTP_EPOCA
+            marca = struct.pack('!II', int(agora), int((agora % 1) * 2**32))
+            resposta = bytearray(48)
+            resposta[0], resposta[1] = 0x24, 2  # LI 0, versão 4, modo 4 (servidor)
+            resposta[24:32] = pedido[40:48]  # origem: a marca de envio do cliente
+            resposta[32:40] = resposta[40:48] = marca
+            try:
+                sock.sendto(bytes(resposta), endereco)
+            except OSError:
+                return
+
+    Thread(target=responder, daemon=True).start()
+    yield f'ntp://127.0.0.1:{sock.getsockname()[1]}'
+    sock.close()
+
+
+@pytest.fixture
+def porta_fechada():
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _HoraAdiantada)
+    url = f'http://127.0.0.1:{servidor.server_address[1]}/hora'
+    servidor.server_close()
+    return url
+
+
+def _adiantamento_medido(sync):
+    return (sync.get_current_time() - _brasilia_agora()).total_seconds()
+
+
+def test_offset_aplicado_pela_thread(novo, servidor_hora):
+    sync = novo([servidor_hora])
+    assert not sync.get_sync_status()['synchronized']
+
+    assert sync.solicitar_sincronizacao(esperar=5)
+
+    assert abs(_adiantamento_medido(sync) - ADIANTAMENTO) < 1
+    status = sync.get_sync_status()
+    assert status['synchronized'] and status['is_fresh']
+    assert abs(status['offset_seconds'] - ADIANTAMENTO) < 1
+    assert status['source'] == servidor_hora
+
+
+def test_sntp(novo, servidor_ntp):
+    sync = novo([servidor_ntp])
+
+    assert sync.solicitar_sincronizacao(esperar=5)
+
+    assert abs(_adiantamento_medido(sync) - ADIANTAMENTO) < 0.01
+    status = sync.get_sync_status()
+    assert status['source'] == servidor_ntp
+    assert status['error_seconds'] < 0.01
+
+
+def test_fonte_discordante_descartada(novo, servidor_hora, servidor_ntp, servidor_errado):
+    sync = novo([servidor_errado, servidor_hora, servidor_ntp])
+
+    assert sync.solicitar_sincronizacao(esperar=5)
+
+    assert abs(_adiantamento_medido(sync) - ADIANTAMENTO) < 1
+    status = sync.get_sync_status()
+    assert status['samples'] == 3
+    assert status['source'] != servidor_errado
+
+
+def test_fonte_fora_do_ar_nao_bloqueia_leitura(novo, porta_fechada):
+    sync = novo([porta_fechada])
+
+    assert sync.solicitar_sincronizacao(esperar=5) is False
+    inicio = time.monotonic()
+    hora = sync.get_current_time(force_sync=True)
+    assert time.monotonic() - inicio < 0.1
+    # Sem amostra vale a hora do servidor
+    assert abs((hora - datetime.now()).total_seconds()) < 1
+
+
+def test_outra_fonte_assume(novo, porta_fechada, servidor_hora):
+    sync = novo([porta_fechada, servidor_hora])
+
+    assert sync.solicitar_sincronizacao(esperar=5)
+    assert sync.get_sync_status()['source'] == servidor_hora
+
+
+def _esperar(condicao, limite=5):
+    fim = time.monotonic() + limite
+    while not condicao():
+        assert time.monotonic() < fim
+        time.sleep(0.01)
+
+
+def test_so_o_lider_consulta_as_fontes(novo, servidor_hora, diretorio, monkeypatch):
+    monkeypatch.setattr(time_sync, 'INTERVALO_LEITURA', 0.05)
+    _HoraAdiantada.consultas = 0
+
+    lider = novo([servidor_hora])
+    lider.iniciar()
+    _esperar(lambda: lider._tentativas >= 1)
+    assert lider._lider and lider._ultimo_resultado
+    assert json.loads((diretorio / 'hora.json').read_text())['theta'] == lider.amostra.theta
+
+    # Worker novo: começa com a amostra do líder, sem consultar a fonte
+    seguidor = novo([servidor_hora])
+    seguidor.iniciar()
+    assert seguidor.amostra == lider.amostra
+    assert abs(_adiantamento_medido(seguidor) - ADIANTAMENTO) < 1
+    _esperar(lambda: seguidor._tentativas >= 2)
+    assert not seguidor._lider
+    assert _HoraAdiantada.consultas == 1
+
+    # Líder termina: o seguidor assume e, com a amostra ainda recente, não sincroniza
+    lider._trava.close()
+    _esperar(lambda: seguidor._lider)
+    assert _HoraAdiantada.consultas == 1
+
+
+def test_amostra_de_outro_boot_ignorada(novo, diretorio):
+    diretorio.mkdir()
+    (diretorio / 'hora.json').write_text(json.dumps({
+        'theta': 1.0e9, 'instante': 0.0, 'offset_seconds': 0.0, 'erro_seconds': 0.0,
+        'fonte': 'ntp://a.ntp.br', 'medicoes': 1, 'boot': 'outro-boot',
+    }))
+
+    sync = novo(['http://127.0.0.1:9/hora'])
+    assert not sync.carregar_compartilhada()
+    assert sync.amostra is None
+
+
+def test_endpoint_com_marcas_ntp(novo, tmp_path, monkeypatch):
+    sync = novo(['http://127.0.0.1:9/hora'])
+    theta = time.time() - time.monotonic() + ADIANTAMENTO
+    sync.amostra = Amostra(theta, time.monotonic(), ADIANTAMENTO, 0.004, 'ntp://a.ntp.br', 3)
+    monkeypatch.setattr(routes, 'get_time_sync', lambda: sync)
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'hora.db'}")
+
+    resposta = create_app().test_client().get('/api/time/current')
+
+    assert resposta.headers['Cache-Control'] == 'no-store'
+    dados = resposta.get_json()
+    assert dados['synchronized'] and dados['error_ms'] == 4
+    assert dados['server_receive_ms'] <= dados['server_transmit_ms']
+    assert abs(dados['server_receive_ms'] / 1000 - time.time() - ADIANTAMENTO) < 1
+    assert abs(dados['timestamp'] - time.time() - ADIANTAMENTO) < 2
+    hora = datetime.fromisoformat(dados['datetime'])
+    assert abs((hora - _brasilia_agora()).total_seconds() - ADIANTAMENTO) < 1